@@ -0,0 +1,232 @@
+from datetime import datetime
+from extensions import db
+from models import Customer, Order, OrderStatusCount
+
+# Order statuses shown on the dashboard, in display order
+ORDER_STATUSES = ('Pending', 'Confirmed', 'Completed', 'Cancelled')
+
+
+def apply_order_insert(order):
+    """
+    Add a new order to its customer's aggregate in the current transaction.
+
+    Call after the order is added to the session and before commit. The
+    customer row is locked for update so concurrent inserts cannot lose counts.
+    """
+    timestamp = order.timestamp or datetime.utcnow()
+    customer = Customer.query.filter_by(mobile_number=order.mobile_number).with_for_update().first()
+    if customer is None:
+        customer = Customer(
+            mobile_number=order.mobile_number,
+            order_count=0,
+            lifetime_spend=0,
+            first_order_at=timestamp
+        )
+        db.session.add(customer)
+
+    customer.order_count += 1
+    customer.lifetime_spend += order.total_price or 0
+    customer.full_name = order.full_name
+    if customer.first_order_at is None or timestamp < customer.first_order_at:
+        customer.first_order_at = timestamp
+    if customer.last_order_at is None or timestamp >= customer.last_order_at:
+        customer.last_order_at = timestamp
+        customer.last_status = order.status or 'Pending'
+
+    _bump_status(order.status or 'Pending', 1, order.total_price or 0)
+
+
+def refresh_customers(mobile_numbers):
+    """
+    Recompute the aggregates of the given customers from their orders.
+
+    Used after status changes and deletes (including bulk ones), where the
+    affected orders are known only by id. Must run after the change has been
+    executed in the current transaction; customers left with no orders are
+    removed. Costs one indexed query over those customers' orders.
+    """
+    mobile_numbers = set(m for m in mobile_numbers if m)
+    if not mobile_numbers:
+        return
+
+    db.session.flush()
+    totals = _customer_totals(db.session.query(
+        Order.mobile_number, Order.full_name, Order.total_price, Order.status, Order.timestamp
+    ).filter(Order.mobile_number.in_(mobile_numbers)).order_by(Order.timestamp))
+
+    customers = {c.mobile_number: c for c in Customer.query.filter(Customer.mobile_number.in_(mobile_numbers))}
+    for mobile in mobile_numbers:
+        customer = customers.get(mobile)
+        if mobile not in totals:
+            if customer is not None:
+                db.session.delete(customer)
+            continue
+        if customer is None:
+            customer = Customer(mobile_number=mobile)
+            db.session.add(customer)
+        for field, value in totals[mobile].items():
+            setattr(customer, field, value)
+
+
+def _customer_totals(rows):
+    """Fold (mobile, full_name, total_price, status, timestamp) rows, oldest first, into Customer fields."""
+    totals = {}
+    for mobile, full_name, total_price, status, timestamp in rows:
+        entry = totals.setdefault(mobile, {
+            'order_count': 0, 'lifetime_spend': 0, 'first_order_at': timestamp
+        })
+        entry['order_count'] += 1
+        entry['lifetime_spend'] += total_price or 0
+        entry['last_order_at'] = timestamp
+        entry['last_status'] = status
+        entry['full_name'] = full_name
+    return totals
+
+
+def mobiles_for_orders(order_ids):
+    """Return the mobile numbers of the given order ids (one query)."""
+    if not order_ids:
+        return set()
+    return {m for (m,) in db.session.query(Order.mobile_number).filter(Order.id.in_(order_ids)).distinct()}
+
+
+def _bump_status(status, count, revenue):
+    """Add to one status counter (seeded by migrations/v005)."""
+    counter = OrderStatusCount.query.filter_by(status=status).with_for_update().first()
+    if counter is None:
+        counter = OrderStatusCount(status=status, order_count=0, revenue=0)
+        db.session.add(counter)
+    counter.order_count += count
+    counter.revenue += revenue
+
+
+def move_status_counts(order_ids, new_status=None):
+    """
+    Move the given orders out of their current status counters.
+
+    Call in the same transaction and *before* the status update or delete is
+    executed. With ``new_status`` the orders are added to that status (a status
+    change); without it they are only removed (a delete). Costs one GROUP BY
+    over the affected orders, independent of table size.
+    """
+    if not order_ids:
+        return
+    rows = db.session.query(
+        Order.status, db.func.count(Order.id), db.func.coalesce(db.func.sum(Order.total_price), 0)
+    ).filter(Order.id.in_(order_ids)).group_by(Order.status).all()
+    for status, count, revenue in rows:
+        if status == new_status:
+            continue
+        _bump_status(status or 'Pending', -count, -revenue)
+        if new_status:
+            _bump_status(new_status, count, revenue)
+
+
+def _status_totals_from_orders(rows=None):
+    if rows is None:
+        rows = db.session.query(
+            Order.status, db.func.count(Order.id), db.func.coalesce(db.func.sum(Order.total_price), 0)
+        ).group_by(Order.status).all()
+    # Every dashboard status gets a counter, so later writes only ever update
+    totals = {status: (0, 0) for status in ORDER_STATUSES}
+    for status, count, revenue in rows:
+        status = status or 'Pending'
+        previous = totals.get(status, (0, 0))
+        totals[status] = (previous[0] + count, previous[1] + revenue)
+    return totals
+
+
+def rebuild_status_counts():
+    """
+    Recompute the status counters from one GROUP BY status over all orders.
+
+    Every status in ORDER_STATUSES gets a row, even with no orders. Does not
+    commit.
+
+    Returns:
+        dict: status -> (count, revenue)
+    """
+    OrderStatusCount.query.delete(synchronize_session=False)
+    totals = _status_totals_from_orders()
+    for status, (count, revenue) in totals.items():
+        db.session.add(OrderStatusCount(status=status, order_count=count, revenue=revenue))
+    return totals
+
+
+def order_status_totals():
+    """
+    Return order counts and revenue for every status.
+
+    Reads the small counter table, which migrations/v005 seeds; should it
+    ever be empty, it is rebuilt from a single GROUP BY status query.
+
+    Returns:
+        dict: {'total': n, 'pending': n, 'confirmed': n, ..., 'revenue':
+        {'total': amount, 'pending': amount, ...}}; every status in
+        ORDER_STATUSES is present, plus any other status found in the data
+    """
+    totals = {c.status: (c.order_count, c.revenue) for c in OrderStatusCount.query.all()}
+    if not totals:
+        totals = rebuild_status_counts()
+        db.session.commit()
+
+    stats = {'total': 0, 'revenue': {'total': 0}}
+    for status in ORDER_STATUSES:
+        stats[status.lower()] = 0
+        stats['revenue'][status.lower()] = 0
+    for status, (count, revenue) in totals.items():
+        stats[status.lower()] = count
+        stats['revenue'][status.lower()] = revenue
+        stats['total'] += count
+        stats['revenue']['total'] += revenue
+    return stats
+
+
+def rebuild_customers():
+    """
+    Rebuild the whole Customer table from Order rows.
+
+    Run if the aggregates are ever suspected to be out of sync (upgrades are
+    backfilled by migrations/v005). Must be called inside an app context.
+
+    Returns:
+        int: Number of customers written
+    """
+    Customer.query.delete(synchronize_session=False)
+    mobiles = [m for (m,) in db.session.query(Order.mobile_number).distinct()]
+    for start in range(0, len(mobiles), 500):
+        refresh_customers(mobiles[start:start + 500])
+    db.session.commit()
+    return len(mobiles)
+
+
+def rebuild_aggregates_on(conn, batch_size=5000):
+    """
+    Rebuild the Customer table and the status counters from Order rows on a
+    Core connection, in the caller's transaction (used by migrations/v005).
+
+    Returns:
+        int: Number of customers written
+    """
+    from sqlalchemy import delete, func, insert, select
+
+    orders, customers, counters = Order.__table__, Customer.__table__, OrderStatusCount.__table__
+    rows = conn.execution_options(yield_per=batch_size).execute(
+        select(orders.c.mobile_number, orders.c.full_name, orders.c.total_price, orders.c.status, orders.c.timestamp)
+        .where(orders.c.mobile_number.isnot(None)).order_by(orders.c.timestamp)
+    )
+    totals = _customer_totals(rows)
+    conn.execute(delete(customers))
+    if totals:
+        conn.execute(insert(customers), [{'mobile_number': mobile, **fields} for mobile, fields in totals.items()])
+
+    status_totals = _status_totals_from_orders(conn.execute(
+        select(orders.c.status, func.count(orders.c.id), func.coalesce(func.sum(orders.c.total_price), 0))
+        .group_by(orders.c.status)
+    ).all())
+    conn.execute(delete(counters))
+    conn.execute(insert(counters), [
+        {'status': status, 'order_count': count, 'revenue': revenue}
+        for status, (count, revenue) in status_totals.items()
+    ])
+    return len(totals)
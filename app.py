@@ -6,26 +6,44 @@ load_dotenv()
 from flask import Flask
 from flask_login import LoginManager
 from config import config
-from extensions import db
+from extensions import db, sqlite_profile, traffic_recorder, settings_cache, page_cache, theme_registry, rate_limiter, order_journal, catalog_cache, image_manifest
+from bootstrap import needs_bootstrap, bootstrap_database
+from templating import init_bytecode_cache
+from catalog import pack_discount
 
-def create_app(config_name=None):
-    """Application factory function."""
+def create_app(config_name=None, overrides=None):
+    """
+    Application factory function.
+
+    ``overrides`` is a dict of config values applied on top of the config
+    class, e.g. ``{'BOOTSTRAP_ON_STARTUP': 'never'}`` for scripts that must
+    see the database as it is.
+    """
     if config_name is None:
         config_name = os.getenv('FLASK_CONFIG', 'production')
     
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config.update(overrides or {})
     config[config_name].init_app(app)
     
     # Initialize extensions
     db.init_app(app)
+    sqlite_profile.init_app(app)  # before anything opens a connection
+    traffic_recorder.init_app(app)
+    settings_cache.init_app(app)
+    page_cache.init_app(app)
+    catalog_cache.init_app(app)
+    image_manifest.init_app(app)
+    rate_limiter.init_app(app)
+    order_journal.init_app(app)
     
     login_manager = LoginManager()
     login_manager.init_app(app)
     login_manager.login_view = 'admin.admin_login'
     
     # Import models
-    from models import Admin, ProductSetting
+    from models import Admin
     
     @login_manager.user_loader
     def load_user(user_id):
@@ -55,6 +73,9 @@ def create_app(config_name=None):
             s = s.replace(eng_digits[i], bn_digits[i])
         return s
 
+    # Package cards price packs with the same rule as checkout
+    app.add_template_global(pack_discount, 'pack_discount')
+
     @app.template_filter('time_to_bd')
     def time_to_bd_filter(dt):
         if not dt:
@@ -66,27 +87,20 @@ def create_app(config_name=None):
             dt = dt + timedelta(hours=6)
         return dt.strftime('%d %b, %H:%M')
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        
-        # Create default admin if not exists
-        if not Admin.query.filter_by(username='admin').first():
-            admin = Admin(username='admin', password='password123')
-            db.session.add(admin)
-            db.session.commit()
-            
-        # Create default product settings if not exists
-        if not ProductSetting.query.first():
-            setting = ProductSetting(
-                product_name="প্রিমিয়াম হানি নাট",
-                product_description="খাটি মধু এবং বাছাইকৃত ড্রাই ফ্রুটসের এক অনন্য সংমিশ্রণ। যা আপনাকে দিবে দীর্ঘক্ষণ কাজ করার শক্তি এবং রোগ প্রতিরোধ ক্ষমতা。",
-                price=990,
-                old_price=1200,
-                image_path="honey_nut.png"
-            )
-            db.session.add(setting)
-            db.session.commit()
+    # Persist compiled templates across worker spawns, then scan and precompile
+    # theme templates (after the filters they use are registered)
+    init_bytecode_cache(app)
+    theme_registry.init_app(app)
+    
+    # Create database tables, apply migrations and seed default rows once, not
+    # in every worker: 'auto' reads the bootstrap marker and, on every bind
+    # with migrations, the applied versions (discovering the migration
+    # modules), and bootstraps if anything is missing; 'never' leaves it to
+    # the deploy-time command (python -m scripts.bootstrap_db)
+    if app.config.get('BOOTSTRAP_ON_STARTUP', 'auto') != 'never':
+        with app.app_context():
+            if needs_bootstrap():
+                bootstrap_database()
     
     return app
 
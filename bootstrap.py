@@ -0,0 +1,75 @@
+from datetime import datetime
+from sqlalchemy.exc import SQLAlchemyError
+from extensions import db
+
+# Bump whenever models or seed data change, so the next startup (or
+# scripts/bootstrap_db.py) runs the bootstrap again
+BOOTSTRAP_VERSION = 3
+
+
+def bootstrapped_version():
+    """
+    Return the bootstrap version recorded in the database, or 0.
+
+    A single primary-key read; a missing marker table (a fresh database)
+    counts as not bootstrapped.
+    """
+    from models import BootstrapMarker
+
+    try:
+        return db.session.query(BootstrapMarker.version).filter_by(id=1).scalar() or 0
+    except SQLAlchemyError:
+        db.session.rollback()
+        return 0
+
+
+def needs_bootstrap():
+    """True when the marker is missing/outdated or a migration is pending."""
+    from migrate import pending_migrations
+
+    return bootstrapped_version() < BOOTSTRAP_VERSION or bool(pending_migrations('all'))
+
+
+def bootstrap_database():
+    """
+    Create the schema, apply pending migrations and seed the default rows,
+    then record the marker.
+
+    Idempotent: tables are created only if missing, migrations only once and
+    seed rows only if absent. Must be called inside an app context.
+
+    Returns:
+        list: (version, name) of the migrations applied
+    """
+    from models import Admin, ProductSetting, BootstrapMarker
+    from migrate import upgrade
+    from search import init_order_search
+
+    db.create_all()
+    applied = upgrade()
+    init_order_search()
+
+    # Create default admin if not exists
+    if not Admin.query.filter_by(username='admin').first():
+        admin = Admin(username='admin', password='password123')
+        db.session.add(admin)
+
+    # Create default product settings if not exists
+    if not ProductSetting.query.first():
+        setting = ProductSetting(
+            product_name="প্রিমিয়াম হানি নাট",
+            product_description="খাটি মধু এবং বাছাইকৃত ড্রাই ফ্রুটসের এক অনন্য সংমিশ্রণ। যা আপনাকে দিবে দীর্ঘক্ষণ কাজ করার শক্তি এবং রোগ প্রতিরোধ ক্ষমতা。",
+            price=990,
+            old_price=1200,
+            image_path="honey_nut.png"
+        )
+        db.session.add(setting)
+
+    marker = db.session.get(BootstrapMarker, 1)
+    if marker is None:
+        marker = BootstrapMarker(id=1)
+        db.session.add(marker)
+    marker.version = BOOTSTRAP_VERSION
+    marker.bootstrapped_at = datetime.utcnow()
+    db.session.commit()
+    return applied
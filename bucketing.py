@@ -0,0 +1,139 @@
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+# count: number of buckets, width: bucket size, unit: 'hour' or 'day' (the
+# calendar unit bucket edges are aligned to), label_format: strftime format
+BucketSpec = namedtuple('BucketSpec', ['count', 'width', 'unit', 'label_format'])
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# NumPy is imported on first use so processes that never draw a chart (the
+# public landing page workers) don't pay for it; False once known missing
+_numpy = None
+
+
+def numpy():
+    """Return the NumPy module, or None when it isn't installed (bisect fallback)."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy as np
+            _numpy = np
+        except ImportError:  # pragma: no cover - pure Python fallback for hosts without NumPy
+            _numpy = False
+    return _numpy or None
+
+
+def hourly(count, hours=1, label_format='%H:00'):
+    """Spec for ``count`` buckets of ``hours`` hours ending with the current hour."""
+    return BucketSpec(count, timedelta(hours=hours), 'hour', label_format)
+
+
+def daily(count, days=1, label_format='%d/%m'):
+    """Spec for ``count`` buckets of ``days`` calendar days ending with today."""
+    return BucketSpec(count, timedelta(days=days), 'day', label_format)
+
+
+def bucket_edges(spec, now):
+    """
+    Return the ``count + 1`` bucket edges for a spec, oldest first.
+
+    The last edge is the end of the current hour (or day), so the newest bucket
+    always contains ``now``.
+    """
+    if spec.unit == 'hour':
+        end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    else:
+        end = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return [end - spec.width * (spec.count - i) for i in range(spec.count + 1)]
+
+
+def bucket_labels(spec, edges):
+    """Label each bucket with the last hour/day it contains."""
+    step = timedelta(hours=1) if spec.unit == 'hour' else timedelta(days=1)
+    return [(edge - step).strftime(spec.label_format) for edge in edges[1:]]
+
+
+def histogram(timestamps, edges, *weights):
+    """
+    Bucket timestamps into the half-open intervals between ``edges``.
+
+    With NumPy this is one ``searchsorted`` and one ``bincount`` per series, so
+    it runs at array speed; without NumPy it falls back to ``bisect``.
+
+    Args:
+        timestamps: Sequence of naive datetimes, or the array returned by
+            as_timestamps() when the same timestamps are bucketed repeatedly
+        edges (list): Sorted bucket edges, as returned by bucket_edges()
+        *weights: Optional per-timestamp weight sequences (e.g. total_price)
+
+    Returns:
+        list: Per-bucket counts when no weights are given, otherwise one list
+        of per-bucket weight totals for each weight series
+    """
+    buckets = len(edges) - 1
+    np = numpy()
+    if np is not None:
+        ts = as_timestamps(timestamps)
+        index = np.searchsorted(as_timestamps(edges), ts, side='right') - 1
+        inside = (index >= 0) & (index < buckets)
+        index = index[inside]
+        if not weights:
+            return np.bincount(index, minlength=buckets).tolist()
+        results = []
+        for series in weights:
+            totals = np.bincount(index, weights=as_weights(series)[inside], minlength=buckets)
+            results.append([_as_number(t) for t in totals.tolist()])
+        return results
+
+    totals = [[0] * buckets for _ in (weights or (None,))]
+    for row, timestamp in enumerate(timestamps):
+        index = bisect_right(edges, timestamp) - 1
+        if 0 <= index < buckets:
+            if not weights:
+                totals[0][index] += 1
+            for series, total in zip(weights, totals):
+                total[index] += series[row]
+    return totals[0] if not weights else totals
+
+
+def series(timestamps, spec, now, *weights):
+    """
+    Bucket timestamps for one chart period and label the buckets.
+
+    Returns:
+        tuple: (labels, counts) without weights, else (labels, [totals, ...])
+    """
+    edges = bucket_edges(spec, now)
+    return bucket_labels(spec, edges), histogram(timestamps, edges, *weights)
+
+
+def as_timestamps(timestamps):
+    """
+    Convert naive datetimes to a ``datetime64[us]`` array (no-op without NumPy).
+
+    Going through integer microseconds is several times faster than letting
+    NumPy parse datetime objects one by one.
+    """
+    np = numpy()
+    if np is None:
+        return timestamps
+    if isinstance(timestamps, np.ndarray):
+        return timestamps.astype('datetime64[us]') if timestamps.dtype.kind == 'M' else timestamps
+    micros = np.fromiter(((t - _EPOCH) // _MICROSECOND for t in timestamps), dtype=np.int64, count=len(timestamps))
+    return micros.view('datetime64[us]')
+
+
+def as_weights(weights):
+    """Convert a weight sequence to an array (no-op without NumPy)."""
+    np = numpy()
+    if np is None:
+        return weights
+    return np.asarray(weights)
+
+
+def _as_number(value):
+    # bincount with weights always returns floats; keep integer totals integral
+    return int(value) if float(value).is_integer() else value
@@ -0,0 +1,164 @@
+import threading
+from collections import namedtuple
+
+# Upper bound for one cart line, so a tampered form can't create absurd orders
+MAX_ITEM_QUANTITY = 100
+
+# Price-relevant columns of an active product
+CatalogProduct = namedtuple('CatalogProduct', ['id', 'name', 'price'])
+
+
+class CatalogCache:
+    """
+    Per-worker snapshot of the active products, keyed by id (as a string,
+    the way it arrives from the checkout form).
+
+    The snapshot is tagged with the shared content version that product
+    edits bump (see page_cache.bump_content_version) and reloaded with one
+    query when the version moves, so pricing a cart costs no per-item
+    queries. The version itself is read through page_cache.content_version(),
+    i.e. at most every PAGE_CACHE_TTL seconds.
+
+    Usage:
+        catalog_cache = CatalogCache()
+        catalog_cache.init_app(app)
+
+        product = catalog_cache.get().get(request.form['product_id'])
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._hits = 0
+        self._loads = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['catalog_cache'] = self
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+
+    def get(self):
+        """Return {str(product id): CatalogProduct} for active products. Needs an app context."""
+        from extensions import db, page_cache
+        from models import Product
+
+        version = page_cache.content_version()
+        with self._lock:
+            if self._snapshot is not None and self._version == version:
+                self._hits += 1
+                return self._snapshot
+
+        rows = db.session.query(Product.id, Product.name, Product.price).filter_by(is_active=True).all()
+        snapshot = {str(row.id): CatalogProduct(row.id, row.name, row.price) for row in rows}
+        with self._lock:
+            self._snapshot = snapshot
+            self._version = version
+            self._loads += 1
+        return snapshot
+
+    def stats(self):
+        """Return counters for this worker process."""
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'loads': self._loads,
+                'products': len(self._snapshot) if self._snapshot is not None else None,
+                'content_version': self._version,
+            }
+
+
+def parse_quantity(value):
+    """Parse a quantity field, clamped to 1..MAX_ITEM_QUANTITY (1 if unparseable)."""
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(quantity, MAX_ITEM_QUANTITY))
+
+
+def parse_cart(form):
+    """
+    Read the cart lines from an order form.
+
+    The form carries ``product_id``/``quantity`` pairs (repeated fields,
+    matched by position); a single pair is the classic one-product
+    checkout, and a missing or empty product_id means the shop's main
+    product from the settings.
+
+    Returns:
+        list: (product id or None, quantity) tuples, at least one
+    """
+    product_ids = form.getlist('product_id')
+    quantities = form.getlist('quantity')
+    if not product_ids:
+        return [(None, parse_quantity(quantities[0] if quantities else 1))]
+    return [
+        (product_id or None, parse_quantity(quantities[i] if i < len(quantities) else 1))
+        for i, product_id in enumerate(product_ids)
+    ]
+
+
+def pack_discount(quantity, settings):
+    """
+    Pack discount for ``quantity`` of the main product: discount_amount for
+    two, discount_amount_3 for three or more, as the package cards show.
+
+    Only landing page themes flagged ``shows_pack_discount`` (theme.json)
+    show the cards; orders from the other themes pay the plain price they
+    display. An explicit 0 means no discount; only an unset 3-pack discount
+    falls back to ৳200.
+    """
+    from extensions import theme_registry
+
+    if not theme_registry.flag(settings.landing_page_theme, 'shows_pack_discount'):
+        return 0
+    if quantity >= 3:
+        return 200 if settings.discount_amount_3 is None else settings.discount_amount_3
+    if quantity == 2:
+        return settings.discount_amount or 0
+    return 0
+
+
+def price_cart(lines, settings, catalog):
+    """
+    Price cart lines against a catalog snapshot.
+
+    Lines for the same product are merged. Lines without a product_id are
+    the main product from the settings; unknown or inactive products are
+    dropped, and if nothing is left the order falls back to the main
+    product with the first line's quantity.
+
+    The pack discount is per line, like the package cards: it applies to
+    the quantity of the main product only, never to the cart's total
+    quantity across products.
+
+    Returns:
+        tuple: (items as dicts for OrderItem, total quantity, total price
+        after the pack discount)
+    """
+    merged = {}
+    for product_id, quantity in lines:
+        if product_id is None:
+            key, name, price = None, settings.product_name, settings.price
+        elif product_id in catalog:
+            product = catalog[product_id]
+            key, name, price = product.id, product.name, product.price
+        else:
+            continue
+        if key in merged:
+            merged[key]['quantity'] = min(merged[key]['quantity'] + quantity, MAX_ITEM_QUANTITY)
+        else:
+            merged[key] = {'product_name': name, 'price': price, 'quantity': quantity}
+
+    if not merged:
+        merged[None] = {'product_name': settings.product_name, 'price': settings.price, 'quantity': lines[0][1]}
+
+    items = list(merged.values())
+    quantity = sum(item['quantity'] for item in items)
+    subtotal = sum(item['price'] * item['quantity'] for item in items)
+    discount = pack_discount(merged[None]['quantity'], settings) if None in merged else 0
+    return items, quantity, max(subtotal - discount, 0)
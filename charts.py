@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import bucketing
+
+# Dashboard charts are bucketed in Bangladesh time (UTC+6); timestamps are stored as naive UTC
+BD_OFFSET = timedelta(hours=6)
+
+# Bucket layout of each dashboard chart period
+CHART_PERIODS = OrderedDict([
+    ('daily', bucketing.hourly(24)),
+    ('weekly', bucketing.daily(7, label_format='%a')),
+    ('fortnightly', bucketing.daily(7, days=2)),
+    ('monthly', bucketing.daily(6, days=5)),
+    ('two_month', bucketing.daily(8, days=7)),
+])
+
+# Widest window any chart period needs, in days
+CHART_WINDOW_DAYS = 60
+
+
+def build_charts(timestamps, now_local, **weights):
+    """
+    Bucket timestamps into every dashboard chart period.
+
+    Args:
+        timestamps (list): Bangladesh-time timestamps (or hour buckets)
+        now_local (datetime): Current Bangladesh time
+        **weights: Named per-timestamp weight series, e.g. counts=[...]
+
+    Returns:
+        dict: period -> {'labels': [...], <weight name>: [...], ...}; with no
+        weights each timestamp counts once under 'counts'
+    """
+    timestamps = bucketing.as_timestamps(timestamps)
+    series = [bucketing.as_weights(values) for values in weights.values()]
+    charts = {}
+    for period, spec in CHART_PERIODS.items():
+        labels, totals = bucketing.series(timestamps, spec, now_local, *series)
+        chart = {'labels': labels}
+        if weights:
+            chart.update(zip(weights, totals))
+        else:
+            chart['counts'] = totals
+        charts[period] = chart
+    return charts
+
+
+def order_hourly_totals(since):
+    """
+    Order counts and revenue per Bangladesh-time hour since ``since`` (UTC).
+
+    On SQLite this is a single GROUP BY over an hour expression, so at most one
+    row per hour comes back regardless of order volume. Other databases stream
+    (timestamp, total_price) columns and bucket them in Python.
+
+    Returns:
+        list: (local_hour, count, revenue) tuples
+    """
+    from extensions import db
+    from models import Order
+
+    if db.session.get_bind(mapper=Order).dialect.name == 'sqlite':
+        hour = db.func.strftime('%Y-%m-%d %H:00:00', Order.timestamp, '+6 hours')
+        rows = db.session.query(
+            hour, db.func.count(Order.id), db.func.coalesce(db.func.sum(Order.total_price), 0)
+        ).filter(Order.timestamp >= since).group_by(hour).all()
+        return [(datetime.strptime(h, '%Y-%m-%d %H:%M:%S'), count, revenue) for h, count, revenue in rows]
+
+    totals = {}
+    columns = db.session.query(Order.timestamp, Order.total_price).filter(Order.timestamp >= since)
+    for timestamp, total_price in columns.execution_options(yield_per=1000):
+        local_hour = (timestamp + BD_OFFSET).replace(minute=0, second=0, microsecond=0)
+        count, revenue = totals.get(local_hour, (0, 0))
+        totals[local_hour] = (count + 1, revenue + (total_price or 0))
+    return [(h, count, revenue) for h, (count, revenue) in totals.items()]
+
+
+def order_chart_data(now=None):
+    """
+    Build order count/revenue chart data for every dashboard period at once.
+
+    Args:
+        now (datetime): Current time in UTC, defaults to now
+
+    Returns:
+        dict: period -> {'labels': [...], 'counts': [...], 'revenues': [...]}
+    """
+    now = now or datetime.utcnow()
+    hourly = order_hourly_totals(now - timedelta(days=CHART_WINDOW_DAYS))
+    return build_charts(
+        [hour for hour, count, revenue in hourly], now + BD_OFFSET,
+        counts=[count for hour, count, revenue in hourly],
+        revenues=[revenue for hour, count, revenue in hourly]
+    )
+
+
+def traffic_chart_data(hourly_hits, now=None):
+    """
+    Build visitor chart data for every dashboard period from rollup rows.
+
+    Args:
+        hourly_hits (list): (UTC hour, hits) rows from TrafficRollup
+        now (datetime): Current time in UTC, defaults to now
+
+    Returns:
+        dict: period -> {'labels': [...], 'counts': [...]}
+    """
+    now = now or datetime.utcnow()
+    return build_charts(
+        [hour + BD_OFFSET for hour, hits in hourly_hits], now + BD_OFFSET,
+        counts=[hits for hour, hits in hourly_hits]
+    )
@@ -18,10 +18,97 @@ class Config:
     # SQLAlchemy configuration
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Traffic recorder (write-behind page view buffer)
+    TRAFFIC_QUEUE_SIZE = int(os.environ.get('TRAFFIC_QUEUE_SIZE', 10000))
+    TRAFFIC_FLUSH_SIZE = int(os.environ.get('TRAFFIC_FLUSH_SIZE', 200))
+    TRAFFIC_FLUSH_INTERVAL = float(os.environ.get('TRAFFIC_FLUSH_INTERVAL', 2.0))  # seconds
+    TRAFFIC_OVERFLOW_POLICY = os.environ.get('TRAFFIC_OVERFLOW_POLICY', 'drop_newest')  # or 'drop_oldest'
+    TRAFFIC_SYNC_WRITES = False
+    
+    # Unique visitor sketches: key visitors by 'ip' or 'ip_ua' (IP + User-Agent),
+    # and count exactly instead of estimating when a window has few hits
+    TRAFFIC_VISITOR_KEY = os.environ.get('TRAFFIC_VISITOR_KEY', 'ip')
+    TRAFFIC_EXACT_UNIQUES_THRESHOLD = int(os.environ.get('TRAFFIC_EXACT_UNIQUES_THRESHOLD', 5000))
+    
+    # Shop settings snapshot cache: seconds before a worker re-checks updated_at
+    SETTINGS_CACHE_TTL = float(os.environ.get('SETTINGS_CACHE_TTL', 30.0))
+    
+    # Full-page cache for the landing page: seconds before a worker re-checks
+    # the content version bumped by product/review edits
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() != 'false'
+    PAGE_CACHE_TTL = float(os.environ.get('PAGE_CACHE_TTL', 5.0))
+    
+    # Reviews rendered inline on the landing page; the rest are fetched in
+    # pages of the same size from /reviews as the visitor scrolls
+    REVIEWS_PER_PAGE = int(os.environ.get('REVIEWS_PER_PAGE', 6))
+    
+    # Responsive derivatives written on upload (see images.py): widths in
+    # pixels and modern formats; a JPEG/PNG fallback is always written
+    IMAGE_VARIANTS_ENABLED = os.environ.get('IMAGE_VARIANTS_ENABLED', 'true').lower() != 'false'
+    IMAGE_VARIANT_WIDTHS = tuple(int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,960,1280').split(','))
+    IMAGE_VARIANT_FORMATS = tuple(os.environ.get('IMAGE_VARIANT_FORMATS', 'avif,webp').split(','))
+    
+    # Targets for scripts/optimize_images.py by upload kind (filename
+    # prefix, see images.PROFILE_PREFIXES): "<max width>:<WebP quality>"
+    IMAGE_PROFILES = {
+        'logo': os.environ.get('IMAGE_PROFILE_LOGO', '400:90'),
+        'product': os.environ.get('IMAGE_PROFILE_PRODUCT', '1200:80'),
+        'review': os.environ.get('IMAGE_PROFILE_REVIEW', '1080:75'),
+        'pfp': os.environ.get('IMAGE_PROFILE_PFP', '256:75'),
+    }
+    
+    # Re-scan templates/themes when it changes; None follows DEBUG
+    THEMES_AUTO_RELOAD = None
+    
+    # SQLite tuning (WAL, busy_timeout, ...) and periodic WAL checkpoint /
+    # PRAGMA optimize, in seconds; see sqlite_profile.DEFAULT_PRAGMAS
+    SQLITE_PROFILE_ENABLED = os.environ.get('SQLITE_PROFILE_ENABLED', 'true').lower() != 'false'
+    SQLITE_PRAGMAS = None
+    SQLITE_CHECKPOINT_INTERVAL = float(os.environ.get('SQLITE_CHECKPOINT_INTERVAL', 300))
+    SQLITE_OPTIMIZE_INTERVAL = float(os.environ.get('SQLITE_OPTIMIZE_INTERVAL', 3600))
+    
+    # Schema creation and seeding at startup: 'auto' runs it when the bootstrap
+    # marker is missing or outdated, 'never' leaves it to scripts/bootstrap_db.py
+    BOOTSTRAP_ON_STARTUP = os.environ.get('BOOTSTRAP_ON_STARTUP', 'auto')
+    
+    # Compiled Jinja templates shared by all workers; None uses instance/jinja_cache, '' disables
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+    
+    # Optional separate database for the Traffic tables (rows, rollups and
+    # sketches), so analytics writes never hold the orders database's write
+    # lock. Unset keeps them in the main database.
+    TRAFFIC_DATABASE_URL = os.environ.get('TRAFFIC_DATABASE_URL')
+    
+    # Token-bucket limits as "<requests>/<seconds>" per key, shared by all
+    # workers through RATE_LIMIT_DB (default instance/rate_limit.db); an empty
+    # limit disables that scope
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() != 'false'
+    RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB')
+    RATE_LIMITS = {
+        'order_mobile': os.environ.get('RATE_LIMIT_ORDER_MOBILE', '1/300'),  # one order per number per 5 min
+        'order_ip': os.environ.get('RATE_LIMIT_ORDER_IP', '30/600'),  # accepted orders per IP (shared by CGNAT users)
+        'admin_login': os.environ.get('RATE_LIMIT_ADMIN_LOGIN', '10/600'),  # failed logins per IP
+    }
+    
+    # Checkout form tokens: seconds a token keeps replays pointing at its order
+    ORDER_TOKEN_TTL = int(os.environ.get('ORDER_TOKEN_TTL', 86400))
+    
+    # Order intake journal: orders are fsync'd to ORDER_JOURNAL_PATH (default
+    # instance/orders.journal) and inserted by a background drainer
+    ORDER_JOURNAL_ENABLED = os.environ.get('ORDER_JOURNAL_ENABLED', 'true').lower() != 'false'
+    ORDER_JOURNAL_PATH = os.environ.get('ORDER_JOURNAL_PATH')
+    ORDER_JOURNAL_BATCH_SIZE = int(os.environ.get('ORDER_JOURNAL_BATCH_SIZE', 200))
+    ORDER_JOURNAL_DRAIN_INTERVAL = float(os.environ.get('ORDER_JOURNAL_DRAIN_INTERVAL', 1.0))  # seconds
+    ORDER_JOURNAL_ROTATE_BYTES = int(os.environ.get('ORDER_JOURNAL_ROTATE_BYTES', 4 * 1024 * 1024))
+    
     @staticmethod
     def init_app(app):
         """Initialize application with this configuration."""
-        pass
+        # The traffic models always use the 'traffic' bind; point it at the
+        # main database unless a separate one is configured
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault('traffic', app.config.get('TRAFFIC_DATABASE_URL') or app.config['SQLALCHEMY_DATABASE_URI'])
+        app.config['SQLALCHEMY_BINDS'] = binds
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -48,6 +135,13 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite://'  # In-memory database
+    TRAFFIC_SYNC_WRITES = True  # Write hits inline so tests can assert on them
+    SETTINGS_CACHE_TTL = 0  # Revalidate settings on every request
+    PAGE_CACHE_TTL = 0
+    JINJA_BYTECODE_CACHE_DIR = ''
+    RATE_LIMIT_ENABLED = False  # Tests place many orders from one client
+    RATE_LIMIT_DB = ':memory:'
+    ORDER_JOURNAL_ENABLED = False  # Insert orders inline so tests can assert on them
 
 # Configuration dictionary
 config = {
@@ -1,3 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
+from catalog import CatalogCache
+from images import ImageManifest
+from order_journal import OrderJournal
+from page_cache import PageCache
+from rate_limit import RateLimiter
+from settings_cache import SettingsCache
+from sqlite_profile import SQLiteProfile
+from themes import ThemeRegistry
+from traffic import TrafficRecorder
 
 db = SQLAlchemy()
+traffic_recorder = TrafficRecorder()
+settings_cache = SettingsCache()
+page_cache = PageCache()
+theme_registry = ThemeRegistry()
+sqlite_profile = SQLiteProfile()
+rate_limiter = RateLimiter()
+order_journal = OrderJournal()
+catalog_cache = CatalogCache()
+image_manifest = ImageManifest()
@@ -0,0 +1,68 @@
+import hashlib
+import math
+
+# 2^12 one-byte registers (4 KB per sketch). The relative standard error of
+# the estimate is 1.04 / sqrt(2^12) ~= 1.6%, i.e. about 95% of estimates are
+# within +/-3.3% of the true count. Small cardinalities use linear counting,
+# which is close to exact for a few hundred visitors.
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+STANDARD_ERROR = 1.04 / math.sqrt(REGISTERS)
+
+_HASH_BITS = 64
+_RANK_BITS = _HASH_BITS - PRECISION
+_RANK_MASK = (1 << _RANK_BITS) - 1
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+
+class HyperLogLog:
+    """
+    Mergeable HyperLogLog sketch for approximate distinct counting.
+
+    Sketches serialize to a fixed 4 KB byte string, and merging two sketches
+    gives exactly the sketch of the union of their inputs, so per-hour and
+    per-day sketches can be combined into any window on read.
+    """
+
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        if registers is None:
+            self.registers = bytearray(REGISTERS)
+        else:
+            if len(registers) != REGISTERS:
+                raise ValueError(f"Expected {REGISTERS} registers, got {len(registers)}")
+            self.registers = bytearray(registers)
+
+    def add(self, value):
+        """Add a string value to the sketch."""
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest()
+        h = int.from_bytes(digest, 'big')
+        index = h >> _RANK_BITS
+        rank = _RANK_BITS - (h & _RANK_MASK).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, other):
+        """Merge another sketch (or its serialized registers) into this one."""
+        registers = other.registers if isinstance(other, HyperLogLog) else other
+        self.registers = bytearray(map(max, self.registers, registers))
+        return self
+
+    def count(self):
+        """Return the estimated number of distinct values added."""
+        zeros = self.registers.count(0)
+        if zeros == REGISTERS:
+            return 0
+        estimate = _ALPHA * REGISTERS * REGISTERS / sum(2.0 ** -r for r in self.registers)
+        if estimate <= 2.5 * REGISTERS and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = REGISTERS * math.log(REGISTERS / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(data)
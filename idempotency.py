@@ -0,0 +1,72 @@
+import re
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from extensions import db
+
+# Tokens are generated in the browser (see templates/partials/order_token.html)
+_TOKEN = re.compile(r'^[A-Za-z0-9-]{16,64}$')
+
+# Seconds between sweeps of expired tokens (per worker)
+PURGE_INTERVAL = 600.0
+_purged_at = 0.0
+
+
+def clean_token(token):
+    """Return the submitted order token if well formed, else None."""
+    if token and _TOKEN.match(token):
+        return token
+    return None
+
+
+def order_for_token(token):
+    """
+    Return the id of the order a checkout token already created, or None.
+
+    One primary-key lookup; a missing or malformed token is never looked up.
+    """
+    if not token:
+        return None
+    from models import OrderToken
+
+    return db.session.query(OrderToken.order_id).filter_by(token=token).scalar()
+
+
+def record_token(token, order_id):
+    """
+    Add the token for a new order to the current session.
+
+    Commit it in the same transaction as the order: a concurrent duplicate
+    then fails on the primary key and can look up the winner's order.
+    """
+    from models import OrderToken
+
+    db.session.add(OrderToken(token=token, order_id=order_id))
+
+
+def purge_expired_tokens(force=False):
+    """
+    Delete tokens older than ORDER_TOKEN_TTL in one statement.
+
+    Runs at most every PURGE_INTERVAL seconds per worker unless forced.
+
+    Returns:
+        int: Number of tokens deleted
+    """
+    global _purged_at
+    from models import OrderToken
+
+    now = time.monotonic()
+    if not force and now - _purged_at < PURGE_INTERVAL:
+        return 0
+    _purged_at = now
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config.get('ORDER_TOKEN_TTL', 86400))
+    try:
+        deleted = OrderToken.query.filter(OrderToken.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"Error purging order tokens: {e}")
+        return 0
+    return deleted
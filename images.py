@@ -0,0 +1,356 @@
+import os
+import threading
+from collections import namedtuple
+from markupsafe import Markup, escape
+
+DEFAULT_WIDTHS = (320, 640, 960, 1280)
+DEFAULT_FORMATS = ('avif', 'webp')
+
+# Derivatives live next to the uploads, under static/<VARIANT_DIR>
+VARIANT_DIR = 'uploads/variants'
+
+# Encoder settings per format; AVIF speed 8 keeps an upload's full set of
+# derivatives around a second and a half on one core
+ENCODE_OPTIONS = {
+    'avif': {'quality': 60, 'speed': 8},
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+    'png': {'optimize': True},
+}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+# One derivative of a source image; path is relative to the static folder
+Variant = namedtuple('Variant', ['format', 'width', 'height', 'path', 'size'])
+
+# Upload filename prefixes (see the admin routes) and their IMAGE_PROFILES
+PROFILE_PREFIXES = {'logo': 'logo', 'prod': 'product', 'rev': 'review', 'pfp': 'pfp'}
+DEFAULT_PROFILE = 'product'
+
+
+def parse_profile(value):
+    """
+    Parse a ``"<max width>:<quality>"`` image profile, e.g. ``"1200:80"``.
+
+    Returns:
+        tuple: (max width in pixels, WebP quality 1-100)
+    """
+    width, _, quality = str(value).partition(':')
+    max_width, quality = int(width), int(quality or 80)
+    if max_width <= 0 or not 1 <= quality <= 100:
+        raise ValueError(f"Invalid image profile: {value!r}")
+    return max_width, quality
+
+
+def profile_for(filename):
+    """Return the profile name for an upload, from its filename prefix."""
+    prefix = os.path.basename(filename).split('_', 1)[0]
+    return PROFILE_PREFIXES.get(prefix, DEFAULT_PROFILE)
+
+
+def variant_widths(width, widths=DEFAULT_WIDTHS):
+    """
+    Widths to derive from an image ``width`` pixels wide: the configured
+    widths below it, plus the original width when it is smaller than the
+    largest configured width. Images are never upscaled.
+    """
+    below = sorted(w for w in set(widths) if w < width)
+    if not below or width <= max(widths):
+        below.append(width)
+    return below
+
+
+def encode_variants(source, static_folder, widths=DEFAULT_WIDTHS, formats=DEFAULT_FORMATS):
+    """
+    Write resized, re-encoded derivatives of one image.
+
+    Every width is written in each of ``formats`` plus a fallback (PNG for
+    images with transparency, else JPEG). Formats the installed Pillow can't
+    encode are skipped. Files are written to a temporary name and renamed, so
+    a page never links a half-written derivative. Needs no app context, so it
+    can run in worker processes.
+
+    Args:
+        source (str): Image path relative to ``static_folder``, e.g.
+            ``uploads/prod_1766146587_honey_nuts.png``
+        static_folder (str): Absolute path of the static folder
+        widths (iterable): Target widths in pixels
+        formats (iterable): Modern formats to write, e.g. ('avif', 'webp')
+
+    Returns:
+        list: Variant tuples, smallest width first
+    """
+    from PIL import Image, ImageOps, features
+
+    with Image.open(os.path.join(static_folder, source)) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    fallback = 'png' if has_alpha else 'jpeg'
+    encodable = [fmt for fmt in formats if fmt in ENCODE_OPTIONS and features.check(fmt)]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    os.makedirs(os.path.join(static_folder, VARIANT_DIR), exist_ok=True)
+
+    variants = []
+    for width in variant_widths(img.width, widths):
+        height = max(1, round(img.height * width / img.width))
+        resized = img if width == img.width else img.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for fmt in encodable + [fallback]:
+            path = f"{VARIANT_DIR}/{stem}-{width}w.{EXTENSIONS[fmt]}"
+            target = os.path.join(static_folder, path)
+            tmp = f"{target}.tmp"
+            resized.save(tmp, fmt.upper(), **ENCODE_OPTIONS[fmt])
+            os.replace(tmp, target)
+            variants.append(Variant(fmt, width, height, path, os.path.getsize(target)))
+    return variants
+
+
+def optimize_image(source, target, max_width, quality):
+    """
+    Re-encode one image as WebP no wider than ``max_width``, keeping
+    transparency. The file is written to a temporary name and renamed.
+    Needs no app context, so it can run in worker processes.
+
+    Returns:
+        tuple: (width, height) of the written image
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+    if img.width > max_width:
+        height = max(1, round(img.height * max_width / img.width))
+        img = img.resize((max_width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    tmp = f"{target}.tmp"
+    img.save(tmp, 'WEBP', **{**ENCODE_OPTIONS['webp'], 'quality': quality})
+    os.replace(tmp, target)
+    return img.size
+
+
+def generate_variants(source, static_folder=None):
+    """
+    Derive and record the responsive variants of an uploaded image.
+
+    Replaces any variants recorded for ``source`` and bumps the content
+    version so cached pages and image manifests pick them up; the caller
+    commits. Failures are logged and leave the original image in use.
+
+    Args:
+        source (str): Image path relative to the static folder
+        static_folder (str): Absolute path of the static folder (default:
+            the app's)
+
+    Returns:
+        int: Number of variants recorded
+    """
+    from flask import current_app
+    from extensions import db
+    from models import ImageVariant
+    from page_cache import bump_content_version
+
+    config = current_app.config
+    if not source or not config.get('IMAGE_VARIANTS_ENABLED', True):
+        return 0
+    try:
+        variants = encode_variants(
+            source, static_folder or current_app.static_folder,
+            config.get('IMAGE_VARIANT_WIDTHS') or DEFAULT_WIDTHS,
+            config.get('IMAGE_VARIANT_FORMATS') or DEFAULT_FORMATS
+        )
+    except Exception as e:
+        print(f"Error creating image variants for {source}: {e}")
+        return 0
+
+    ImageVariant.query.filter_by(source_path=source).delete(synchronize_session=False)
+    db.session.add_all([ImageVariant(source_path=source, **variant._asdict()) for variant in variants])
+    bump_content_version()
+    return len(variants)
+
+
+def referenced_images():
+    """
+    Return the static image paths referenced by products, shop settings and
+    reviews. External URLs and legacy bare filenames (served from
+    static/images by the themes) are left out.
+    """
+    from extensions import db
+
+    paths = set()
+    for column in _image_columns():
+        paths.update(path for path, in db.session.query(column).filter(column.isnot(None)).distinct())
+    return {path for path in paths if '/' in path and not path.startswith(('http://', 'https://', '/'))}
+
+
+def replace_image_references(mapping, batch_size=500):
+    """
+    Point image columns and recorded variants at new paths.
+
+    Issues one UPDATE per column and batch in the current transaction and
+    bumps the content version; the caller commits, so either every
+    reference moves or none does.
+
+    Args:
+        mapping (dict): {old static path: new static path}
+
+    Returns:
+        int: Number of rows updated
+    """
+    from sqlalchemy import case
+    from models import ImageVariant
+    from page_cache import bump_content_version
+
+    updated = 0
+    old_paths = sorted(mapping)
+    for start in range(0, len(old_paths), batch_size):
+        batch = old_paths[start:start + batch_size]
+        for column in _image_columns() + (ImageVariant.source_path,):
+            updated += column.class_.query.filter(column.in_(batch)).update(
+                {column: case({old: mapping[old] for old in batch}, value=column)},
+                synchronize_session=False
+            )
+    if updated:
+        bump_content_version()
+    return updated
+
+
+def _image_columns():
+    from models import Product, ProductSetting, Review
+
+    return (ProductSetting.image_path, ProductSetting.logo_path, Product.image_path,
+            Review.image_path, Review.profile_pic_path)
+
+
+def save_responsive_image(file, folder, prefix=''):
+    """
+    Save an uploaded image (see utils.save_uploaded_file) and derive its
+    responsive variants. ``folder`` is the uploads folder inside the static
+    folder, as for the admin uploads.
+
+    Returns:
+        str: Saved filename or None if failed
+    """
+    from utils import save_uploaded_file
+
+    filename = save_uploaded_file(file, folder, prefix=prefix)
+    if filename:
+        generate_variants(f"uploads/{filename}", os.path.dirname(os.path.abspath(folder)))
+    return filename
+
+
+class ImageManifest:
+    """
+    Per-worker snapshot of the recorded image variants, keyed by source path.
+
+    Like the catalog snapshot it is tagged with the shared content version
+    (see page_cache.bump_content_version), which generate_variants() bumps,
+    and reloaded with one query when the version moves. Registers the
+    ``responsive_image()`` template global, which renders a ``<picture>``
+    with AVIF/WebP sources and a fallback ``<img srcset sizes>`` so browsers
+    download the smallest adequate file.
+
+    Usage:
+        image_manifest = ImageManifest()
+        image_manifest.init_app(app)
+
+        {{ responsive_image(settings.image_path, alt=settings.product_name,
+                            sizes='(min-width: 640px) 512px, 100vw', class='w-full') }}
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._hits = 0
+        self._loads = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['image_manifest'] = self
+        app.add_template_global(self.render, 'responsive_image')
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+
+    def get(self):
+        """Return {source path: [Variant, ...]} (smallest first). Needs an app context."""
+        from extensions import db, page_cache
+        from models import ImageVariant
+
+        version = page_cache.content_version()
+        with self._lock:
+            if self._snapshot is not None and self._version == version:
+                self._hits += 1
+                return self._snapshot
+
+        rows = db.session.query(
+            ImageVariant.source_path, ImageVariant.format, ImageVariant.width,
+            ImageVariant.height, ImageVariant.path, ImageVariant.size
+        ).order_by(ImageVariant.source_path, ImageVariant.width).all()
+        snapshot = {}
+        for row in rows:
+            snapshot.setdefault(row.source_path, []).append(Variant(*row[1:]))
+        with self._lock:
+            self._snapshot = snapshot
+            self._version = version
+            self._loads += 1
+        return snapshot
+
+    def variants(self, source):
+        """Return the recorded variants of ``source`` (may be empty)."""
+        return self.get().get(source, []) if source else []
+
+    def render(self, source, alt='', sizes='100vw', **attrs):
+        """
+        Render an image tag for ``source`` (a static path or absolute URL).
+
+        Images with recorded variants become a ``<picture>`` whose ``<img>``
+        carries the largest variant's width and height (unless given), so
+        the layout doesn't shift while it loads; anything else is a plain
+        ``<img>``. Extra keyword arguments become attributes (``class``,
+        ``loading``, ...); None values are left out.
+        """
+        from flask import url_for
+
+        if not source:
+            return Markup('')
+        attrs = {'alt': alt, **attrs}
+        by_format = {}
+        for variant in self.variants(source):
+            by_format.setdefault(variant.format, []).append(variant)
+        fallback = by_format.pop('png', None) or by_format.pop('jpeg', None)
+        if not fallback:
+            src = source if source.startswith(('http://', 'https://', '/')) else url_for('static', filename=source)
+            return Markup(f'<img src="{escape(src)}"{_attributes(attrs)}>')
+        largest = fallback[-1]
+
+        def srcset(candidates):
+            return ', '.join(f"{url_for('static', filename=v.path)} {v.width}w" for v in candidates)
+
+        sources = ''.join(
+            f'<source type="{MIME_TYPES[fmt]}" srcset="{escape(srcset(by_format[fmt]))}" sizes="{escape(sizes)}">'
+            for fmt in ('avif', 'webp') if fmt in by_format
+        )
+        if 'width' not in attrs and 'height' not in attrs:
+            attrs.update(width=largest.width, height=largest.height)
+        img = (f'<img src="{escape(url_for("static", filename=largest.path))}" '
+               f'srcset="{escape(srcset(fallback))}" sizes="{escape(sizes)}"{_attributes(attrs)}>')
+        # display: contents keeps the <img> the layout box, as before
+        return Markup(f'<picture style="display: contents">{sources}{img}</picture>')
+
+    def stats(self):
+        """Return counters for this worker process."""
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'loads': self._loads,
+                'sources': len(self._snapshot) if self._snapshot is not None else None,
+                'content_version': self._version,
+            }
+
+
+def _attributes(attrs):
+    return ''.join(f' {name}="{escape(value)}"' for name, value in attrs.items() if value is not None)
@@ -0,0 +1,138 @@
+import importlib
+import os
+import re
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from extensions import db
+
+# Applied migrations, one row per version
+SCHEMA_VERSION_TABLE = 'schema_version'
+
+MIGRATIONS_PACKAGE = 'migrations'
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), MIGRATIONS_PACKAGE)
+_MIGRATION_FILE = re.compile(r'^v(\d+)_(\w+)\.py$')
+
+
+def discover_migrations(bind_key=None):
+    """
+    Return the migration modules in ``migrations/``, oldest first.
+
+    Each module is named ``v<version>_<name>.py`` and defines
+    ``upgrade(conn)``; migrations are up-only and must be safe to run on a
+    database created by db.create_all() from the current models. A module
+    that sets ``BIND = '<key>'`` runs against that SQLALCHEMY_BINDS database
+    instead of the main one.
+
+    Args:
+        bind_key (str): Only return migrations for this bind (None is the
+            main database); pass ``all`` to return every migration
+
+    Returns:
+        list: (version, name, module) tuples
+    """
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _MIGRATION_FILE.match(filename)
+        if match:
+            module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{filename[:-3]}")
+            migrations.append((int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda migration: migration[0])
+    versions = [version for version, name, module in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {MIGRATIONS_DIR}")
+    if bind_key != 'all':
+        migrations = [migration for migration in migrations if migration_bind(migration[2]) == bind_key]
+    return migrations
+
+
+def migration_bind(module):
+    """Return the bind key a migration module runs against (None: main database)."""
+    return getattr(module, 'BIND', None)
+
+
+def migration_binds():
+    """Return the bind keys that have migrations, main database (None) first."""
+    keys = {migration_bind(module) for version, name, module in discover_migrations('all')}
+    return sorted(keys, key=lambda key: (key is not None, key or ''))
+
+
+def ensure_version_table(bind):
+    with bind.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+
+
+def applied_versions(bind=None):
+    """Return the set of migration versions recorded in a database."""
+    bind = bind or db.engine
+    try:
+        with bind.connect() as conn:
+            return {row[0] for row in conn.execute(text(f"SELECT version FROM {SCHEMA_VERSION_TABLE}"))}
+    except SQLAlchemyError:
+        return set()
+
+
+def current_version(bind=None):
+    """Return the highest applied migration version (0 if none or no table)."""
+    return max(applied_versions(bind), default=0)
+
+
+def pending_migrations(bind_key=None):
+    """
+    Return the (version, name, module) migrations not applied yet.
+
+    Each bind records its own applied versions, so the main and traffic
+    databases can be migrated independently (or share one table when both
+    binds point at the same file).
+
+    Args:
+        bind_key (str): Bind to check (None is the main database); pass
+            ``all`` to check every bind that has migrations
+    """
+    keys = migration_binds() if bind_key == 'all' else [bind_key]
+    pending = []
+    for key in keys:
+        applied = applied_versions(db.engines[key])
+        pending.extend(migration for migration in discover_migrations(key) if migration[0] not in applied)
+    pending.sort(key=lambda migration: migration[0])
+    return pending
+
+
+def upgrade(bind_key='all', target=None):
+    """
+    Apply pending migrations in version order, each in its own transaction.
+
+    The version row is written in the same transaction as the migration, so
+    a failed migration leaves no trace and is retried next time. If another
+    worker applied a version first, its row already exists and this worker
+    skips it.
+
+    Args:
+        bind_key (str): Bind to migrate (None is the main database), default
+            every bind that has migrations
+        target (int): Stop after this version (default: latest)
+
+    Returns:
+        list: (version, name) of the migrations applied by this call
+    """
+    for key in (migration_binds() if bind_key == 'all' else [bind_key]):
+        ensure_version_table(db.engines[key])
+    applied = []
+    for version, name, module in pending_migrations(bind_key):
+        if target is not None and version > target:
+            break
+        try:
+            with db.engines[migration_bind(module)].begin() as conn:
+                conn.execute(
+                    text(f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                    {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+                )
+                module.upgrade(conn)
+        except IntegrityError:
+            # Applied concurrently by another worker
+            continue
+        applied.append((version, name))
+    return applied
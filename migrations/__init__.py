@@ -0,0 +1,8 @@
+"""
+Versioned, up-only schema migrations applied by migrate.py.
+
+Add a module named ``v<NNN>_<name>.py`` with an ``upgrade(conn)`` function.
+Migrations run after db.create_all(), so they must be safe on both an
+existing database and one freshly created from the current models (use
+``IF NOT EXISTS`` and similar guards).
+"""
@@ -0,0 +1,35 @@
+"""
+Indexes for the order queries in routes/admin.py and routes/orders.py.
+
+- ix_order_status_timestamp: dashboard status filter with keyset pagination
+  (WHERE status = ? ORDER BY timestamp DESC, id DESC)
+- ix_order_mobile_timestamp: a customer's orders, newest first
+  (aggregates.refresh_customers and customer history lookups); replaces the
+  single-column ix_order_mobile_number, which it makes redundant
+- ix_order_timestamp_total: covering index for the hourly chart GROUP BY
+  (timestamp range, summing total_price without touching the table)
+- ix_order_steadfast_open: partial index for the SteadFast cron job, which
+  only looks at orders that have a consignment id
+- ix_order_item_order_id: loading the items of a page of orders
+- ix_product_active_timestamp: active products on the landing page
+"""
+from sqlalchemy import text
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_order_status_timestamp ON "order" (status, timestamp, id)',
+    'CREATE INDEX IF NOT EXISTS ix_order_mobile_timestamp ON "order" (mobile_number, timestamp)',
+    'DROP INDEX IF EXISTS ix_order_mobile_number',
+    'CREATE INDEX IF NOT EXISTS ix_order_timestamp_total ON "order" (timestamp, total_price)',
+    'CREATE INDEX IF NOT EXISTS ix_order_steadfast_open ON "order" (steadfast_status) '
+    'WHERE steadfast_consignment_id IS NOT NULL',
+    'CREATE INDEX IF NOT EXISTS ix_order_item_order_id ON order_item (order_id)',
+    'CREATE INDEX IF NOT EXISTS ix_product_active_timestamp ON product (is_active, timestamp)',
+]
+
+
+def upgrade(conn):
+    for statement in INDEXES:
+        conn.execute(text(statement))
+    if conn.dialect.name == 'sqlite':
+        # Refresh planner statistics so the new indexes are picked up
+        conn.execute(text('ANALYZE'))
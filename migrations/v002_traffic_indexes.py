@@ -0,0 +1,21 @@
+"""
+Indexes for the traffic tables, which live in the 'traffic' bind
+(TRAFFIC_DATABASE_URL, or the main database when that is unset).
+
+- ix_traffic_timestamp_ip: exact unique-visitor counts over a time window
+  (moved out of v001; IF NOT EXISTS keeps databases that already have it)
+"""
+from sqlalchemy import text
+
+BIND = 'traffic'
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_traffic_timestamp_ip ON traffic (timestamp, ip_address)',
+]
+
+
+def upgrade(conn):
+    for statement in INDEXES:
+        conn.execute(text(statement))
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text('ANALYZE'))
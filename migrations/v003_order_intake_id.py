@@ -0,0 +1,15 @@
+"""
+Order.intake_id: the order journal record an order was drained from.
+
+- ix_order_intake_id: unique, so a journal batch replayed after a crash is
+  skipped instead of inserted twice, and the thank-you page can find an
+  order by its intake id (NULL for orders placed before the journal)
+"""
+from sqlalchemy import inspect, text
+
+
+def upgrade(conn):
+    # Fresh databases already have the column from db.create_all()
+    if 'intake_id' not in {column['name'] for column in inspect(conn).get_columns('order')}:
+        conn.execute(text('ALTER TABLE "order" ADD COLUMN intake_id VARCHAR(64)'))
+    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS ix_order_intake_id ON "order" (intake_id)'))
@@ -0,0 +1,17 @@
+"""
+Backfill the traffic rollups and unique-visitor sketches from raw Traffic
+rows.
+
+The admin dashboard reads only TrafficRollup and TrafficSketch, which the
+recorder fills for new hits; without this, history recorded before the
+rollups existed would show as zero visitors. Buckets are rebuilt from
+scratch, so hits the recorder already rolled up are not counted twice.
+"""
+from flask import current_app
+from traffic import rebuild_rollups_on
+
+BIND = 'traffic'
+
+
+def upgrade(conn):
+    rebuild_rollups_on(conn, current_app.config.get('TRAFFIC_VISITOR_KEY', 'ip'))
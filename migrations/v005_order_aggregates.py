@@ -0,0 +1,14 @@
+"""
+Backfill the Customer aggregates and the order status counters from the
+existing orders.
+
+Both tables are maintained on every order write but start empty on an
+upgraded database: without this, every returning customer's next order
+would show order_count=1 on the dashboard. Every dashboard status gets a
+counter row, so the counters never have to be seeded lazily.
+"""
+from aggregates import rebuild_aggregates_on
+
+
+def upgrade(conn):
+    rebuild_aggregates_on(conn)
@@ -27,7 +27,7 @@ class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
     shipping_address = db.Column(db.Text, nullable=False)
-    mobile_number = db.Column(db.String(20), nullable=False, index=True)
+    mobile_number = db.Column(db.String(20), nullable=False)  # indexed with timestamp, see migrations
     # items relationship defined backref in OrderItem? Or explicitly here.
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade="all, delete-orphan")
     
@@ -37,10 +37,62 @@ class Order(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     steadfast_consignment_id = db.Column(db.String(50))
     steadfast_status = db.Column(db.String(50))
+    intake_id = db.Column(db.String(64))  # Order journal record id; unique index in migrations/v003
+    # Composite and partial indexes are added by migrations/v001_order_indexes.py
 
     def __repr__(self):
         return f'<Order {self.id} - {self.full_name}>'
 
+class Customer(db.Model):
+    """Per-customer order aggregate keyed by normalised mobile number, maintained on every order write."""
+    mobile_number = db.Column(db.String(20), primary_key=True)
+    full_name = db.Column(db.String(100))  # Name on the most recent order
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    lifetime_spend = db.Column(db.Integer, nullable=False, default=0)
+    first_order_at = db.Column(db.DateTime)
+    last_order_at = db.Column(db.DateTime, index=True)
+    last_status = db.Column(db.String(20))
+
+    def __repr__(self):
+        return f'<Customer {self.mobile_number} ({self.order_count} orders)>'
+
+class OrderStatusCount(db.Model):
+    """Order count and revenue per status, maintained on every order write."""
+    status = db.Column(db.String(20), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<OrderStatusCount {self.status}: {self.order_count}>'
+
+class OrderToken(db.Model):
+    """One-time checkout form token, mapped to the order it created (see idempotency.py)."""
+    token = db.Column(db.String(64), primary_key=True)
+    order_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class ImageVariant(db.Model):
+    """One resized, re-encoded derivative of an uploaded image (see images.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    source_path = db.Column(db.String(500), nullable=False, index=True)
+    format = db.Column(db.String(10), nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    path = db.Column(db.String(500), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class ContentVersion(db.Model):
+    """Single-row version stamp bumped on product/review edits; keys the landing page cache."""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class BootstrapMarker(db.Model):
+    """Single-row record of the last schema bootstrap (see bootstrap.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    bootstrapped_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Admin(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), nullable=False, unique=True)
@@ -82,6 +134,7 @@ class Review(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
 class Traffic(db.Model):
+    __bind_key__ = 'traffic'
     id = db.Column(db.Integer, primary_key=True)
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.Text)
@@ -91,3 +144,34 @@ class Traffic(db.Model):
 
     def __repr__(self):
         return f'<Traffic {self.id} - {self.path}>'
+
+class TrafficRollup(db.Model):
+    """Hourly page view counts per path and referrer host, maintained by the traffic recorder."""
+    __bind_key__ = 'traffic'
+    __table_args__ = (
+        db.UniqueConstraint('hour', 'path', 'referrer_host', name='uq_traffic_rollup_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, nullable=False, index=True)  # UTC, truncated to the hour
+    path = db.Column(db.String(500), nullable=False, default='')
+    referrer_host = db.Column(db.String(255), nullable=False, default='')  # '' for direct visits
+    hits = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TrafficRollup {self.hour} {self.path} {self.hits}>'
+
+class TrafficSketch(db.Model):
+    """HyperLogLog sketch of visitor keys for one hour or one day bucket."""
+    __bind_key__ = 'traffic'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket', name='uq_traffic_sketch_bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(4), nullable=False)  # 'hour' or 'day'
+    bucket = db.Column(db.DateTime, nullable=False)  # UTC bucket start
+    registers = db.Column(db.LargeBinary, nullable=False)
+
+    def __repr__(self):
+        return f'<TrafficSketch {self.granularity} {self.bucket}>'
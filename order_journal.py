@@ -0,0 +1,538 @@
+import atexit
+import json
+import os
+import re
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines; the journal needs flock
+    fcntl = None
+
+# Start of an encoded record: 8 hex digits of CRC-32 and a space
+_RECORD_START = re.compile(rb'[0-9a-f]{8} \{')
+
+
+def encode_record(record):
+    """Encode a record as one journal line: CRC-32 (hex), a space, compact JSON."""
+    payload = json.dumps(record, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    return f"{zlib.crc32(payload.encode('utf-8')):08x} {payload}\n".encode('utf-8')
+
+
+def decode_record(line):
+    """Decode a journal line; returns the record, or None if the checksum fails."""
+    try:
+        checksum, payload = line.rstrip(b'\n').split(b' ', 1)
+        if len(checksum) != 8 or int(checksum, 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+def recover_record(line):
+    """
+    Recover a record appended after a torn (partially written) line.
+
+    A worker killed mid-append leaves a line without its newline, and the
+    next append continues on the same line; the intact record is the valid
+    suffix starting at a checksum.
+    """
+    for match in _RECORD_START.finditer(line, 1):
+        record = decode_record(line[match.start():])
+        if record is not None:
+            return record
+    return None
+
+
+# Fields every intake record carries (see place_order), with their JSON types
+_RECORD_FIELDS = {
+    'intake_id': str, 'full_name': str, 'address': str, 'mobile': str,
+    'quantity': int, 'total_price': int, 'items': list,
+}
+_ITEM_FIELDS = {'product_name': str, 'price': int, 'quantity': int}
+
+
+def _has_type(value, kind):
+    # bool is an int in Python but never a valid count or price
+    return isinstance(value, kind) and not isinstance(value, bool)
+
+
+def record_error(record):
+    """
+    Check that a decoded record has the shape build_order and add_orders need.
+
+    Returns:
+        str: What is wrong with the record, or None if it can be inserted
+    """
+    if not isinstance(record, dict):
+        return "record is not a JSON object"
+    for field, kind in _RECORD_FIELDS.items():
+        if not _has_type(record.get(field), kind):
+            return f"{field} is missing or not {kind.__name__}"
+    for item in record['items']:
+        if not isinstance(item, dict):
+            return "item is not a JSON object"
+        for field, kind in _ITEM_FIELDS.items():
+            if not _has_type(item.get(field), kind):
+                return f"item {field} is missing or not {kind.__name__}"
+    if record.get('order_token') is not None and not isinstance(record['order_token'], str):
+        return "order_token is not str"
+    if record.get('received_at') is not None:
+        try:
+            datetime.fromisoformat(record['received_at'])
+        except (TypeError, ValueError):
+            return "received_at is not an ISO timestamp"
+    return None
+
+def build_order(record):
+    """Build the Order for an intake record, without its items (see add_orders)."""
+    from models import Order
+
+    order = Order(
+        full_name=record['full_name'],
+        shipping_address=record['address'],
+        mobile_number=record['mobile'],
+        quantity=record['quantity'],  # Total quantity
+        total_price=record['total_price'],
+        intake_id=record.get('intake_id')
+    )
+    if record.get('received_at'):
+        # Drained orders keep the time the customer placed them
+        order.timestamp = datetime.fromisoformat(record['received_at'])
+    return order
+
+
+def add_orders(records):
+    """
+    Insert the orders for intake records in the current transaction.
+
+    Orders are flushed to get their ids, then the items of every order go in
+    with a single executemany insert rather than one ORM insert per item.
+
+    Returns:
+        list: The flushed Orders, in record order
+    """
+    from extensions import db
+    from models import OrderItem
+
+    orders = [build_order(record) for record in records]
+    db.session.add_all(orders)
+    db.session.flush()
+    rows = [
+        {'order_id': order.id, 'product_name': item['product_name'], 'price': item['price'],
+         'quantity': item['quantity']}
+        for order, record in zip(orders, records) for item in record['items']
+    ]
+    if rows:
+        db.session.execute(db.insert(OrderItem), rows)
+    return orders
+
+
+class OrderJournal:
+    """
+    Durable write-ahead journal for order intake.
+
+    place_order() appends each validated order to ORDER_JOURNAL_PATH (default
+    ``instance/orders.journal``) as one checksummed JSON line, fsyncs it and
+    redirects, so a customer's order is safe on disk before any database
+    write. A drainer thread in every worker inserts pending records in
+    batches; an flock on ``<path>.lock`` makes one worker drain at a time.
+
+    The drained position is kept in ``<path>.offset`` and advanced only after
+    the batch is committed. Each record carries a unique intake id (stored on
+    the Order), so a batch replayed after a crash between the commit and the
+    offset write is skipped rather than inserted twice. While the database is
+    locked or unavailable, records stay in the journal and are retried on the
+    next tick. Lines with a bad checksum are moved to ``<path>.corrupt``, and
+    records that are malformed (see record_error) or fail to insert for any
+    other reason to ``<path>.rejected``. Once fully drained, a journal larger
+    than ORDER_JOURNAL_ROTATE_BYTES is truncated.
+
+    Usage:
+        order_journal = OrderJournal()
+        order_journal.init_app(app)
+
+        intake_id = order_journal.append(record)   # None if the journal failed
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.path = None
+        self.batch_size = 200
+        self.drain_interval = 1.0
+        self.rotate_bytes = 4 * 1024 * 1024
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'appended': 0, 'append_failed': 0, 'drained': 0, 'duplicates': 0, 'corrupt': 0,
+            'rejected': 0, 'failed': 0, 'batches': 0, 'rotations': 0,
+            'last_drained_at': None, 'last_error': None,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('ORDER_JOURNAL_ENABLED', False)
+        self.path = app.config.get('ORDER_JOURNAL_PATH') or os.path.join(app.instance_path, 'orders.journal')
+        self.batch_size = int(app.config.get('ORDER_JOURNAL_BATCH_SIZE', self.batch_size))
+        self.drain_interval = float(app.config.get('ORDER_JOURNAL_DRAIN_INTERVAL', self.drain_interval))
+        self.rotate_bytes = int(app.config.get('ORDER_JOURNAL_ROTATE_BYTES', self.rotate_bytes))
+        app.extensions['order_journal'] = self
+        if self.enabled and fcntl is None:
+            print("Error: ORDER_JOURNAL_ENABLED needs fcntl (POSIX); orders are written directly.")
+            self.enabled = False
+        if self.enabled:
+            app.before_request(self._ensure_drainer)
+            atexit.register(self.shutdown)
+
+    def append(self, record):
+        """
+        Durably append an order record to the journal.
+
+        Args:
+            record (dict): JSON-serialisable order; ``intake_id`` and
+                ``received_at`` are filled in when missing
+
+        Returns:
+            str: The record's intake id, or None if it could not be written
+            (the caller should then insert the order directly)
+        """
+        record = dict(record)
+        record.setdefault('intake_id', uuid.uuid4().hex)
+        record.setdefault('received_at', datetime.utcnow().isoformat())
+        line = encode_record(record)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                # Serialises with other writers and with rotation
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                view = memoryview(line)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            self._count('append_failed')
+            print(f"Error appending to order journal: {e}")
+            return None
+        self._count('appended')
+        self._wake.set()
+        return record['intake_id']
+
+    def drain(self):
+        """
+        Insert every pending journal record into the database.
+
+        Returns immediately if another thread or worker is already draining.
+        Must be called inside an app context.
+
+        Returns:
+            int: Number of orders inserted
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return 0
+        if not self._drain_lock.acquire(blocking=False):
+            return 0
+        try:
+            lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                try:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return 0
+                return self._drain_locked()
+            finally:
+                os.close(lock_fd)
+        except OSError as e:
+            self._count('failed')
+            print(f"Error draining order journal: {e}")
+            return 0
+        finally:
+            self._drain_lock.release()
+
+    def shutdown(self, timeout=5.0):
+        """Stop the drainer thread (if any) and drain what is pending."""
+        self._stopping.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        if self.enabled and self.app is not None:
+            with self.app.app_context():
+                self.drain()
+
+    def stats(self):
+        """Return counters for this worker plus the journal's current lag."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        if not self.enabled:
+            return stats
+
+        offset, size = self._read_offset(), self._size()
+        if offset > size:
+            offset = 0
+        pending, oldest = 0, None
+        if size > offset:
+            with open(self.path, 'rb') as journal:
+                journal.seek(offset)
+                for line in journal:
+                    if not line.endswith(b'\n'):
+                        break
+                    if oldest is None:
+                        record = decode_record(line)
+                        oldest = record and record.get('received_at')
+                    pending += 1
+        stats['pending_records'] = pending
+        stats['pending_bytes'] = size - offset
+        stats['lag_seconds'] = (
+            round((datetime.utcnow() - datetime.fromisoformat(oldest)).total_seconds(), 3) if oldest else 0.0
+        )
+        return stats
+
+    def pending_record(self, intake_id):
+        """
+        Return the journal record for ``intake_id`` if it is still waiting to
+        be drained, else None.
+
+        Reads only the pending tail of the journal (after the drained
+        offset) and takes no locks, so request handlers can show a
+        "processing" state without doing the drainer's inserts themselves.
+        """
+        if not self.enabled or not intake_id:
+            return None
+        offset, size = self._read_offset(), self._size()
+        if offset > size:
+            offset = 0
+        if size <= offset:
+            return None
+        needle = json.dumps(intake_id).encode('utf-8')
+        with open(self.path, 'rb') as journal:
+            journal.seek(offset)
+            for line in journal:
+                if needle not in line:
+                    continue
+                record = decode_record(line) or recover_record(line)
+                if isinstance(record, dict) and record.get('intake_id') == intake_id:
+                    return record
+        return None
+
+    def _drain_locked(self):
+        total = 0
+        while True:
+            offset, size = self._read_offset(), self._size()
+            if offset > size:
+                # The journal was truncated after the offset was last written
+                offset = 0
+            if offset == size:
+                self._rotate_if_large(offset)
+                return total
+            lines, end = self._read_lines(offset)
+            if not lines:
+                return total  # only a partially written line so far
+            records = []
+            for line in lines:
+                record = decode_record(line)
+                if record is None:
+                    self._count('corrupt')
+                    self._quarantine('.corrupt', line)
+                    record = recover_record(line)
+                if record is None:
+                    continue
+                error = record_error(record)
+                if error:
+                    # Intact but unusable: set aside so the offset can advance
+                    self._reject(record if isinstance(record, dict) else {'record': record}, error)
+                    continue
+                records.append(record)
+            try:
+                total += self._insert(records)
+            except OperationalError as e:
+                # Database locked or unavailable: keep the records, retry later
+                self._count('failed')
+                self._set_error(e)
+                print(f"Error draining order journal: {e}")
+                return total
+            self._write_offset(end)
+
+    def _insert(self, records):
+        from extensions import db
+        from models import Order, OrderToken
+
+        intake_ids = [record['intake_id'] for record in records]
+        tokens = [record['order_token'] for record in records if record.get('order_token')]
+        seen = set(
+            intake_id for (intake_id,) in
+            db.session.query(Order.intake_id).filter(Order.intake_id.in_(intake_ids))
+        )
+        if tokens:
+            seen.update(token for (token,) in
+                        db.session.query(OrderToken.token).filter(OrderToken.token.in_(tokens)))
+        fresh = []
+        for record in records:
+            keys = {record['intake_id'], record.get('order_token')} - {None}
+            if keys & seen:
+                self._count('duplicates')
+                continue
+            seen.update(keys)
+            fresh.append(record)
+
+        try:
+            self._add_orders(fresh)
+            db.session.commit()
+            inserted = len(fresh)
+        except OperationalError:
+            db.session.rollback()
+            raise
+        except Exception:
+            # A record the database (or the order code) refuses: insert one at
+            # a time to set it aside
+            db.session.rollback()
+            inserted = self._insert_each(fresh)
+
+        self._count('drained', inserted)
+        self._count('batches')
+        with self._stats_lock:
+            self._stats['last_drained_at'] = datetime.utcnow().isoformat()
+        return inserted
+
+    def _insert_each(self, records):
+        from extensions import db
+
+        inserted = 0
+        for record in records:
+            try:
+                self._add_orders([record])
+                db.session.commit()
+                inserted += 1
+            except OperationalError:
+                db.session.rollback()
+                raise
+            except Exception as e:
+                # Any other failure would otherwise stop the offset for good
+                db.session.rollback()
+                self._reject(record, e)
+        return inserted
+
+    def _reject(self, record, error):
+        self._count('rejected')
+        self._set_error(error)
+        self._quarantine('.rejected', encode_record(dict(record, error=str(error))))
+
+    def _add_orders(self, records):
+        from aggregates import apply_order_insert
+        from idempotency import record_token
+
+        for order, record in zip(add_orders(records), records):
+            apply_order_insert(order)
+            if record.get('order_token'):
+                record_token(record['order_token'], order.id)
+
+    def _read_lines(self, offset):
+        lines, end = [], offset
+        with open(self.path, 'rb') as journal:
+            journal.seek(offset)
+            for line in journal:
+                if not line.endswith(b'\n') or len(lines) >= self.batch_size:
+                    break
+                lines.append(line)
+                end += len(line)
+        return lines, end
+
+    def _rotate_if_large(self, offset):
+        if offset < self.rotate_bytes:
+            return
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # Writers may have appended since the size was read
+            if os.fstat(fd).st_size != offset:
+                return
+            # Offset first: a crash in between replays drained records, which
+            # are then skipped by intake id, rather than skipping new ones
+            self._write_offset(0)
+            os.ftruncate(fd, 0)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._count('rotations')
+
+    def _size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def _read_offset(self):
+        try:
+            with open(self.path + '.offset') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset):
+        # Write-then-rename so a crash never leaves a torn offset
+        tmp = f"{self.path}.offset.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path + '.offset')
+
+    def _quarantine(self, suffix, line):
+        try:
+            with open(self.path + suffix, 'ab') as f:
+                f.write(line if line.endswith(b'\n') else line + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Error writing {self.path + suffix}: {e}")
+
+    def _ensure_drainer(self):
+        # Started lazily in each process, as threads do not survive the fork
+        # from Passenger's preloaded parent (see TrafficRecorder)
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid is not None and self._pid != pid:
+                self._drain_lock = threading.Lock()
+            self._pid = pid
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='order-journal-drainer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.drain_interval)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    self.drain()
+            except Exception as e:
+                self._count('failed')
+                print(f"Error in order journal drainer: {e}")
+
+    def _set_error(self, error):
+        with self._stats_lock:
+            self._stats['last_error'] = str(error)[:500]
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
@@ -0,0 +1,170 @@
+import gzip
+import threading
+import time
+from collections import namedtuple
+from flask import Response, request, session
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip is always available
+    brotli = None
+
+# One rendered page: the HTML and its precompressed encodings (br may be None)
+CachedPage = namedtuple('CachedPage', ['html', 'gzip', 'br'])
+
+
+class PageCache:
+    """
+    Per-worker full-page cache for rendered public pages.
+
+    Pages are cached under a caller-supplied key (template, settings stamp)
+    plus the shared content version, which admin edits to products and reviews
+    bump with bump_content_version(). The version is re-read at most every
+    PAGE_CACHE_TTL seconds, so other workers drop stale pages within one TTL;
+    the worker that made the edit calls invalidate() after committing.
+
+    Each page is stored as HTML plus gzip (and brotli, when installed)
+    encodings compressed once per render, and served according to the
+    request's Accept-Encoding. Requests with pending flash messages bypass the
+    cache so the messages are rendered.
+
+    Usage:
+        page_cache = PageCache()
+        page_cache.init_app(app)
+
+        return page_cache.serve((template_path, settings.updated_at), render)
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.ttl = 5.0
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self.ttl = float(app.config.get('PAGE_CACHE_TTL', 5.0))
+        app.extensions['page_cache'] = self
+        with self._lock:
+            self._pages.clear()
+            self._version = None
+
+    def serve(self, key, render):
+        """
+        Return a response for the page identified by ``key``.
+
+        Args:
+            key (tuple): Hashable key; the first element names the page and
+                only the newest key per name is kept
+            render (callable): Renders the page HTML on a cache miss
+
+        Returns:
+            Response
+        """
+        if not self.enabled or session.get('_flashes'):
+            with self._lock:
+                self._bypasses += 1
+            return Response(render(), mimetype='text/html')
+
+        full_key = tuple(key) + (self.content_version(),)
+        name = full_key[0]
+        with self._lock:
+            stored = self._pages.get(name)
+        if stored is not None and stored[0] == full_key:
+            page = stored[1]
+            status = 'HIT'
+        else:
+            page = self.compress(render())
+            with self._lock:
+                self._pages[name] = (full_key, page)
+            status = 'MISS'
+        with self._lock:
+            if status == 'HIT':
+                self._hits += 1
+            else:
+                self._misses += 1
+
+        encoding, body = self._choose_encoding(page)
+        response = Response(body, mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['X-Page-Cache'] = status
+        return response
+
+    @staticmethod
+    def compress(html):
+        """Encode rendered HTML once into every supported encoding."""
+        data = html.encode('utf-8')
+        return CachedPage(
+            html=data,
+            gzip=gzip.compress(data, compresslevel=9, mtime=0),
+            br=brotli.compress(data, mode=brotli.MODE_TEXT, quality=11) if brotli else None
+        )
+
+    def content_version(self):
+        """Return the shared content version, re-read at most every TTL seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._checked_at < self.ttl:
+                return self._version
+
+        from extensions import db
+        from models import ContentVersion
+
+        version = db.session.query(ContentVersion.version).filter_by(id=1).scalar() or 0
+        with self._lock:
+            self._version = version
+            self._checked_at = now
+        return version
+
+    def invalidate(self):
+        """Re-read the content version on the next request in this worker."""
+        with self._lock:
+            self._version = None
+
+    def stats(self):
+        """Return counters for this worker process."""
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'bypasses': self._bypasses,
+                'pages': len(self._pages),
+                'content_version': self._version,
+                'brotli': brotli is not None,
+                'ttl': self.ttl,
+            }
+
+    @staticmethod
+    def _choose_encoding(page):
+        accepted = request.accept_encodings
+        if page.br is not None and accepted['br']:
+            return 'br', page.br
+        if accepted['gzip']:
+            return 'gzip', page.gzip
+        return None, page.html
+
+
+def bump_content_version():
+    """
+    Bump the shared content version in the current transaction.
+
+    Call before committing any change to products or reviews, then call
+    page_cache.invalidate() after the commit.
+    """
+    from extensions import db
+    from models import ContentVersion
+
+    row = ContentVersion.query.filter_by(id=1).with_for_update().first()
+    if row is None:
+        row = ContentVersion(id=1, version=0)
+        db.session.add(row)
+    row.version = (row.version or 0) + 1
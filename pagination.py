@@ -0,0 +1,118 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+class KeysetPage:
+    """
+    One page of a keyset (seek) paginated query.
+
+    Rows are ordered newest first by ``(timestamp, id)``; the page remembers the
+    first and last keys so the template can link to the neighbouring pages with
+    opaque cursors instead of page numbers.
+    """
+
+    def __init__(self, items, has_next, has_prev, per_page, total=None):
+        self.items = items
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.items[-1]) if self.has_next and self.items else None
+
+    @property
+    def prev_cursor(self):
+        return encode_cursor(self.items[0]) if self.has_prev and self.items else None
+
+
+class RankedPage(KeysetPage):
+    """
+    One page of results in a ranked order (e.g. search relevance).
+
+    A rank has no (timestamp, id) key to seek on, so these pages are
+    addressed by page number; the template links to ``prev_page`` and
+    ``next_page`` instead of cursors.
+    """
+
+    def __init__(self, items, page, has_next, per_page, total=None):
+        super().__init__(items, has_next=has_next, has_prev=page > 1, per_page=per_page, total=total)
+        self.page = page
+
+    @property
+    def next_page(self):
+        return self.page + 1 if self.has_next else None
+
+    @property
+    def prev_page(self):
+        return self.page - 1 if self.has_prev else None
+
+
+def encode_cursor(row):
+    """
+    Encode a row's (timestamp, id) key as a URL-safe cursor string; a NULL
+    timestamp is encoded as an empty one.
+    """
+    raw = f"{row.timestamp.isoformat() if row.timestamp else ''}|{row.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor into (timestamp, id), with a None timestamp for rows
+    whose timestamp is NULL; returns None for malformed cursors.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split('|')
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_paginate(query, model, per_page=20, after=None, before=None):
+    """
+    Seek-paginate a query newest first by ``(model.timestamp, model.id)``.
+
+    Every page is a bounded index range scan, so deep pages cost the same as
+    page 1, and no COUNT(*) of the filtered set is issued. Rows with a NULL
+    timestamp come after all others (SQLite sorts NULL lowest), newest id
+    first.
+
+    Args:
+        query: Filtered query over ``model``
+        model: Mapped class with ``timestamp`` and ``id`` columns
+        per_page (int): Page size
+        after (str): Cursor of the last row of the previous page (go forward)
+        before (str): Cursor of the first row of the next page (go back)
+
+    Returns:
+        KeysetPage
+    """
+    ts, pk = model.timestamp, model.id
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+
+    if before_key and not after_key:
+        key_ts, key_id = before_key
+        if key_ts is None:
+            seek = or_(ts.isnot(None), pk > key_id)
+        else:
+            seek = or_(ts > key_ts, and_(ts == key_ts, pk > key_id))
+        rows = query.filter(seek).order_by(ts.asc(), pk.asc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        return KeysetPage(list(reversed(rows[:per_page])), has_next=True, has_prev=has_prev, per_page=per_page)
+
+    if after_key:
+        key_ts, key_id = after_key
+        if key_ts is None:
+            query = query.filter(ts.is_(None), pk < key_id)
+        else:
+            query = query.filter(or_(ts < key_ts, and_(ts == key_ts, pk < key_id), ts.is_(None)))
+
+    rows = query.order_by(ts.desc(), pk.desc()).limit(per_page + 1).all()
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_prev=after_key is not None, per_page=per_page)
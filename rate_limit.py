@@ -0,0 +1,195 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Seconds between sweeps of expired buckets (per worker)
+PURGE_INTERVAL = 300.0
+
+
+def parse_limit(value):
+    """
+    Parse a ``"<requests>/<seconds>"`` limit, e.g. ``"5/600"``.
+
+    Returns:
+        tuple: (capacity, period in seconds), or None when the limit is
+        empty or zero (disabled)
+    """
+    if not value:
+        return None
+    requests, _, seconds = str(value).partition('/')
+    capacity, period = int(requests), float(seconds or 1)
+    if capacity <= 0 or period <= 0:
+        return None
+    return capacity, period
+
+
+def client_ip(request):
+    """Client address as forwarded by the front-end proxy (see TrafficRecorder.record)."""
+    return request.environ.get('HTTP_X_REAL_IP', request.remote_addr)
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter shared by all worker processes.
+
+    Buckets live in a small SQLite file (RATE_LIMIT_DB, default
+    ``instance/rate_limit.db``) outside the application database, so a check
+    is one short IMMEDIATE transaction on a one-table file and never touches
+    the ORM session or the orders database. Each scope in RATE_LIMITS allows
+    ``capacity`` requests per ``period`` seconds per key, refilling
+    continuously; buckets that have refilled completely are swept every few
+    minutes. Storage errors fail open, so a broken limiter never blocks
+    orders.
+
+    Usage:
+        rate_limiter = RateLimiter()
+        rate_limiter.init_app(app)
+
+        if not rate_limiter.hit('order_ip', client_ip(request)):
+            ...  # reject before doing any other work
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.path = None
+        self.limits = {}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {'allowed': 0, 'rejected': 0, 'failed': 0, 'purged': 0}
+        self._purged_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.path = app.config.get('RATE_LIMIT_DB') or os.path.join(app.instance_path, 'rate_limit.db')
+        self.limits = {}
+        for scope, value in (app.config.get('RATE_LIMITS') or {}).items():
+            limit = parse_limit(value)
+            if limit:
+                self.limits[scope] = limit
+        self._local = threading.local()
+        app.extensions['rate_limiter'] = self
+
+    def hit(self, scope, key):
+        """
+        Take one token from the bucket for ``key`` in ``scope``.
+
+        Returns:
+            bool: True if the request is allowed; scopes without a limit and
+            empty keys are always allowed
+        """
+        return self.check(scope, key)[0]
+
+    def check(self, scope, key):
+        """
+        Like hit(), but also report when the next token is available.
+
+        Returns:
+            tuple: (allowed, seconds until a token is available; 0 if allowed)
+        """
+        limit = self.limits.get(scope)
+        if not self.enabled or limit is None or not key:
+            return True, 0.0
+        capacity, period = limit
+        rate = capacity / period
+        now = time.time()
+        bucket = f"{scope}:{key}"
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated_at FROM bucket WHERE key = ?", (bucket,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                # expires_at: when the bucket is full again and the row is redundant
+                conn.execute(
+                    "INSERT OR REPLACE INTO bucket (key, tokens, updated_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (bucket, tokens, now, now + (capacity - tokens) / rate)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            self._count('failed')
+            print(f"Error checking rate limit: {e}")
+            return True, 0.0
+
+        self._count('allowed' if allowed else 'rejected')
+        if now - self._purged_at >= PURGE_INTERVAL:
+            self.purge(now)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def refund(self, scope, key):
+        """Give back the token a hit() took, for a request that was not accepted after all."""
+        limit = self.limits.get(scope)
+        if not self.enabled or limit is None or not key:
+            return
+        capacity, period = limit
+        try:
+            # expires_at moves with the bucket's fill level; see check()
+            self._connection().execute(
+                "UPDATE bucket SET tokens = MIN(?, tokens + 1), expires_at = expires_at - ? WHERE key = ?",
+                (capacity, period / capacity, f"{scope}:{key}")
+            )
+        except sqlite3.Error as e:
+            print(f"Error refunding rate limit: {e}")
+
+    def reset(self, scope, key):
+        """Forget the bucket for ``key`` (e.g. after a successful login)."""
+        if not self.enabled or scope not in self.limits or not key:
+            return
+        try:
+            self._connection().execute("DELETE FROM bucket WHERE key = ?", (f"{scope}:{key}",))
+        except sqlite3.Error as e:
+            print(f"Error resetting rate limit: {e}")
+
+    def purge(self, now=None):
+        """Delete buckets that have refilled completely."""
+        self._purged_at = now or time.time()
+        try:
+            deleted = self._connection().execute(
+                "DELETE FROM bucket WHERE expires_at <= ?", (self._purged_at,)
+            ).rowcount
+        except sqlite3.Error as e:
+            print(f"Error purging rate limit buckets: {e}")
+            return 0
+        self._count('purged', deleted)
+        return deleted
+
+    def stats(self):
+        """Return counters for this worker process."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['limits'] = {scope: f"{capacity}/{period:g}" for scope, (capacity, period) in self.limits.items()}
+        return stats
+
+    def _connection(self):
+        # One connection per thread and process; connections must not be
+        # shared across Passenger's fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bucket ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, expires_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_bucket_expires_at ON bucket (expires_at)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
@@ -1,13 +1,20 @@
-import requests
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, login_required, logout_user, current_user
-from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
-from models import Order, Admin, ProductSetting, Review, Traffic, Product
+from datetime import datetime
+from models import Order, Admin, ProductSetting, Review, TrafficRollup, Product, Customer
 from forms import LoginForm, ProductSettingsForm, ShopSettingsForm, ReviewForm, ProductForm
-from utils import save_uploaded_file, save_image_as_webp, get_bd_time
-from extensions import db
-from sqlalchemy import or_, func, distinct, desc
+from utils import normalize_bd_mobile, convert_to_en_digits, looks_like_mobile
+from extensions import db, settings_cache, page_cache, theme_registry, rate_limiter
+from aggregates import refresh_customers, mobiles_for_orders, move_status_counts, order_status_totals, ORDER_STATUSES
+from charts import order_chart_data, traffic_chart_data as build_traffic_chart_data
+from images import save_responsive_image
+from page_cache import bump_content_version
+from pagination import keyset_paginate, RankedPage
+from rate_limit import client_ip
+from search import search_order_ids
+from traffic import rollup_window_start, unique_visitors as count_unique_visitors
+from sqlalchemy import or_, func, desc
+from sqlalchemy.orm import selectinload
 import os
 
 # Create blueprint
@@ -21,8 +28,13 @@ def admin_login():
     
     form = LoginForm()
     if form.validate_on_submit():
+        # Every attempt takes a token; a successful login gives them back
+        if not rate_limiter.hit('admin_login', client_ip(request)):
+            flash('Too many login attempts. Please try again later.', 'error')
+            return render_template('admin_login.html', form=form), 429
         admin = Admin.query.filter_by(username=form.username.data).first()
         if admin and admin.password == form.password.data:
+            rate_limiter.reset('admin_login', client_ip(request))
             login_user(admin)
             return redirect(url_for('admin.admin_dashboard'))
         flash('Invalid username or password', 'error')
@@ -33,8 +45,9 @@ def admin_login():
 def admin_dashboard():
     """Admin dashboard route."""
     """Admin dashboard route."""
-    # Pagination & Filtering
-    page = request.args.get('page', 1, type=int)
+    # Keyset pagination & Filtering
+    after = request.args.get('after')
+    before = request.args.get('before')
     per_page = 20
     status_filter = request.args.get('status')
     search_query = request.args.get('search')
@@ -45,58 +58,74 @@ def admin_dashboard():
     if status_filter and status_filter != 'All':
         query = query.filter(Order.status == status_filter)
         
-    # Apply Search Search
-    if search_query:
-        search = f"%{search_query}%"
+    # Apply Search: ranked full-text index lookup (with the status filter
+    # applied inside it), or a LIKE scan where the index can't serve the
+    # query (non-SQLite, or terms under 3 characters)
+    page = max(request.args.get('page', 1, type=int), 1)
+    ranked_ids = search_order_ids(
+        search_query,
+        status=status_filter if status_filter and status_filter != 'All' else None,
+        limit=per_page + 1,
+        offset=(page - 1) * per_page
+    ) if search_query else None
+    if search_query and ranked_ids is None:
+        search = f"%{convert_to_en_digits(search_query)}%"
         query = query.filter(or_(
             Order.id.ilike(search),
             Order.full_name.ilike(search),
             Order.mobile_number.ilike(search)
         ))
         
-    # Get paginated orders
-    orders_pagination = query.order_by(Order.timestamp.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    if ranked_ids is not None:
+        # Ranked search results are shown best match first, a page at a time
+        page_ids = ranked_ids[:per_page]
+        rank = {order_id: i for i, order_id in enumerate(page_ids)}
+        results = Order.query.options(selectinload(Order.items)).filter(Order.id.in_(page_ids)).all() if page_ids else []
+        orders_pagination = RankedPage(sorted(results, key=lambda o: rank[o.id]), page=page, has_next=len(ranked_ids) > per_page, per_page=per_page)
+    else:
+        # Get one page of orders by seeking on (timestamp, id), with their items
+        # loaded in one batched query; no OFFSET scan and no COUNT(*) per page
+        orders_pagination = keyset_paginate(query.options(selectinload(Order.items)), Order, per_page, after=after, before=before)
     orders = orders_pagination.items
     
-    # Enrich orders with count of previous orders from same mobile number
+    # Enrich orders with count of orders from the same mobile number (Customer aggregate lookup)
+    mobiles = {order.mobile_number for order in orders}
+    history_counts = dict(db.session.query(
+        Customer.mobile_number, Customer.order_count
+    ).filter(Customer.mobile_number.in_(mobiles)).all()) if mobiles else {}
     for order in orders:
-        order.history_count = Order.query.filter_by(mobile_number=order.mobile_number).count()
+        order.history_count = history_counts.get(order.mobile_number, 0)
 
-    # Stats - Use Count Queries
-    # Optimization: Use db.session.query(func.count(Order.id)) if possible, or Order.query.count()
-    stats = {
-        'total': Order.query.count(),
-        'pending': Order.query.filter_by(status='Pending').count(),
-        'completed': Order.query.filter_by(status='Completed').count()
-    }
+    # Stats - counts and revenue per status from the status counter table
+    stats = order_status_totals()
     
-    # Get traffic data for the last 30 days - Optimized
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    # Total for the pager, reused from the stats counts (not available for searches)
+    if not search_query:
+        orders_pagination.total = stats.get((status_filter or 'total').lower()) if status_filter != 'All' else stats['total']
     
-    # Calculate traffic statistics using Aggregation
-    total_visitors = db.session.query(func.count(Traffic.id)).filter(Traffic.timestamp >= thirty_days_ago).scalar()
-    unique_visitors = db.session.query(func.count(distinct(Traffic.ip_address))).filter(Traffic.timestamp >= thirty_days_ago).scalar()
+    # Traffic statistics for the last 30 days, from the hourly rollups and
+    # unique visitor sketches rather than raw Traffic rows
+    rollup_since = rollup_window_start(30)
+    total_visitors = db.session.query(func.coalesce(func.sum(TrafficRollup.hits), 0)).filter(TrafficRollup.hour >= rollup_since).scalar()
+    unique_visitors = count_unique_visitors(rollup_since, hits=total_visitors)
     
-    # Get top paths - Optimized
     top_paths_query = db.session.query(
-        Traffic.path, func.count(Traffic.id).label('count')
+        TrafficRollup.path, func.sum(TrafficRollup.hits).label('count')
     ).filter(
-        Traffic.timestamp >= thirty_days_ago
+        TrafficRollup.hour >= rollup_since
     ).group_by(
-        Traffic.path
+        TrafficRollup.path
     ).order_by(desc('count')).limit(5).all()
     
     top_paths = [(p[0] or 'Unknown', p[1]) for p in top_paths_query]
 
-    # Get top referrers - Optimized
     top_referrers_query = db.session.query(
-        Traffic.referrer, func.count(Traffic.id).label('count')
+        TrafficRollup.referrer_host, func.sum(TrafficRollup.hits).label('count')
     ).filter(
-        Traffic.timestamp >= thirty_days_ago,
-        Traffic.referrer != None,
-        Traffic.referrer != 'Direct' # Assuming 'Direct' is handled or stored as None/Empty
+        TrafficRollup.hour >= rollup_since,
+        TrafficRollup.referrer_host != ''
     ).group_by(
-        Traffic.referrer
+        TrafficRollup.referrer_host
     ).order_by(desc('count')).limit(5).all()
     
     top_referrers = [(r[0], r[1]) for r in top_referrers_query]
@@ -108,46 +137,26 @@ def admin_dashboard():
         'top_referrers': top_referrers
     }
     
-    # Calculate order statistics for different time periods
+    # Order counts and revenue for every chart period from one grouped query
     now = datetime.utcnow()
+    chart_data = order_chart_data(now)
     
-    # Helper for date filtering
-    def get_orders_since(days):
-        return Order.query.filter(Order.timestamp >= now - timedelta(days=days)).all()
-
-    daily_orders = get_orders_since(1)
-    weekly_orders = get_orders_since(7)
-    fortnightly_orders = get_orders_since(14)
-    monthly_orders = get_orders_since(30)
-    two_month_orders = get_orders_since(60)
-    
-    # Prepare chart data
-    chart_data = {
-        'daily': prepare_chart_data(daily_orders, 'daily'),
-        'weekly': prepare_chart_data(weekly_orders, 'weekly'),
-        'fortnightly': prepare_chart_data(fortnightly_orders, 'fortnightly'),
-        'monthly': prepare_chart_data(monthly_orders, 'monthly'),
-        'two_month': prepare_chart_data(two_month_orders, 'two_month')
-    }
-    
-    # Calculate traffic statistics for different time periods
-    def get_traffic_since(days):
-        return Traffic.query.filter(Traffic.timestamp >= now - timedelta(days=days)).all()
-
-    daily_traffic = get_traffic_since(1)
-    weekly_traffic = get_traffic_since(7)
-    fortnightly_traffic = get_traffic_since(14)
-    monthly_traffic = get_traffic_since(30)
-    two_month_traffic = get_traffic_since(60)
+    # Hourly visitor totals for the widest chart window, read from rollups;
+    # every shorter period is bucketed from the same rows
+    hourly_traffic = db.session.query(
+        TrafficRollup.hour, func.sum(TrafficRollup.hits)
+    ).filter(
+        TrafficRollup.hour >= rollup_window_start(60, now)
+    ).group_by(TrafficRollup.hour).all()
     
     # Prepare traffic chart data
-    traffic_chart_data = {
-        'daily': prepare_traffic_chart_data(daily_traffic, 'daily'),
-        'weekly': prepare_traffic_chart_data(weekly_traffic, 'weekly'),
-        'fortnightly': prepare_traffic_chart_data(fortnightly_traffic, 'fortnightly'),
-        'monthly': prepare_traffic_chart_data(monthly_traffic, 'monthly'),
-        'two_month': prepare_traffic_chart_data(two_month_traffic, 'two_month')
-    }
+    traffic_chart_data = build_traffic_chart_data(hourly_traffic, now)
+    
+    # Unique visitors per chart period, merged from the HyperLogLog sketches
+    for period, days in (('daily', 1), ('weekly', 7), ('fortnightly', 14), ('monthly', 30), ('two_month', 60)):
+        period_start = rollup_window_start(days, now)
+        period_hits = sum(hits for hour, hits in hourly_traffic if hour >= period_start)
+        traffic_chart_data[period]['unique_visitors'] = count_unique_visitors(period_start, hits=period_hits, now=now)
     
     return render_template('admin_dashboard.html', orders=orders, pagination=orders_pagination, stats=stats, chart_data=chart_data, traffic_stats=traffic_stats, traffic_chart_data=traffic_chart_data)
 
@@ -164,6 +173,26 @@ def admin_products():
     
     return render_template('admin_products.html', products=products, pagination=products_pagination)
 
+@admin_bp.route('/admin/customers')
+@login_required
+def admin_customers():
+    """List customers from the per-customer aggregate table."""
+    page = request.args.get('page', 1, type=int)
+    per_page = 20
+    search_query = request.args.get('search')
+    
+    query = Customer.query
+    if search_query:
+        if looks_like_mobile(search_query):
+            query = query.filter(Customer.mobile_number.startswith(normalize_bd_mobile(search_query)))
+        else:
+            query = query.filter(Customer.full_name.ilike(f"%{search_query}%"))
+    
+    customers_pagination = query.order_by(Customer.last_order_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    customers = customers_pagination.items
+    
+    return render_template('admin_customers.html', customers=customers, pagination=customers_pagination)
+
 @admin_bp.route('/admin/product/add', methods=['GET', 'POST'])
 @login_required
 def add_product():
@@ -173,7 +202,7 @@ def add_product():
         image_path = None
         if form.image.data:
             folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
-            filename = save_uploaded_file(form.image.data, folder, prefix='prod')
+            filename = save_responsive_image(form.image.data, folder, prefix='prod')
             if filename:
                 image_path = f"uploads/{filename}"
         
@@ -187,7 +216,9 @@ def add_product():
             is_active=form.is_active.data
         )
         db.session.add(product)
+        bump_content_version()
         db.session.commit()
+        page_cache.invalidate()
         flash('Product added successfully!', 'success')
         return redirect(url_for('admin.admin_products'))
         
@@ -204,7 +235,7 @@ def edit_product(product_id):
     if form.validate_on_submit():
         if form.image.data:
             folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
-            filename = save_uploaded_file(form.image.data, folder, prefix='prod')
+            filename = save_responsive_image(form.image.data, folder, prefix='prod')
             if filename:
                 product.image_path = f"uploads/{filename}"
         
@@ -215,7 +246,9 @@ def edit_product(product_id):
         product.stock = form.stock.data
         product.is_active = form.is_active.data
         
+        bump_content_version()
         db.session.commit()
+        page_cache.invalidate()
         flash('Product updated successfully!', 'success')
         return redirect(url_for('admin.admin_products'))
     
@@ -228,7 +261,9 @@ def delete_product(product_id):
     try:
         product = Product.query.get_or_404(product_id)
         db.session.delete(product)
+        bump_content_version()
         db.session.commit()
+        page_cache.invalidate()
         flash('Product deleted!', 'success')
     except:
         flash('Product not found', 'error')
@@ -238,16 +273,11 @@ def delete_product(product_id):
 @login_required
 def admin_product_settings():
     """Admin product settings route."""
-    settings = ProductSetting.query.first()
-    # Ensure settings exist (should be created in app.py or main route, but safety check)
-    if not settings:
-        settings = ProductSetting()
-        db.session.add(settings)
-        db.session.commit()
-        
+    settings = settings_cache.get()
     form = ProductSettingsForm(obj=settings)
     
     if form.validate_on_submit():
+        settings = db.session.get(ProductSetting, settings.id)
         settings.product_name = form.product_name.data
         settings.price = form.price.data
         settings.old_price = form.old_price.data
@@ -259,11 +289,13 @@ def admin_product_settings():
         
         if form.image.data:
             folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
-            filename = save_uploaded_file(form.image.data, folder, prefix='prod')
+            filename = save_responsive_image(form.image.data, folder, prefix='prod')
             if filename:
                 settings.image_path = f"uploads/{filename}"
             
         db.session.commit()
+        settings_cache.invalidate()
+        page_cache.invalidate()  # new image variants bumped the content version
         flash('Product settings updated!', 'success')
         return redirect(url_for('admin.admin_product_settings'))
         
@@ -273,25 +305,16 @@ def admin_product_settings():
 @login_required
 def admin_shop_settings():
     """Admin shop settings route."""
-    # Populate theme choices
-    themes_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'themes')
-    theme_choices = [('default', 'Default')] # Standard fallback
-    if os.path.exists(themes_dir):
-        themes = [d for d in os.listdir(themes_dir) if os.path.isdir(os.path.join(themes_dir, d))]
-        # Ensure we have a set of unique choices and "default" is one of them
-        theme_choices = sorted(list(set([(t, t.capitalize()) for t in themes])))
-    
-    settings = ProductSetting.query.first()
-    if not settings:
-        settings = ProductSetting()
-        db.session.add(settings)
-        db.session.commit()
-        
+    # Populate theme choices from the theme registry
+    theme_choices = theme_registry.choices()
+    
+    settings = settings_cache.get()
     form = ShopSettingsForm(obj=settings)
     form.landing_page_theme.choices = theme_choices
     form.thank_you_page_theme.choices = theme_choices
     
     if form.validate_on_submit():
+        settings = db.session.get(ProductSetting, settings.id)
         settings.shop_name = form.shop_name.data
         settings.gtm_id = form.gtm_id.data
         settings.pixel_id = form.pixel_id.data
@@ -307,11 +330,13 @@ def admin_shop_settings():
         
         if form.logo.data:
             folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
-            filename = save_uploaded_file(form.logo.data, folder, prefix='logo')
+            filename = save_responsive_image(form.logo.data, folder, prefix='logo')
             if filename:
                 settings.logo_path = f"uploads/{filename}"
             
         db.session.commit()
+        settings_cache.invalidate()
+        page_cache.invalidate()  # new image variants bumped the content version
         flash('Shop settings updated!', 'success')
         return redirect(url_for('admin.admin_shop_settings'))
         
@@ -327,13 +352,13 @@ def admin_reviews():
         folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
         
         if form.image.data:
-            filename = save_uploaded_file(form.image.data, folder, prefix='rev')
+            filename = save_responsive_image(form.image.data, folder, prefix='rev')
             if filename:
                 image_path = f"uploads/{filename}"
             
         profile_pic_path = None
         if form.profile_pic.data:
-            filename = save_uploaded_file(form.profile_pic.data, folder, prefix='pfp')
+            filename = save_responsive_image(form.profile_pic.data, folder, prefix='pfp')
             if filename:
                 profile_pic_path = f"uploads/{filename}"
             
@@ -345,12 +370,19 @@ def admin_reviews():
             profile_pic_path=profile_pic_path
         )
         db.session.add(new_review)
+        bump_content_version()
         db.session.commit()
+        page_cache.invalidate()
         flash('Review added successfully!', 'success')
         return redirect(url_for('admin.admin_reviews'))
     
-    reviews = Review.query.order_by(Review.timestamp.desc()).all()
-    return render_template('admin_reviews.html', reviews=reviews, form=form)
+    # One page of reviews by seeking on (timestamp, id); the total is one
+    # COUNT(*) over a small table
+    reviews_pagination = keyset_paginate(Review.query, Review, 20,
+                                         after=request.args.get('after'), before=request.args.get('before'))
+    reviews_pagination.total = Review.query.count()
+    return render_template('admin_reviews.html', reviews=reviews_pagination.items,
+                           pagination=reviews_pagination, form=form)
 
 @admin_bp.route('/admin/reviews/edit/<int:review_id>', methods=['GET', 'POST'])
 @login_required
@@ -363,12 +395,12 @@ def edit_review(review_id):
     if form.validate_on_submit():
         folder = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'uploads')
         if form.image.data:
-            filename = save_uploaded_file(form.image.data, folder, prefix='rev')
+            filename = save_responsive_image(form.image.data, folder, prefix='rev')
             if filename:
                 review.image_path = f"uploads/{filename}"
             
         if form.profile_pic.data:
-            filename = save_uploaded_file(form.profile_pic.data, folder, prefix='pfp')
+            filename = save_responsive_image(form.profile_pic.data, folder, prefix='pfp')
             if filename:
                 review.profile_pic_path = f"uploads/{filename}"
             
@@ -376,7 +408,9 @@ def edit_review(review_id):
         review.rating = form.rating.data
         review.comment = form.comment.data
         
+        bump_content_version()
         db.session.commit()
+        page_cache.invalidate()
         flash('Review updated successfully!', 'success')
         return redirect(url_for('admin.admin_reviews'))
         
@@ -389,7 +423,9 @@ def delete_review(review_id):
     try:
         review = Review.query.get_or_404(review_id)
         db.session.delete(review)
+        bump_content_version()
         db.session.commit()
+        page_cache.invalidate()
         flash('Review deleted!', 'success')
     except Exception as e:
         print(f"Error deleting review: {e}")
@@ -403,7 +439,9 @@ def complete_order(order_id):
     try:
         order = Order.query.get(order_id)
         if order:
+            move_status_counts([order.id], 'Completed')
             order.status = 'Completed'
+            refresh_customers([order.mobile_number])
             db.session.commit()
             flash(f'Order #{str(order_id)[:8]}... marked as completed.', 'success')
         else:
@@ -419,7 +457,9 @@ def delete_order(order_id):
     try:
         order = Order.query.get(order_id)
         if order:
+            move_status_counts([order.id])
             db.session.delete(order)
+            refresh_customers([order.mobile_number])
             db.session.commit()
             flash(f'Order #{str(order_id)[:8]}... deleted.', 'success')
         else:
@@ -441,15 +481,19 @@ def bulk_order_action():
         return redirect(url_for('admin.admin_dashboard'))
         
     try:
+        mobiles = mobiles_for_orders(order_ids)
         if action == 'delete':
+            move_status_counts(order_ids)
             # Use 'in_' to match any ID in the list
             Order.query.filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
             flash(f'{len(order_ids)} orders deleted successfully.', 'success')
             
-        elif action in ['Pending', 'Confirmed', 'Completed', 'Cancelled']:
+        elif action in ORDER_STATUSES:
+            move_status_counts(order_ids, action)
             Order.query.filter(Order.id.in_(order_ids)).update({Order.status: action}, synchronize_session=False)
             flash(f'{len(order_ids)} orders marked as {action}.', 'success')
             
+        refresh_customers(mobiles)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
@@ -466,7 +510,7 @@ def admin_send_steadfast(order_id):
         flash('Order not found', 'error')
         return redirect(url_for('admin.admin_dashboard'))
         
-    settings = ProductSetting.query.first()
+    settings = settings_cache.get()
     
     if not settings.steadfast_api_key or not settings.steadfast_secret_key:
         flash('SteadFast API keys are not configured.', 'error')
@@ -500,6 +544,7 @@ def admin_send_steadfast(order_id):
     }
     
     try:
+        import requests  # imported lazily; only the SteadFast routes need it
         response = requests.post("https://portal.packzy.com/api/v1/create_order", json=payload, headers=headers, timeout=10)
         data = response.json()
         
@@ -525,7 +570,7 @@ def admin_check_steadfast_status(order_id):
         flash('Order not found', 'error')
         return redirect(url_for('admin.admin_dashboard'))
         
-    settings = ProductSetting.query.first()
+    settings = settings_cache.get()
     
     if not order.steadfast_consignment_id:
         flash('Order not sent to SteadFast yet.', 'error')
@@ -538,6 +583,7 @@ def admin_check_steadfast_status(order_id):
     }
     
     try:
+        import requests
         response = requests.get(f"https://portal.packzy.com/api/v1/status_by_cid/{order.steadfast_consignment_id}", headers=headers, timeout=10)
         data = response.json()
         
@@ -560,7 +606,7 @@ def cron_update_steadfast_status():
     if key != 'honey-nut-cron-secure-88':
         return "Unauthorized", 401
         
-    settings = ProductSetting.query.first()
+    settings = settings_cache.get()
     if not settings or not settings.steadfast_api_key:
         return "API not configured", 400
         
@@ -578,6 +624,7 @@ def cron_update_steadfast_status():
         "Content-Type": "application/json"
     }
     
+    import requests
     for order in pending_orders:
         try:
             response = requests.get(f"https://portal.packzy.com/api/v1/status_by_cid/{order.steadfast_consignment_id}", headers=headers, timeout=10)
@@ -593,172 +640,6 @@ def cron_update_steadfast_status():
             
     return f"Processed {len(pending_orders)} orders, Updated {updated_count}.", 200
 
-def prepare_chart_data(orders, period):
-    """Prepare chart data based on the time period."""
-    now = datetime.utcnow()
-    
-    if period == 'daily':
-        # Group by hour for daily view
-        data_points = 24
-        interval = timedelta(hours=1)
-        labels = [(now - timedelta(hours=i)).strftime('%H:00') for i in range(23, -1, -1)]
-    elif period == 'weekly':
-        # Group by day for weekly view
-        data_points = 7
-        interval = timedelta(days=1)
-        labels = [(now - timedelta(days=i)).strftime('%a') for i in range(6, -1, -1)]
-    elif period == 'fortnightly':
-        # Group by 2 days for fortnightly view
-        data_points = 7
-        interval = timedelta(days=2)
-        labels = []
-        for i in range(12, -1, -2):
-            date = now - timedelta(days=i)
-            labels.append(date.strftime('%d/%m'))
-    elif period == 'monthly':
-        # Group by 5 days for monthly view
-        data_points = 6
-        interval = timedelta(days=5)
-        labels = []
-        for i in range(25, -1, -5):
-            date = now - timedelta(days=i)
-            labels.append(date.strftime('%d/%m'))
-    elif period == 'two_month':
-        # Group by week for two month view
-        data_points = 8
-        interval = timedelta(weeks=1)
-        labels = []
-        for i in range(7, -1, -1):
-            date = now - timedelta(weeks=i)
-            labels.append(date.strftime('%d/%m'))
-    
-    # Count orders for each time period
-    counts = [0] * data_points
-    revenues = [0] * data_points
-    
-    for order in orders:
-        if period == 'daily':
-            # Calculate hours difference
-            diff_hours = int((now - order.timestamp).total_seconds() / 3600)
-            if 0 <= diff_hours < 24:
-                index = 23 - diff_hours
-                counts[index] += 1
-                revenues[index] += order.total_price
-        elif period == 'weekly':
-            # Calculate days difference
-            diff_days = (now.date() - order.timestamp.date()).days
-            if 0 <= diff_days < 7:
-                index = 6 - diff_days
-                counts[index] += 1
-                revenues[index] += order.total_price
-        elif period == 'fortnightly':
-            # Calculate 2-day periods difference
-            diff_days = (now.date() - order.timestamp.date()).days
-            period_index = diff_days // 2
-            if 0 <= period_index < 7:
-                index = 6 - period_index
-                counts[index] += 1
-                revenues[index] += order.total_price
-        elif period == 'monthly':
-            # Calculate 5-day periods difference
-            diff_days = (now.date() - order.timestamp.date()).days
-            period_index = diff_days // 5
-            if 0 <= period_index < 6:
-                index = 5 - period_index
-                counts[index] += 1
-                revenues[index] += order.total_price
-        elif period == 'two_month':
-            # Calculate week difference
-            diff_weeks = int((now.date() - order.timestamp.date()).days / 7)
-            if 0 <= diff_weeks < 8:
-                index = 7 - diff_weeks
-                counts[index] += 1
-                revenues[index] += order.total_price
-    
-    return {
-        'labels': labels,
-        'counts': counts,
-        'revenues': revenues
-    }
-
-
-def prepare_traffic_chart_data(traffic_data, period):
-    """Prepare traffic chart data based on the time period."""
-    now = datetime.utcnow()
-    
-    if period == 'daily':
-        # Group by hour for daily view
-        data_points = 24
-        labels = [(now - timedelta(hours=i)).strftime('%H:00') for i in range(23, -1, -1)]
-    elif period == 'weekly':
-        # Group by day for weekly view
-        data_points = 7
-        labels = [(now - timedelta(days=i)).strftime('%a') for i in range(6, -1, -1)]
-    elif period == 'fortnightly':
-        # Group by 2 days for fortnightly view
-        data_points = 7
-        labels = []
-        for i in range(12, -1, -2):
-            date = now - timedelta(days=i)
-            labels.append(date.strftime('%d/%m'))
-    elif period == 'monthly':
-        # Group by 5 days for monthly view
-        data_points = 6
-        labels = []
-        for i in range(25, -1, -5):
-            date = now - timedelta(days=i)
-            labels.append(date.strftime('%d/%m'))
-    elif period == 'two_month':
-        # Group by week for two month view
-        data_points = 8
-        labels = []
-        for i in range(7, -1, -1):
-            date = now - timedelta(weeks=i)
-            labels.append(date.strftime('%d/%m'))
-    
-    # Count traffic for each time period
-    counts = [0] * data_points
-    
-    for traffic in traffic_data:
-        if period == 'daily':
-            # Calculate hours difference
-            diff_hours = int((now - traffic.timestamp).total_seconds() / 3600)
-            if 0 <= diff_hours < 24:
-                index = 23 - diff_hours
-                counts[index] += 1
-        elif period == 'weekly':
-            # Calculate days difference
-            diff_days = (now.date() - traffic.timestamp.date()).days
-            if 0 <= diff_days < 7:
-                index = 6 - diff_days
-                counts[index] += 1
-        elif period == 'fortnightly':
-            # Calculate 2-day periods difference
-            diff_days = (now.date() - traffic.timestamp.date()).days
-            period_index = diff_days // 2
-            if 0 <= period_index < 7:
-                index = 6 - period_index
-                counts[index] += 1
-        elif period == 'monthly':
-            # Calculate 5-day periods difference
-            diff_days = (now.date() - traffic.timestamp.date()).days
-            period_index = diff_days // 5
-            if 0 <= period_index < 6:
-                index = 5 - period_index
-                counts[index] += 1
-        elif period == 'two_month':
-            # Calculate week difference
-            diff_weeks = int((now.date() - traffic.timestamp.date()).days / 7)
-            if 0 <= diff_weeks < 8:
-                index = 7 - diff_weeks
-                counts[index] += 1
-    
-    return {
-        'labels': labels,
-        'counts': counts
-    }
-
-
 @admin_bp.route('/admin/logout')
 @login_required
 def logout():
@@ -1,9 +1,60 @@
-from flask import Blueprint
+from flask import Blueprint, jsonify
+from flask_login import login_required
+from extensions import traffic_recorder, settings_cache, page_cache, sqlite_profile, rate_limiter, order_journal, catalog_cache, image_manifest
 
-# Create blueprint
+# Create blueprint; only /health is public, the detail endpoints expose
+# internal state and need an admin login
 health_bp = Blueprint('health', __name__)
 
 @health_bp.route('/health')
 def health_check():
     """Health check endpoint."""
-    return "OK", 200
\ No newline at end of file
+    return "OK", 200
+
+@health_bp.route('/health/traffic')
+@login_required
+def traffic_health():
+    """Traffic recorder counters for this worker process."""
+    return jsonify(traffic_recorder.stats()), 200
+
+@health_bp.route('/health/settings-cache')
+@login_required
+def settings_cache_health():
+    """Settings cache counters for this worker process."""
+    return jsonify(settings_cache.stats()), 200
+
+@health_bp.route('/health/page-cache')
+@login_required
+def page_cache_health():
+    """Page cache counters for this worker process."""
+    return jsonify(page_cache.stats()), 200
+
+@health_bp.route('/health/catalog')
+@login_required
+def catalog_health():
+    """Catalog snapshot counters for this worker process."""
+    return jsonify(catalog_cache.stats()), 200
+
+@health_bp.route('/health/images')
+@login_required
+def images_health():
+    """Image variant manifest counters for this worker process."""
+    return jsonify(image_manifest.stats()), 200
+
+@health_bp.route('/health/sqlite')
+@login_required
+def sqlite_health():
+    """SQLite pragmas and maintenance counters for this worker process."""
+    return jsonify(sqlite_profile.stats()), 200
+
+@health_bp.route('/health/rate-limit')
+@login_required
+def rate_limit_health():
+    """Rate limiter counters and limits for this worker process."""
+    return jsonify(rate_limiter.stats()), 200
+
+@health_bp.route('/health/order-journal')
+@login_required
+def order_journal_health():
+    """Order journal lag (pending records, oldest pending age) and drainer counters."""
+    return jsonify(order_journal.stats()), 200
@@ -1,10 +1,7 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort
-from models import Order, ProductSetting, Review, Traffic, Product
-from extensions import db
-import os
-
-# Valid themes
-VALID_THEMES = ['default', 'modern', 'multy', 'premium', 'vsl']
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, abort, jsonify
+from models import Order, Review, Product
+from extensions import traffic_recorder, settings_cache, page_cache, theme_registry, order_journal
+from pagination import keyset_paginate
 
 # Create blueprint
 main_bp = Blueprint('main', __name__)
@@ -13,95 +10,89 @@ main_bp = Blueprint('main', __name__)
 def index():
     """Main page route."""
     # Track traffic
-    track_traffic(request, '/')
-    
-    settings = ProductSetting.query.first()
-    if not settings:
-        # Initial default seeding if none exists
-        settings = ProductSetting(
-            product_name="প্রিমিয়াম হানি নাট",
-            product_description="খাটি মধু এবং বাছাইকৃত ড্রাই ফ্রুটসের এক অনন্য সংমিশ্রণ। যা আপনাকে দিবে দীর্ঘক্ষণ কাজ করার শক্তি এবং রোগ প্রতিরোধ ক্ষমতা।",
-            price=990,
-            old_price=1200,
-            image_path="honey_nut.png"
-        )
-        db.session.add(settings)
-        db.session.commit()
-    
-    reviews = Review.query.order_by(Review.timestamp.desc()).all()
-    theme = settings.landing_page_theme or 'default'
-    
-    # Validate theme
-    if theme not in VALID_THEMES:
-        theme = 'default'
+    traffic_recorder.record(request, '/')
     
-    # Ensure theme directory exists
-    theme_path = os.path.join(current_app.root_path, 'templates', 'themes', theme)
-    if not os.path.exists(theme_path):
-        # Fallback to default theme if specified theme doesn't exist
-        theme = 'default'
+    settings = settings_cache.get()
+    # Resolve the theme template (falls back to the default theme)
+    template_path = theme_registry.resolve(settings.landing_page_theme, 'index.html')
     
-    template_path = f'themes/{theme}/index.html'
-    template_full_path = os.path.join(current_app.root_path, 'templates', template_path)
+    def render():
+        # Only the first page of reviews is rendered inline; the theme's
+        # review loader fetches the rest from main.reviews
+        reviews_page = keyset_paginate(Review.query, Review, current_app.config.get('REVIEWS_PER_PAGE', 6))
+        products = Product.query.filter_by(is_active=True).order_by(Product.timestamp.desc()).all()
+        return render_template(template_path, settings=settings, reviews=reviews_page.items,
+                               reviews_page=reviews_page, products=products)
     
-    # Check if template exists
-    if not os.path.exists(template_full_path):
-        # If the specific template doesn't exist, fall back to default
-        theme = 'default'
-        template_path = f'themes/{theme}/index.html'
-    
-    products = Product.query.filter_by(is_active=True).order_by(Product.timestamp.desc()).all()
-    return render_template(template_path, settings=settings, reviews=reviews, products=products)
+    # Serve the rendered page from the full-page cache; it is re-rendered when
+    # settings, products or reviews change
+    return page_cache.serve((template_path, settings.id, settings.updated_at), render)
+
+@main_bp.route('/reviews')
+def reviews():
+    """
+    One page of reviews after the ``after`` cursor, newest first.
+
+    Returns the theme's review cards as an HTML fragment (``?theme=``), or
+    JSON with ``?format=json``. The next page's cursor is sent in the
+    X-Next-Cursor header (empty on the last page).
+    """
+    reviews_page = keyset_paginate(Review.query, Review, current_app.config.get('REVIEWS_PER_PAGE', 6),
+                                   after=request.args.get('after'))
+    next_cursor = reviews_page.next_cursor or ''
+
+    if request.args.get('format') == 'json':
+        response = jsonify({
+            'reviews': [{
+                'id': review.id,
+                'customer_name': review.customer_name,
+                'rating': review.rating,
+                'comment': review.comment,
+                'image_url': url_for('static', filename=review.image_path) if review.image_path else None,
+                'profile_pic_url': url_for('static', filename=review.profile_pic_path) if review.profile_pic_path else None,
+                'timestamp': review.timestamp.isoformat() if review.timestamp else None,
+            } for review in reviews_page.items],
+            'next_cursor': next_cursor or None,
+        })
+    else:
+        # Resolve the card partial (falls back to the default theme)
+        card_path = theme_registry.resolve(request.args.get('theme') or 'default', 'review_card.html')
+        response = current_app.response_class(
+            render_template('partials/review_cards.html', reviews=reviews_page.items, card_path=card_path),
+            mimetype='text/html'
+        )
+
+    response.headers['X-Next-Cursor'] = next_cursor
+    # Pages are addressed by cursor, so they change only when a review is
+    # edited or deleted; a short public max-age is safe behind a proxy
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
 
 @main_bp.route('/thank-you')
 def thank_you():
     """Thank you page after order placement."""
     # Track traffic
-    track_traffic(request, '/thank-you')
+    traffic_recorder.record(request, '/thank-you')
     
     order_id = request.args.get('order_id')
+    intake_id = request.args.get('intake')
     order = None
+    pending_order = None
     if order_id:
         try:
             order = Order.query.get(order_id)
         except:
             order = None
+    elif intake_id:
+        # Journaled order: usually drained already; otherwise it is still in
+        # the journal and the page shows it as processing (the background
+        # drainer inserts it, never this request)
+        order = Order.query.filter_by(intake_id=intake_id).first()
+        if order is None:
+            pending_order = order_journal.pending_record(intake_id)
     
-    settings = ProductSetting.query.first()
-    theme = settings.thank_you_page_theme or 'default'
-    
-    # Validate theme
-    if theme not in VALID_THEMES:
-        theme = 'default'
-    
-    # Ensure theme directory exists
-    theme_path = os.path.join(current_app.root_path, 'templates', 'themes', theme)
-    if not os.path.exists(theme_path):
-        # Fallback to default theme if specified theme doesn't exist
-        theme = 'default'
+    settings = settings_cache.get()
+    # Resolve the theme template (falls back to the default theme)
+    template_path = theme_registry.resolve(settings.thank_you_page_theme, 'thank_you.html')
     
-    template_path = f'themes/{theme}/thank_you.html'
-    template_full_path = os.path.join(current_app.root_path, 'templates', template_path)
-    
-    # Check if template exists
-    if not os.path.exists(template_full_path):
-        # If the specific template doesn't exist, fall back to default
-        theme = 'default'
-        template_path = f'themes/{theme}/thank_you.html'
-    
-    return render_template(template_path, order=order, settings=settings)
-
-def track_traffic(request, path):
-    """Track website traffic."""
-    try:
-        traffic = Traffic(
-            ip_address=request.environ.get('HTTP_X_REAL_IP', request.remote_addr),
-            user_agent=request.headers.get('User-Agent'),
-            referrer=request.referrer,
-            path=path
-        )
-        db.session.add(traffic)
-        db.session.commit()
-    except Exception as e:
-        # Log error but don't break the application
-        print(f"Error tracking traffic: {e}")
\ No newline at end of file
+    return render_template(template_path, order=order, pending_order=pending_order, settings=settings)
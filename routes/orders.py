@@ -1,8 +1,12 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import Order, ProductSetting, Traffic, Product, OrderItem
-from utils import convert_to_en_digits, is_valid_bd_mobile
-from datetime import datetime
-from extensions import db 
+from utils import normalize_bd_mobile, is_valid_bd_mobile
+from aggregates import apply_order_insert
+from catalog import parse_cart, price_cart
+from extensions import db, traffic_recorder, settings_cache, rate_limiter, order_journal, catalog_cache
+from idempotency import clean_token, order_for_token, record_token, purge_expired_tokens
+from order_journal import add_orders
+from rate_limit import client_ip
+from sqlalchemy.exc import IntegrityError
 
 # Create blueprint
 orders_bp = Blueprint('orders', __name__)
@@ -11,19 +15,14 @@ orders_bp = Blueprint('orders', __name__)
 def place_order():
     """Handle order placement."""
     # Track traffic
-    track_traffic(request, '/order')
+    traffic_recorder.record(request, '/order')
     
     full_name = request.form.get('full_name')
     address = request.form.get('address')
     mobile = request.form.get('mobile')
     
-    # Convert Bengali digits to English digits
-    if mobile:
-        mobile = convert_to_en_digits(mobile)
-        # Remove any spaces or extra characters just in case
-        mobile = "".join(mobile.split())
-        
-    quantity = int(request.form.get('quantity', 1))
+    # Convert Bengali digits to English digits and strip spaces/country code
+    mobile = normalize_bd_mobile(mobile)
 
     if not full_name or not address or not mobile:
         flash('সবগুলো ঘর পূরণ করুন।', 'error')
@@ -33,70 +32,95 @@ def place_order():
         flash('সঠিক বাংলাদেশি মোবাইল নম্বর দিন (১১ ডিজিট)।', 'error')
         return redirect(url_for('main.index', _anchor='checkout'))
 
-    # Anti-spam: Check for recent orders from same number (within 5 mins)
-    recent_order = Order.query.filter_by(mobile_number=mobile).order_by(Order.timestamp.desc()).first()
-    if recent_order:
-        time_diff = datetime.utcnow() - recent_order.timestamp
-        if time_diff.total_seconds() < 300: # 5 minutes
-            flash('আপনি সম্প্রতি একটি অর্ডার করেছেন। দয়া করে কিছুক্ষণ অপেক্ষা করুন।', 'error')
-            return redirect(url_for('main.index', _anchor='checkout'))
+    # Anti-spam: per-IP limit, checked before any database work. Typos are
+    # rejected above without spending it, and the token is given back below
+    # for any submission that does not become a new order, so double-submits
+    # from a shared (CGNAT) address don't lock everyone behind it out
+    ip = client_ip(request)
+    if not rate_limiter.hit('order_ip', ip):
+        flash('অনেকবার চেষ্টা করা হয়েছে। দয়া করে কিছুক্ষণ পরে আবার চেষ্টা করুন।', 'error')
+        return redirect(url_for('main.index', _anchor='checkout'))
 
-    settings = ProductSetting.query.first()
-    
-    product_id = request.form.get('product_id')
-    items = []
-    current_total = 0
-    
-    if product_id:
-        try:
-            product = Product.query.get(product_id)
-            if product:
-                item_total = product.price * quantity
-                items.append(OrderItem(
-                    product_name=product.name,
-                    price=product.price,
-                    quantity=quantity
-                ))
-                current_total += item_total
-        except:
-            # Fallback or error? For now fallback to settings if product not found
-            pass
-            
-    # If no product selected (or invalid), fallback to settings default product
-    if not items:
-        # Check if we should fallback to settings. But settings model doesn't store "items".
-        # We need to construct an item from settings defaults.
-        current_total = settings.price * quantity
-        items.append(OrderItem(
-            product_name=settings.product_name,
-            price=settings.price,
-            quantity=quantity
-        ))
+    # Double-submit: a replayed checkout token goes straight to its order
+    order_token = clean_token(request.form.get('order_token'))
+    existing_order_id = order_for_token(order_token)
+    if existing_order_id:
+        rate_limiter.refund('order_ip', ip)
+        return redirect(url_for('main.thank_you', order_id=str(existing_order_id)))
+
+    # Anti-spam: recent orders from the same number (one per 5 mins by default)
+    if not rate_limiter.hit('order_mobile', mobile):
+        rate_limiter.refund('order_ip', ip)
+        # A double-submit whose first request is still waiting in the order
+        # journal (the token is its intake id): show that order as processing
+        if order_journal.pending_record(order_token):
+            return redirect(url_for('main.thank_you', intake=order_token))
+        flash('আপনি সম্প্রতি একটি অর্ডার করেছেন। দয়া করে কিছুক্ষণ অপেক্ষা করুন।', 'error')
+        return redirect(url_for('main.index', _anchor='checkout'))
+
+    # From here the submission is accepted; if it fails after all, give both
+    # tokens back so the customer can simply try again
+    try:
+        order_id, intake_id = _accept_order(full_name, address, mobile, order_token)
+    except Exception:
+        _refund_order_limits(ip, mobile)
+        raise
+    if intake_id:
+        return redirect(url_for('main.thank_you', intake=intake_id))
+    return redirect(url_for('main.thank_you', order_id=str(order_id)))
 
-    new_order = Order(
-        full_name=full_name, 
-        shipping_address=address, 
-        mobile_number=mobile,
-        items=items, # SQLAlchemy will handle adding these OrderItem objects and setting foreign keys on commit
-        quantity=quantity, # Total quantity
-        total_price=current_total
-    )
-    db.session.add(new_order)
-    db.session.commit()
+
+def _refund_order_limits(ip, mobile):
+    rate_limiter.refund('order_ip', ip)
+    rate_limiter.refund('order_mobile', mobile)
+
+
+def _accept_order(full_name, address, mobile, order_token):
+    """
+    Price the cart and journal or insert the order.
+
+    Returns:
+        tuple: (order id, None) for a direct insert, or (None, intake id)
+        when the order went to the journal
+    """
+    # Price every cart line from the catalog snapshot (no per-item queries)
+    settings = settings_cache.get()
+    items, quantity, total_price = price_cart(parse_cart(request.form), settings, catalog_cache.get())
+
+    record = {
+        'full_name': full_name,
+        'address': address,
+        'mobile': mobile,
+        'items': items,
+        'quantity': quantity,  # Total quantity
+        'total_price': total_price,
+        'order_token': order_token
+    }
     
-    return redirect(url_for('main.thank_you', order_id=str(new_order.id)))
+    # Journal first: the order is on disk before any database write, and the
+    # drainer inserts it. A replayed token reuses its intake id, so the
+    # drainer skips the duplicate.
+    if order_journal.enabled:
+        intake_id = order_journal.append(dict(record, intake_id=order_token) if order_token else record)
+        if intake_id:
+            return None, intake_id
+        # Journal unavailable: fall through to a direct insert
 
-def track_traffic(request, path):
-    """Track website traffic."""
+    new_order, = add_orders([record])
+    apply_order_insert(new_order)
+    if order_token:
+        record_token(order_token, new_order.id)
     try:
-        traffic = Traffic(
-            ip_address=request.environ.get('HTTP_X_REAL_IP', request.remote_addr),
-            user_agent=request.headers.get('User-Agent'),
-            referrer=request.referrer,
-            path=path
-        )
-        db.session.add(traffic)
         db.session.commit()
-    except Exception as e:
-        # Log error but don't break the application
-        print(f"Error tracking traffic: {e}")
\ No newline at end of file
+    except IntegrityError:
+        # The same token was committed by a concurrent submission, which
+        # spent the limits for this order
+        db.session.rollback()
+        existing_order_id = order_for_token(order_token)
+        if not existing_order_id:
+            raise
+        _refund_order_limits(client_ip(request), mobile)
+        return existing_order_id, None
+    purge_expired_tokens()
+    
+    return new_order.id, None
@@ -0,0 +1,51 @@
+"""
+Create responsive variants for images uploaded before the image pipeline.
+
+New uploads get their variants when they are saved (see images.py); run this
+once after deploying it, or after changing IMAGE_VARIANT_WIDTHS/FORMATS:
+
+    python -m scripts.backfill_image_variants           # images without variants
+    python -m scripts.backfill_image_variants --force   # re-create all variants
+
+Each image is committed on its own, so an interrupted run can be re-run and
+continues where it stopped.
+"""
+import argparse
+import os
+import time
+from app import create_app
+from extensions import db, page_cache
+from images import generate_variants, referenced_images
+from models import ImageVariant
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='Re-create variants that already exist')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        done = {path for path, in db.session.query(ImageVariant.source_path).distinct()}
+        pending = sorted(path for path in referenced_images() if args.force or path not in done)
+        if not pending:
+            print("Every referenced image has variants.")
+            return
+
+        created = 0
+        for path in pending:
+            if not os.path.exists(os.path.join(app.static_folder, path)):
+                print(f"Skipping {path}: file not found")
+                continue
+            started = time.perf_counter()
+            count = generate_variants(path)
+            db.session.commit()
+            if count:
+                created += count
+                print(f"{path}: {count} variants in {time.perf_counter() - started:.1f} s")
+        page_cache.invalidate()
+        print(f"Created {created} variants for {len(pending)} images.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: per-row chart loop vs. the vectorised bucketing engine.
+
+Times bucketing N order timestamps (with total_price weights) into all five
+dashboard chart periods, using the per-row loop the dashboard used before
+``bucketing.py`` and the NumPy searchsorted/bincount engine:
+
+    python -m scripts.bench_bucketing            # 100k and 1M rows
+    python -m scripts.bench_bucketing 250000
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bucketing
+from charts import CHART_PERIODS
+
+
+def legacy_chart_data(rows, period, now):
+    """The per-row loop formerly in routes/admin.py (prepare_chart_data)."""
+    sizes = {'daily': 24, 'weekly': 7, 'fortnightly': 7, 'monthly': 6, 'two_month': 8}
+    counts = [0] * sizes[period]
+    revenues = [0] * sizes[period]
+    for timestamp, total_price in rows:
+        if period == 'daily':
+            diff_hours = int((now - timestamp).total_seconds() / 3600)
+            if 0 <= diff_hours < 24:
+                counts[23 - diff_hours] += 1
+                revenues[23 - diff_hours] += total_price
+        elif period == 'weekly':
+            diff_days = (now.date() - timestamp.date()).days
+            if 0 <= diff_days < 7:
+                counts[6 - diff_days] += 1
+                revenues[6 - diff_days] += total_price
+        elif period == 'fortnightly':
+            period_index = (now.date() - timestamp.date()).days // 2
+            if 0 <= period_index < 7:
+                counts[6 - period_index] += 1
+                revenues[6 - period_index] += total_price
+        elif period == 'monthly':
+            period_index = (now.date() - timestamp.date()).days // 5
+            if 0 <= period_index < 6:
+                counts[5 - period_index] += 1
+                revenues[5 - period_index] += total_price
+        elif period == 'two_month':
+            diff_weeks = int((now.date() - timestamp.date()).days / 7)
+            if 0 <= diff_weeks < 8:
+                counts[7 - diff_weeks] += 1
+                revenues[7 - diff_weeks] += total_price
+    return counts, revenues
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench(n, now):
+    rng = random.Random(n)
+    timestamps = [now - timedelta(seconds=rng.randrange(60 * 86400)) for _ in range(n)]
+    prices = [rng.choice((990, 1880, 2770)) for _ in range(n)]
+    rows = list(zip(timestamps, prices))
+
+    legacy = timed(lambda: [legacy_chart_data(rows, period, now) for period in CHART_PERIODS])
+    def vectorised():
+        ts, weights = bucketing.as_timestamps(timestamps), bucketing.as_weights(prices)
+        return [bucketing.series(ts, spec, now, weights) for spec in CHART_PERIODS.values()]
+
+    vector = timed(vectorised)
+
+    line = f"{n:>9,} rows | legacy loop {legacy * 1000:9.1f} ms | bucketing {vector * 1000:8.1f} ms | {legacy / vector:5.1f}x"
+    if bucketing.numpy() is not None:
+        # Columnar input (e.g. a timestamp,total_price fetch) skips datetime conversion
+        ts64 = bucketing.as_timestamps(timestamps)
+        weights = bucketing.as_weights(prices)
+        columnar = timed(lambda: [bucketing.series(ts64, spec, now, weights) for spec in CHART_PERIODS.values()])
+        line += f" | columnar {columnar * 1000:7.1f} ms | {legacy / columnar:6.1f}x"
+    print(line)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    now = datetime(2026, 1, 15, 12, 30)
+    print(f"NumPy: {'yes' if bucketing.numpy() is not None else 'no (bisect fallback)'}; 5 chart periods per run")
+    for n in sizes:
+        bench(n, now)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: time-to-first-byte for / on a freshly spawned worker.
+
+Each run starts a new Python process (as Passenger does when it spawns a
+worker), builds the app and serves GET / once, timing process start to the
+end of the first response. Runs are repeated with an empty bytecode cache
+(every template compiled from source) and with a warm one:
+
+    python -m scripts.bench_cold_start            # 5 runs each
+    python -m scripts.bench_cold_start 10
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+WORKER = r"""
+import json, time
+started = time.perf_counter()
+from app import create_app
+app = create_app('testing')
+ready = time.perf_counter()
+response = app.test_client().get('/')
+response.get_data()
+done = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({'startup': ready - started, 'first_request': done - ready, 'total': done - started}))
+"""
+
+
+def spawn(cache_dir):
+    env = dict(os.environ, JINJA_BYTECODE_CACHE_DIR=cache_dir)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = f"from config import TestingConfig; TestingConfig.JINJA_BYTECODE_CACHE_DIR = {cache_dir!r}\n" + WORKER
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=root, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(label, runs):
+    print(f"{label:<22} " + "  ".join(
+        f"{key} {statistics.median(run[key] for run in runs) * 1000:7.1f} ms"
+        for key in ('startup', 'first_request', 'total')
+    ))
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    spawn('')  # warm the OS file cache and __pycache__ first
+
+    # Interleave the three setups so machine load drifts affect them equally
+    no_cache, cold, warm = [], [], []
+    with tempfile.TemporaryDirectory() as warm_dir:
+        spawn(warm_dir)
+        for _ in range(repeat):
+            no_cache.append(spawn(''))
+            with tempfile.TemporaryDirectory() as cold_dir:
+                cold.append(spawn(cold_dir))
+            warm.append(spawn(warm_dir))
+
+    print(f"Median of {repeat} fresh worker processes (GET /):")
+    report("no bytecode cache", no_cache)
+    report("empty bytecode cache", cold)
+    report("warm bytecode cache", warm)
+
+
+if __name__ == "__main__":
+    main()
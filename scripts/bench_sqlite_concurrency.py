@@ -0,0 +1,135 @@
+"""
+Benchmark: concurrent order writers vs. dashboard readers on one SQLite file.
+
+Starts N writer processes placing orders through POST /order and M reader
+processes loading /admin, all against the same fresh database file (as
+Passenger workers do), for a fixed duration. Run once with the SQLite
+profile off (rollback journal, the old default) and once with it on (WAL and
+pragmas), and reports successful requests per second, failed requests
+("database is locked" surfaces as a 500), orders that were turned away
+rather than written, and latency percentiles:
+
+    python -m scripts.bench_sqlite_concurrency                 # 4 writers, 4 readers, 10 s
+    python -m scripts.bench_sqlite_concurrency 8 4 20
+
+The order journal is off for those runs, so every order is a SQLite write
+in the request. A third run turns it on (WAL as well): requests only
+append to the journal, the workers' drainer threads insert in the
+background, and a final drain is timed. It reports the orders in the
+database afterwards and the end-to-end insert rate including that drain.
+"""
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+WORKER = r"""
+import json, sys, time
+role, duration, index = sys.argv[1], float(sys.argv[2]), int(sys.argv[3])
+from app import create_app
+app = create_app()
+app.config['WTF_CSRF_ENABLED'] = False
+client = app.test_client()
+if role == 'reader':
+    client.post('/admin/login', data={'username': 'admin', 'password': 'password123'})
+latencies, errors, rejected, n = [], 0, 0, 0
+deadline = time.monotonic() + duration
+while time.monotonic() < deadline:
+    started = time.perf_counter()
+    try:
+        if role == 'writer':
+            n += 1
+            response = client.post('/order', data={
+                'full_name': 'Bench', 'address': 'Dhaka', 'quantity': '1',
+                'mobile': f"01{3 + index % 7}{index:02d}{n:06d}",
+            })
+        else:
+            response = client.get('/admin')
+        failed = response.status_code >= 500
+        # Orders turned away (validation, rate limits) are not writes
+        rejected += role == 'writer' and not failed and '/thank-you' not in response.headers.get('Location', '')
+    except Exception:
+        failed = True
+    latencies.append(time.perf_counter() - started)
+    errors += failed
+print(json.dumps({'role': role, 'latencies': latencies, 'errors': errors, 'rejected': rejected}))
+"""
+
+
+def run(writers, readers, duration, profile, journal=False):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            FLASK_CONFIG='production',
+            SECRET_KEY='bench',
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            JINJA_BYTECODE_CACHE_DIR=os.path.join(tmp, 'jinja_cache'),
+            SQLITE_PROFILE_ENABLED='true' if profile else 'false',
+            # Every simulated order comes from one client address; keep the
+            # limiter (and its shared instance/rate_limit.db) out of the run
+            RATE_LIMIT_ENABLED='false',
+            RATE_LIMIT_DB=os.path.join(tmp, 'rate_limit.db'),
+            # Off unless measuring the journal, so writers exercise the
+            # SQLite write path
+            ORDER_JOURNAL_ENABLED='true' if journal else 'false',
+            ORDER_JOURNAL_PATH=os.path.join(tmp, 'orders.journal'),
+        )
+        # Create and seed the database before the workers start
+        subprocess.run([sys.executable, '-m', 'scripts.bootstrap_db'], cwd=root, env=env, check=True,
+                       capture_output=True)
+        roles = ['writer'] * writers + ['reader'] * readers
+        procs = [
+            subprocess.Popen([sys.executable, '-c', WORKER, role, str(duration), str(i)],
+                             cwd=root, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            for i, role in enumerate(roles)
+        ]
+        results = [json.loads(proc.communicate()[0].strip().splitlines()[-1]) for proc in procs]
+        drain_seconds = 0.0
+        if journal:
+            # Insert whatever the drainer threads had not reached yet
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-m', 'scripts.drain_order_journal'], cwd=root, env=env,
+                           check=True, capture_output=True)
+            drain_seconds = time.perf_counter() - started
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.db'))
+        try:
+            orders = conn.execute('SELECT count(*) FROM "order"').fetchone()[0]
+        finally:
+            conn.close()
+    return results, orders, drain_seconds
+
+
+def summarize(label, run_result, duration):
+    results, orders, drain_seconds = run_result
+    for role in ('writer', 'reader'):
+        latencies = sorted(l for r in results if r['role'] == role for l in r['latencies'])
+        errors = sum(r['errors'] for r in results if r['role'] == role)
+        rejected = sum(r.get('rejected', 0) for r in results if r['role'] == role)
+        if not latencies:
+            continue
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{label:<10} {role + 's':<8} {(len(latencies) - errors - rejected) / duration:7.1f} ok/s  "
+              f"errors {errors:4d}  rejected {rejected:4d}  "
+              f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms")
+    elapsed = duration + drain_seconds
+    print(f"{label:<10} {orders} orders in the database ({orders / elapsed:.1f} orders/s"
+          f"{f', including a final drain of {drain_seconds:.1f} s' if drain_seconds else ''})")
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+    print(f"{writers} writer and {readers} reader processes, {duration:.0f} s each")
+    summarize('rollback', run(writers, readers, duration, profile=False), duration)
+    summarize('WAL', run(writers, readers, duration, profile=True), duration)
+    summarize('journal', run(writers, readers, duration, profile=True, journal=True), duration)
+
+
+if __name__ == "__main__":
+    main()
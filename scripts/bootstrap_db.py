@@ -0,0 +1,24 @@
+"""
+Create the database schema and default rows at deploy time.
+
+Run once after uploading a release that changes the models, then restart the
+app; with BOOTSTRAP_ON_STARTUP=never workers skip the check entirely:
+
+    python -m scripts.bootstrap_db
+"""
+from app import create_app
+from bootstrap import BOOTSTRAP_VERSION, bootstrap_database, bootstrapped_version
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        previous = bootstrapped_version()
+        applied = bootstrap_database()
+        for version, name in applied:
+            print(f"Applied migration {version}: {name}")
+        print(f"Database bootstrapped (version {previous} -> {BOOTSTRAP_VERSION}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Check that the hot order queries use the indexes added by migrations.
+
+Builds the queries issued by routes/admin.py, routes/orders.py and their
+helpers against an in-memory database holding a few thousand orders, runs
+EXPLAIN QUERY PLAN on each and fails if the expected index is not used:
+
+    python -m scripts.check_query_plans
+"""
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app import create_app
+from extensions import db
+from models import Order, OrderItem, Product, Traffic
+
+
+def seed(count=5000):
+    now = datetime.utcnow()
+    statuses = ['Pending', 'Confirmed', 'Completed', 'Cancelled']
+    db.session.execute(db.insert(Order), [{
+        'full_name': f"Customer {i}",
+        'shipping_address': "Dhaka",
+        'mobile_number': f"0171{i % 1500:07d}",
+        'total_price': 990,
+        'status': statuses[i % 4],
+        'timestamp': now - timedelta(minutes=i * 17),
+        'steadfast_consignment_id': str(i) if i % 10 == 0 else None,
+        'steadfast_status': 'delivered' if i % 20 == 0 else None,
+    } for i in range(count)])
+    db.session.execute(db.insert(OrderItem), [
+        {'order_id': i + 1, 'product_name': "Honey Nut", 'price': 990, 'quantity': 1} for i in range(count)
+    ])
+    db.session.execute(db.insert(Product), [
+        {'name': f"Product {i}", 'price': 990, 'is_active': i % 3 != 0, 'timestamp': now - timedelta(days=i)}
+        for i in range(50)
+    ])
+    db.session.execute(db.insert(Traffic), [
+        {'ip_address': f"10.0.{i % 250}.{i % 200}", 'path': '/', 'timestamp': now - timedelta(minutes=i)}
+        for i in range(count)
+    ])
+    db.session.commit()
+    for engine in db.engines.values():
+        with engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+
+
+def hot_queries():
+    """(description, query, expected index) for each hot query."""
+    now = datetime.utcnow()
+    since = now - timedelta(days=60)
+    hour = db.func.strftime('%Y-%m-%d %H:00:00', Order.timestamp, '+6 hours')
+    return [
+        ("dashboard status filter, newest first",
+         Order.query.filter(Order.status == 'Pending').order_by(Order.timestamp.desc(), Order.id.desc()).limit(21),
+         'ix_order_status_timestamp'),
+        ("customer's orders (refresh_customers)",
+         db.session.query(Order.mobile_number, Order.total_price, Order.timestamp)
+         .filter(Order.mobile_number.in_(['01710000001', '01710000002'])).order_by(Order.timestamp),
+         'ix_order_mobile_timestamp'),
+        ("hourly chart totals",
+         db.session.query(hour, db.func.count(Order.id), db.func.sum(Order.total_price))
+         .filter(Order.timestamp >= since).group_by(hour),
+         'ix_order_timestamp_total'),
+        ("SteadFast cron open consignments",
+         Order.query.filter(
+             Order.steadfast_consignment_id != None,
+             ~Order.steadfast_status.in_(['delivered', 'cancelled', 'Delivered', 'Cancelled'])
+         ),
+         'ix_order_steadfast_open'),
+        ("items of a page of orders",
+         OrderItem.query.filter(OrderItem.order_id.in_([1, 2, 3])),
+         'ix_order_item_order_id'),
+        ("active products on the landing page",
+         Product.query.filter_by(is_active=True).order_by(Product.timestamp.desc()),
+         'ix_product_active_timestamp'),
+        ("exact unique visitors",
+         db.session.query(db.func.count(db.distinct(Traffic.ip_address))).filter(Traffic.timestamp >= since),
+         'ix_traffic_timestamp_ip'),
+    ]
+
+
+def query_plan(query):
+    # Traffic queries run against the 'traffic' bind
+    engine = db.session.get_bind(mapper=query.column_descriptions[0]['entity'])
+    compiled = query.statement.compile(dialect=engine.dialect, compile_kwargs={'render_postcompile': True})
+    params = tuple(
+        value.isoformat(' ') if isinstance(value, datetime) else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def main():
+    app = create_app('testing')
+    failures = 0
+    with app.app_context():
+        seed()
+        for description, query, index in hot_queries():
+            plan = query_plan(query)
+            ok = any(index in step for step in plan)
+            failures += not ok
+            print(f"{'✓' if ok else '✗'} {description}: expected {index}")
+            for step in plan:
+                print(f"      {step}")
+    if failures:
+        print(f"✗ {failures} queries do not use their index")
+        return 1
+    print("✓ All hot queries use their indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
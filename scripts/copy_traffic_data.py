@@ -0,0 +1,84 @@
+"""
+Copy traffic rows from the main database into TRAFFIC_DATABASE_URL.
+
+Run once after pointing TRAFFIC_DATABASE_URL at a separate database (the
+app creates its tables on the next start, or run scripts/bootstrap_db.py):
+
+    python -m scripts.copy_traffic_data                 # copy, then rebuild rollups
+    python -m scripts.copy_traffic_data --drop-source   # ... and drop the old tables
+
+Only rows older than the oldest row already in the traffic database are
+copied, so hits recorded since the switch are kept and the copy is safe to
+re-run. The copy is written in one transaction; the rollups and unique
+visitor sketches are then rebuilt from the raw rows.
+"""
+import argparse
+from sqlalchemy import inspect, select, text
+from app import create_app
+from extensions import db
+from models import Traffic
+from traffic import rebuild_rollups
+
+LEGACY_TABLES = ('traffic_sketch', 'traffic_rollup', 'traffic')
+COLUMNS = ('ip_address', 'user_agent', 'referrer', 'path', 'timestamp')
+
+
+def copy_traffic(source, target, batch_size=5000):
+    """
+    Copy raw traffic rows older than the target's oldest row.
+
+    Returns:
+        int: Number of rows copied
+    """
+    table = Traffic.__table__
+    columns = [table.c[name] for name in COLUMNS]
+    with target.connect() as conn:
+        oldest = conn.execute(select(db.func.min(table.c.timestamp))).scalar()
+
+    query = select(*columns).order_by(table.c.id)
+    if oldest is not None:
+        query = query.where(table.c.timestamp < oldest)
+
+    copied = 0
+    with source.connect() as source_conn, target.begin() as target_conn:
+        result = source_conn.execution_options(yield_per=batch_size).execute(query)
+        for rows in result.partitions():
+            target_conn.execute(table.insert(), [dict(row._mapping) for row in rows])
+            copied += len(rows)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--drop-source', action='store_true',
+                        help='Drop the traffic tables from the main database after copying')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per insert (default: 5000)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        source, target = db.engines[None], db.engines['traffic']
+        if source.url == target.url:
+            print("Error: TRAFFIC_DATABASE_URL is not set, traffic already lives in the main database.")
+            return
+
+        if not inspect(source).has_table(Traffic.__tablename__):
+            print("No traffic table in the main database, nothing to copy.")
+            return
+
+        db.create_all(bind_key='traffic')
+        copied = copy_traffic(source, target, args.batch_size)
+        print(f"Copied {copied} traffic rows.")
+        if copied:
+            total = rebuild_rollups()
+            print(f"Rolled up {total} traffic rows.")
+
+        if args.drop_source:
+            with source.begin() as conn:
+                for name in LEGACY_TABLES:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            print("Dropped the traffic tables from the main database.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Drain the order intake journal into the database, or show its lag.
+
+Workers drain the journal continuously; run this after an outage, or before
+maintenance, to make sure every journaled order has been inserted:
+
+    python -m scripts.drain_order_journal            # insert pending orders
+    python -m scripts.drain_order_journal --status   # pending records and lag only
+"""
+import argparse
+from app import create_app
+from extensions import order_journal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--status', action='store_true', help='Show pending records and lag, then exit')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if not order_journal.enabled:
+            print("The order journal is disabled (ORDER_JOURNAL_ENABLED).")
+            return
+        if not args.status:
+            inserted = order_journal.drain()
+            print(f"Inserted {inserted} journaled orders.")
+        stats = order_journal.stats()
+        print(f"Pending: {stats['pending_records']} records ({stats['pending_bytes']} bytes), "
+              f"lag {stats['lag_seconds']:.1f} s; corrupt {stats['corrupt']}, rejected {stats['rejected']}.")
+        if stats['last_error']:
+            print(f"Last error: {stats['last_error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Apply or inspect versioned schema migrations (see migrations/).
+
+    python -m scripts.migrate             # apply all pending migrations
+    python -m scripts.migrate --status    # list applied/pending migrations
+    python -m scripts.migrate --target 3  # apply up to version 3
+
+The app is built with BOOTSTRAP_ON_STARTUP='never', as the startup
+bootstrap would otherwise apply every pending migration before the command
+runs. A database that was never bootstrapped needs
+python -m scripts.bootstrap_db instead.
+"""
+import argparse
+import sys
+from app import create_app
+from bootstrap import bootstrapped_version
+from extensions import db
+from migrate import applied_versions, discover_migrations, migration_bind, upgrade
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations.")
+    parser.add_argument('--status', action='store_true', help="show migration status and exit")
+    parser.add_argument('--target', type=int, help="highest version to apply")
+    args = parser.parse_args(argv)
+
+    app = create_app(overrides={'BOOTSTRAP_ON_STARTUP': 'never'})
+    with app.app_context():
+        if args.status:
+            applied = {}
+            for version, name, module in discover_migrations('all'):
+                bind_key = migration_bind(module)
+                if bind_key not in applied:
+                    applied[bind_key] = applied_versions(db.engines[bind_key])
+                state = 'applied' if version in applied[bind_key] else 'pending'
+                print(f"{version:>4}  {name:<40} {bind_key or 'main':<8} {state}")
+            return 0
+
+        if not bootstrapped_version():
+            print("Error: the database has not been bootstrapped; run python -m scripts.bootstrap_db")
+            return 1
+        applied = upgrade(target=args.target)
+        for version, name in applied:
+            print(f"Applied migration {version}: {name}")
+        print(f"Schema at version {max(version for version, name in applied)}." if applied else "No pending migrations.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,210 @@
+"""
+Re-encode uploaded PNG/JPEG images as size-capped WebP and use them.
+
+    python -m scripts.optimize_images                      # new or changed uploads
+    python -m scripts.optimize_images --dry-run            # only report what would change
+    python -m scripts.optimize_images --workers 2 --force  # re-encode everything
+    python -m scripts.optimize_images --profile product=1000:80
+
+Each upload gets the profile (max width and WebP quality, IMAGE_PROFILES)
+of its kind, taken from the filename prefix the admin routes give it: logo_,
+prod_, rev_ or pfp_. Images are encoded in a process pool to
+``<name>_opt.webp`` next to the original, which is kept.
+
+A manifest (instance/optimize_images.json) records each source's SHA-256
+and the profile it was encoded with, so later runs skip unchanged files.
+Database references to optimised sources (shop settings, products and
+reviews), and their recorded responsive variants, are then moved to the
+WebP files in one transaction. Outputs that would be larger than their
+source are discarded and the original stays in use.
+"""
+import argparse
+import hashlib
+import json
 import os
-from PIL import Image
-from utils import save_image_as_webp
-import io
-
-folder = 'static/uploads'
-for filename in os.listdir(folder):
-    if filename.endswith(('.png', '.jpg', '.jpeg')) and 'webp' not in filename:
-        path = os.path.join(folder, filename)
-        size_mb = os.path.getsize(path) / (1024 * 1024)
-        if size_mb > 0.05: # More than 50KB
-            print(f"Optimizing {filename} ({size_mb*1024:.2f} KB)...")
-            with open(path, 'rb') as f:
-                img = Image.open(f)
-                if img.mode in ('RGBA', 'P'):
-                    # Keep transparency for logos
-                    img = img.convert('RGBA')
-                
-                # Resize to max 400px for logos/small images
-                max_width = 800 if 'prod' in filename else 400
-                if img.width > max_width:
-                    ratio = max_width / float(img.width)
-                    new_height = int(float(img.height) * float(ratio))
-                    img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-                
-                new_filename = filename.rsplit('.', 1)[0] + "_opt.webp"
-                new_path = os.path.join(folder, new_filename)
-                img.save(new_path, 'WEBP', quality=75) # Lower quality for speed
-                print(f"Created {new_filename}")
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from app import create_app
+from extensions import db, page_cache, settings_cache
+from images import optimize_image, parse_profile, profile_for, replace_image_references
+
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+OPTIMIZED_SUFFIX = '_opt.webp'
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    """Return the manifest {source: entry}, or {} if missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Error reading manifest {path}, starting over: {e}")
+        return {}
+
+
+def save_manifest(path, manifest):
+    """Write the manifest atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def encode(job):
+    """Pool task: optimise one image; returns (job, result or error)."""
+    source, target, max_width, quality = job['source_file'], job['target_file'], job['max_width'], job['quality']
+    started = time.perf_counter()
+    try:
+        width, height = optimize_image(source, target, max_width, quality)
+    except Exception as e:
+        return job, {'error': str(e)}
+    return job, {
+        'width': width,
+        'height': height,
+        'bytes_out': os.path.getsize(target),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def find_jobs(upload_folder, manifest, profiles, min_size, force):
+    """
+    Return (jobs, unchanged) for the uploads that need encoding.
+
+    A source is unchanged when the manifest has the same digest and profile
+    for it and its output still exists (or it was kept as the original).
+    """
+    jobs, unchanged = [], 0
+    for filename in sorted(os.listdir(upload_folder)):
+        if not filename.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        source_file = os.path.join(upload_folder, filename)
+        size = os.path.getsize(source_file)
+        if size < min_size:
+            continue
+
+        profile = profile_for(filename)
+        max_width, quality = profiles[profile]
+        settings = f"{max_width}:{quality}"
+        key = f"uploads/{filename}"
+        target_name = os.path.splitext(filename)[0] + OPTIMIZED_SUFFIX
+        target_file = os.path.join(upload_folder, target_name)
+        digest = file_digest(source_file)
+
+        entry = manifest.get(key)
+        if (not force and entry and entry['sha256'] == digest and entry['profile'] == settings
+                and (entry['output'] is None or os.path.exists(target_file))):
+            unchanged += 1
+            continue
+        jobs.append({
+            'key': key, 'source_file': source_file, 'target_file': target_file,
+            'output': f"uploads/{target_name}", 'profile_name': profile, 'profile': settings,
+            'max_width': max_width, 'quality': quality, 'sha256': digest, 'bytes_in': size,
+        })
+    return jobs, unchanged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Encoder processes (default: one per CPU)')
+    parser.add_argument('--profile', action='append', default=[], metavar='NAME=WIDTH:QUALITY',
+                        help='Override a profile for this run, e.g. product=1000:80 (repeatable)')
+    parser.add_argument('--min-size', type=int, default=50, help='Skip sources under this many KB (default: 50)')
+    parser.add_argument('--force', action='store_true', help='Re-encode sources the manifest says are unchanged')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would be encoded, change nothing')
+    args = parser.parse_args()
+
+    app = create_app()
+    profiles = {name: parse_profile(value) for name, value in app.config['IMAGE_PROFILES'].items()}
+    for override in args.profile:
+        name, _, value = override.partition('=')
+        if name not in profiles:
+            parser.error(f"unknown profile {name!r} (choose from {', '.join(sorted(profiles))})")
+        profiles[name] = parse_profile(value)
+
+    upload_folder = os.path.join(app.static_folder, 'uploads')
+    manifest_path = os.path.join(app.instance_path, 'optimize_images.json')
+    manifest = load_manifest(manifest_path)
+    jobs, unchanged = find_jobs(upload_folder, manifest, profiles, args.min_size * 1024, args.force)
+
+    if args.dry_run:
+        for job in jobs:
+            print(f"Would encode {job['key']} ({job['bytes_in'] / 1024:.0f} KB) as {job['profile_name']} {job['profile']}")
+        print(f"{len(jobs)} to encode, {unchanged} unchanged.")
+        return
+
+    started = time.perf_counter()
+    results = []
+    if args.workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for future in as_completed([pool.submit(encode, job) for job in jobs]):
+                results.append(future.result())
+    else:
+        results = [encode(job) for job in jobs]
+    elapsed = time.perf_counter() - started
+
+    bytes_in = bytes_out = failed = kept = 0
+    for job, result in sorted(results, key=lambda r: r[0]['key']):
+        if 'error' in result:
+            failed += 1
+            print(f"Error optimising {job['key']}: {result['error']}")
+            continue
+        output, size = job['output'], result['bytes_out']
+        if size >= job['bytes_in']:
+            # No gain: keep serving the original
+            os.remove(job['target_file'])
+            output, size = None, job['bytes_in']
+            kept += 1
+        bytes_in += job['bytes_in']
+        bytes_out += size
+        manifest[job['key']] = {
+            'sha256': job['sha256'], 'profile': job['profile'], 'output': output,
+            'bytes_in': job['bytes_in'], 'bytes_out': size,
+        }
+        print(f"{job['key']} -> {output or 'kept original'}: {job['bytes_in'] / 1024:.0f} KB -> "
+              f"{size / 1024:.0f} KB ({result['width']}x{result['height']}, {result['seconds']:.2f} s)")
+    save_manifest(manifest_path, manifest)
+
+    # Point the database at every optimised file, including ones encoded by
+    # earlier runs whose sources are still referenced
+    mapping = {
+        key: entry['output'] for key, entry in manifest.items()
+        if entry.get('output') and os.path.exists(os.path.join(app.static_folder, entry['output']))
+    }
+    with app.app_context():
+        try:
+            updated = replace_image_references(mapping)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error updating image references, nothing was changed: {e}")
+            updated = None
+        settings_cache.invalidate()
+        page_cache.invalidate()
+
+    encoded = len(results) - failed
+    saved = bytes_in - bytes_out
+    print(f"Encoded {encoded} images ({kept} kept as original, {failed} failed), {unchanged} unchanged; "
+          f"{elapsed:.1f} s with {min(args.workers, len(jobs)) or 1} worker process(es).")
+    if encoded:
+        print(f"{bytes_in / 1024:.0f} KB -> {bytes_out / 1024:.0f} KB, saved {saved / 1024:.0f} KB "
+              f"({100 * saved / bytes_in:.0f}%); {encoded / elapsed:.1f} images/s, "
+              f"{bytes_in / (1024 * 1024) / elapsed:.2f} MB/s read.")
+    if updated is not None:
+        print(f"Updated {updated} database references.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Compile every template into the Jinja bytecode cache ahead of deployment.
+
+Run after uploading new templates (before touching tmp/restart.txt), so the
+first worker spawned afterwards loads bytecode instead of compiling:
+
+    python -m scripts.precompile_templates
+"""
+import sys
+from app import create_app
+from templating import precompile_templates
+
+
+def main():
+    app = create_app()
+    cache = app.jinja_env.bytecode_cache
+    if cache is None:
+        print("Jinja bytecode cache is disabled (JINJA_BYTECODE_CACHE_DIR='').")
+        return 1
+    compiled, failed, seconds = precompile_templates(app)
+    for name, error in failed:
+        print(f"Error compiling {name}: {error}")
+    print(f"Compiled {len(compiled)} templates into {cache.directory} in {seconds:.2f}s.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
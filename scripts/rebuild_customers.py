@@ -0,0 +1,26 @@
+"""
+Rebuild the per-customer aggregate table and the order status counters from
+existing orders.
+
+Existing orders are backfilled by migration v005 on upgrade; run this
+whenever the aggregates are suspected to be out of sync:
+
+    python -m scripts.rebuild_customers
+"""
+from app import create_app
+from extensions import db
+from aggregates import rebuild_customers, rebuild_status_counts
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        total = rebuild_customers()
+        print(f"Rebuilt aggregates for {total} customers.")
+        statuses = rebuild_status_counts()
+        db.session.commit()
+        print(f"Rebuilt status counters for {len(statuses)} statuses.")
+
+
+if __name__ == "__main__":
+    main()
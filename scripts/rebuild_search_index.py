@@ -0,0 +1,24 @@
+"""
+Rebuild the FTS5 order search index from the order table.
+
+The index is kept in sync by triggers; run this if it was ever dropped or
+suspected to be out of sync:
+
+    python -m scripts.rebuild_search_index
+"""
+from app import create_app
+from search import rebuild_order_search, current_tokenizer
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        total = rebuild_order_search()
+        if total is None:
+            print("Full-text search is not available on this database; LIKE search will be used.")
+        else:
+            print(f"Indexed {total} orders (tokenizer: {current_tokenizer()}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Rebuild the hourly traffic rollups from raw Traffic rows.
+
+History recorded before the rollups existed is rolled up by migration
+v004 on upgrade; run this whenever rollups are suspected to be out of sync:
+
+    python -m scripts.rebuild_traffic_rollups            # last 60 days
+    python -m scripts.rebuild_traffic_rollups --all      # entire history
+"""
+import argparse
+from datetime import datetime, timedelta
+from app import create_app
+from traffic import rebuild_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=60, help='Rebuild the last N days (default: 60)')
+    parser.add_argument('--all', action='store_true', help='Rebuild the entire traffic history')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        since = None if args.all else datetime.utcnow() - timedelta(days=args.days)
+        total = rebuild_rollups(since)
+        print(f"Rolled up {total} traffic rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Startup report: import and init time of a freshly spawned worker.
+
+Spawns new Python processes under ``python -X importtime`` against a
+throwaway SQLite database that has already been bootstrapped (as on a live
+site), and prints a Markdown report of the median import time, create_app()
+time, the slowest top-level packages and which heavy optional modules were
+loaded:
+
+    python -m scripts.startup_report
+    python -m scripts.startup_report 10 --label "After"
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+WORKER = r"""
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+ready = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': ready - imported,
+    'loaded': {name: name in sys.modules for name in ('PIL', 'requests', 'numpy', 'brotli')},
+}))
+"""
+
+HEAVY_MODULES = ('PIL', 'requests', 'numpy', 'brotli')
+
+
+def spawn(env):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', WORKER],
+        cwd=root, env=env, check=True, capture_output=True, text=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['packages'] = package_times(result.stderr)
+    return timings
+
+
+def current_commit():
+    """Short hash of the checked-out commit, or 'unknown' outside a git checkout."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return result.stdout.strip()
+
+
+def package_times(importtime_output):
+    """Sum ``-X importtime`` self times (microseconds) per top-level package."""
+    totals = defaultdict(int)
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _cumulative, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('runs', nargs='?', type=int, default=5)
+    parser.add_argument('--label', default='Startup')
+    parser.add_argument('--top', type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            FLASK_CONFIG='production',
+            SECRET_KEY='startup-report',
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            JINJA_BYTECODE_CACHE_DIR=os.path.join(tmp, 'jinja_cache'),
+            # Keep the workers' journal (drained at exit) and limiter state
+            # away from the real instance files
+            ORDER_JOURNAL_PATH=os.path.join(tmp, 'orders.journal'),
+            RATE_LIMIT_DB=os.path.join(tmp, 'rate_limit.db'),
+        )
+        spawn(env)  # first boot creates and seeds the database
+        runs = [spawn(env) for _ in range(args.runs)]
+
+    def median_ms(key):
+        return statistics.median(run[key] for run in runs) * 1000
+
+    packages = defaultdict(list)
+    for run in runs:
+        for name, micros in run['packages'].items():
+            packages[name].append(micros)
+    slowest = sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[:args.top]
+
+    print(f"### {args.label}\n")
+    print(f"Median of {args.runs} fresh worker processes, bootstrapped database, "
+          f"measured at commit {current_commit()}.\n")
+    print("| Phase | Time |")
+    print("|---|---|")
+    print(f"| Import `app` | {median_ms('import'):.0f} ms |")
+    print(f"| `create_app()` | {median_ms('create_app'):.0f} ms |")
+    print(f"| **Total** | **{median_ms('import') + median_ms('create_app'):.0f} ms** |\n")
+    print("| Top-level package | Import self time |")
+    print("|---|---|")
+    for name, micros in slowest:
+        print(f"| `{name}` | {statistics.median(micros) / 1000:.1f} ms |")
+    loaded = runs[-1]['loaded']
+    print("\nHeavy modules loaded at startup: " + ", ".join(
+        f"`{name}` {'yes' if loaded.get(name) else 'no'}" for name in HEAVY_MODULES
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import re
+from sqlalchemy import text
+from extensions import db
+from utils import convert_to_en_digits
+
+# FTS5 index over orders. The rowid is the order id; columns hold the order id,
+# name, mobile and address with Bengali digits converted to English ones.
+SEARCH_TABLE = 'order_search'
+
+# Trigram tokenizer matches arbitrary substrings (like ILIKE '%q%'); older
+# SQLite builds (< 3.34) fall back to unicode61 with prefix matching.
+TOKENIZERS = ('trigram', 'unicode61')
+
+_TRIGRAM_MIN_LENGTH = 3
+_COLUMNS = "rowid, order_id, full_name, mobile_number, shipping_address"
+
+
+def _en_digits_sql(expr):
+    """Wrap a SQL expression in nested replace() calls mapping Bengali digits to English."""
+    for bn, en in zip("০১২৩৪৫৬৭৮৯", "0123456789"):
+        expr = f"replace({expr}, '{bn}', '{en}')"
+    return expr
+
+
+def _row_values(alias):
+    return (
+        f"{alias}.id, CAST({alias}.id AS TEXT), {alias}.full_name, "
+        f"{_en_digits_sql(f'{alias}.mobile_number')}, {_en_digits_sql(f'{alias}.shipping_address')}"
+    )
+
+
+def is_supported(bind=None):
+    """FTS5 search is only used on SQLite."""
+    bind = bind or db.engine
+    return bind.dialect.name == 'sqlite'
+
+
+def init_order_search(bind=None):
+    """
+    Create the FTS5 table and the triggers that keep it in sync with "order".
+
+    Safe to call on every startup. Triggers (rather than ORM events) are used
+    so bulk UPDATE/DELETE statements from the admin bulk actions stay in sync.
+    The index is populated from existing orders the first time it is created.
+
+    Returns:
+        str: Tokenizer in use, or None when FTS5 is unavailable
+    """
+    bind = bind or db.engine
+    if not is_supported(bind):
+        return None
+
+    with bind.begin() as conn:
+        existing = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SEARCH_TABLE}
+        ).scalar()
+        if existing:
+            return _tokenizer_from_sql(existing)
+
+    tokenizer = None
+    for candidate in TOKENIZERS:
+        try:
+            with bind.begin() as conn:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                    f"order_id, full_name, mobile_number, shipping_address, tokenize='{candidate}')"
+                ))
+            tokenizer = candidate
+            break
+        except Exception as e:
+            print(f"FTS5 tokenizer {candidate} unavailable: {e}")
+    if tokenizer is None:
+        return None
+
+    with bind.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS order_search_ai AFTER INSERT ON "order" BEGIN
+                INSERT INTO {SEARCH_TABLE} ({_COLUMNS}) VALUES ({_row_values('new')});
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS order_search_ad AFTER DELETE ON "order" BEGIN
+                DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS order_search_au
+            AFTER UPDATE OF id, full_name, mobile_number, shipping_address ON "order" BEGIN
+                DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+                INSERT INTO {SEARCH_TABLE} ({_COLUMNS}) VALUES ({_row_values('new')});
+            END
+        """))
+        _populate(conn)
+    return tokenizer
+
+
+def rebuild_order_search(bind=None):
+    """
+    Rebuild the search index from the "order" table.
+
+    Returns:
+        int: Number of orders indexed, or None when FTS5 is unavailable
+    """
+    bind = bind or db.engine
+    if init_order_search(bind) is None:
+        return None
+    with bind.begin() as conn:
+        conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        _populate(conn)
+        conn.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"))
+        return conn.execute(text(f"SELECT count(*) FROM {SEARCH_TABLE}")).scalar()
+
+
+def _populate(conn):
+    conn.execute(text(
+        f'INSERT INTO {SEARCH_TABLE} ({_COLUMNS}) SELECT {_row_values("o")} FROM "order" AS o'
+    ))
+
+
+def _tokenizer_from_sql(sql):
+    for candidate in TOKENIZERS:
+        if candidate in sql:
+            return candidate
+    return 'unicode61'
+
+
+def current_tokenizer(bind=None):
+    """Return the tokenizer of the existing index, or None if there is no index."""
+    bind = bind or db.engine
+    if not is_supported(bind):
+        return None
+    with bind.connect() as conn:
+        sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SEARCH_TABLE}
+        ).scalar()
+    return _tokenizer_from_sql(sql) if sql else None
+
+
+def build_match_query(search_query, tokenizer):
+    """
+    Turn free text into an FTS5 MATCH expression (all terms must match).
+
+    Returns None when the query cannot be served by the index, e.g. terms
+    shorter than three characters with the trigram tokenizer.
+    """
+    terms = [t for t in re.split(r'\s+', convert_to_en_digits(search_query or '').strip()) if t]
+    if not terms:
+        return None
+    if tokenizer == 'trigram':
+        if any(len(t) < _TRIGRAM_MIN_LENGTH for t in terms):
+            return None
+        return ' AND '.join('"{}"'.format(t.replace('"', '""')) for t in terms)
+    return ' AND '.join('"{}"*'.format(t.replace('"', '""')) for t in terms)
+
+
+def search_order_ids(search_query, status=None, limit=100, offset=0):
+    """
+    Return order ids matching the search, best match first.
+
+    The status filter is applied inside the index query (joined on the
+    rowid), so a page of results is never emptied by filtering afterwards.
+
+    Args:
+        search_query (str): Free text to match
+        status (str): Only return orders with this status
+        limit (int): Maximum number of ids
+        offset (int): Number of ranked ids to skip (earlier pages)
+
+    Returns:
+        list: Ranked order ids, or None if the index cannot serve this query
+        (non-SQLite database, no FTS5, or too-short terms); callers then fall
+        back to a LIKE scan.
+    """
+    tokenizer = current_tokenizer()
+    if tokenizer is None:
+        return None
+    match = build_match_query(search_query, tokenizer)
+    if match is None:
+        return None
+    status_clause = "AND o.status = :status " if status else ""
+    rows = db.session.execute(
+        text(
+            f'SELECT s.rowid FROM {SEARCH_TABLE} AS s JOIN "order" AS o ON o.id = s.rowid '
+            f"WHERE s.{SEARCH_TABLE} MATCH :match {status_clause}"
+            f"ORDER BY s.rank LIMIT :limit OFFSET :offset"
+        ),
+        {'match': match, 'status': status, 'limit': limit, 'offset': offset}
+    )
+    return [row[0] for row in rows]
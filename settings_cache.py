@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import namedtuple
+
+
+class SettingsCache:
+    """
+    Per-worker cache of the ProductSetting singleton.
+
+    Holds an immutable snapshot (a namedtuple of the row's columns) so it can
+    be shared between requests and threads safely. The snapshot is revalidated
+    at most every SETTINGS_CACHE_TTL seconds by reading only ``updated_at``;
+    the full row is reloaded when that stamp changed. The worker that saves
+    the settings calls invalidate() so it sees the change immediately; other
+    workers see it within one TTL.
+
+    Usage:
+        settings_cache = SettingsCache()
+        settings_cache.init_app(app)
+
+        settings = settings_cache.get()
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30.0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._snapshot_type = None
+        self._hits = 0
+        self._misses = 0
+        self._revalidations = 0
+        self._invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = float(app.config.get('SETTINGS_CACHE_TTL', 30.0))
+        app.extensions['settings_cache'] = self
+        with self._lock:
+            self._snapshot = None
+
+    def get(self):
+        """
+        Return the current settings snapshot, creating the default row if
+        none exists yet. Must be called inside an app context.
+        """
+        now = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshot
+            fresh = snapshot is not None and now - self._checked_at < self.ttl
+            if fresh:
+                self._hits += 1
+                return snapshot
+
+        if snapshot is not None:
+            stamp = self._current_stamp()
+            with self._lock:
+                self._revalidations += 1
+                if stamp == (snapshot.id, snapshot.updated_at) and self._snapshot is snapshot:
+                    self._checked_at = now
+                    return snapshot
+
+        row = self._load_row()
+        snapshot = self.snapshot_of(row)
+        with self._lock:
+            self._misses += 1
+            self._snapshot = snapshot
+            self._checked_at = now
+        return snapshot
+
+    def invalidate(self):
+        """Drop the snapshot so the next get() reloads the row."""
+        with self._lock:
+            self._snapshot = None
+            self._invalidations += 1
+
+    def stats(self):
+        """Return counters for this worker process."""
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'revalidations': self._revalidations,
+                'invalidations': self._invalidations,
+                'cached': self._snapshot is not None,
+                'ttl': self.ttl,
+            }
+
+    def snapshot_of(self, row):
+        """Copy a ProductSetting row into an immutable snapshot."""
+        if self._snapshot_type is None:
+            columns = [column.key for column in row.__table__.columns]
+            self._snapshot_type = namedtuple('SettingsSnapshot', columns)
+        return self._snapshot_type(*(getattr(row, field) for field in self._snapshot_type._fields))
+
+    def _current_stamp(self):
+        from extensions import db
+        from models import ProductSetting
+
+        row = db.session.query(ProductSetting.id, ProductSetting.updated_at).order_by(ProductSetting.id).first()
+        return tuple(row) if row else None
+
+    def _load_row(self):
+        from extensions import db
+        from models import ProductSetting
+
+        row = ProductSetting.query.order_by(ProductSetting.id).first()
+        if row is None:
+            # Initial default seeding if none exists
+            row = ProductSetting()
+            db.session.add(row)
+            db.session.commit()
+        return row
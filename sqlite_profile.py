@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from sqlalchemy import event, text
+
+# Applied to every new SQLite connection, in order. journal_mode=WAL lets
+# readers run while a writer commits; synchronous=NORMAL is durable across
+# application crashes in WAL mode and only fsyncs at checkpoints.
+DEFAULT_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('busy_timeout', 5000),         # ms to wait for a lock before "database is locked"
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),         # 16 MB page cache per connection
+    ('mmap_size', 134217728),       # 128 MB memory-mapped reads
+    ('temp_store', 'MEMORY'),
+)
+
+# Pragmas that make no sense for an in-memory database
+_FILE_ONLY_PRAGMAS = {'journal_mode', 'mmap_size'}
+
+
+class SQLiteProfile:
+    """
+    Production tuning for SQLite engines.
+
+    Applies SQLITE_PRAGMAS to every connection through a SQLAlchemy
+    ``connect`` event, and runs a maintenance thread in each worker that
+    checkpoints the WAL every SQLITE_CHECKPOINT_INTERVAL seconds (PASSIVE, so
+    it never blocks readers or writers) and runs ``PRAGMA optimize`` every
+    SQLITE_OPTIMIZE_INTERVAL seconds. Engines for other databases are left
+    untouched.
+
+    Usage:
+        sqlite_profile = SQLiteProfile()
+        sqlite_profile.init_app(app)   # after db.init_app(app)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.pragmas = DEFAULT_PRAGMAS
+        self.checkpoint_interval = 300.0
+        self.optimize_interval = 3600.0
+        self._engines = []
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'connections': 0, 'checkpoints': 0, 'optimizes': 0, 'failed': 0, 'last_checkpoint': None}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from extensions import db
+
+        self.app = app
+        self.enabled = app.config.get('SQLITE_PROFILE_ENABLED', True)
+        self.pragmas = tuple(app.config.get('SQLITE_PRAGMAS') or DEFAULT_PRAGMAS)
+        self.checkpoint_interval = float(app.config.get('SQLITE_CHECKPOINT_INTERVAL', self.checkpoint_interval))
+        self.optimize_interval = float(app.config.get('SQLITE_OPTIMIZE_INTERVAL', self.optimize_interval))
+        app.extensions['sqlite_profile'] = self
+        self._engines = []
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+        for engine in engines:
+            in_memory = engine.url.database in (None, '', ':memory:')
+            pragmas = [(name, value) for name, value in self.pragmas
+                       if not (in_memory and name in _FILE_ONLY_PRAGMAS)]
+            event.listen(engine, 'connect', self._pragma_listener(pragmas))
+            if not in_memory:
+                self._engines.append(engine)
+
+        if self._engines and (self.checkpoint_interval > 0 or self.optimize_interval > 0):
+            app.before_request(self._ensure_worker)
+
+    def stats(self):
+        """Return maintenance counters for this worker process."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['pragmas'] = dict(self.pragmas)
+        return stats
+
+    def checkpoint(self, mode='PASSIVE'):
+        """
+        Checkpoint the WAL of every file-backed SQLite engine.
+
+        Returns:
+            list: (busy, wal_pages, checkpointed_pages) per engine
+        """
+        results = []
+        for engine in self._engines:
+            with engine.connect() as conn:
+                results.append(tuple(conn.execute(text(f"PRAGMA wal_checkpoint({mode})")).first()))
+        with self._stats_lock:
+            self._stats['checkpoints'] += 1
+            self._stats['last_checkpoint'] = results
+        return results
+
+    def optimize(self):
+        """Run PRAGMA optimize (refreshes planner statistics where needed)."""
+        for engine in self._engines:
+            with engine.connect() as conn:
+                conn.execute(text("PRAGMA optimize"))
+        self._count('optimizes')
+
+    def _pragma_listener(self, pragmas):
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas:
+                    cursor.execute(f"PRAGMA {name}={value}")
+            finally:
+                cursor.close()
+            self._count('connections')
+        return apply_pragmas
+
+    def _ensure_worker(self):
+        # Started lazily in each process, as threads do not survive the fork
+        # from Passenger's preloaded parent (see TrafficRecorder)
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = pid
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='sqlite-maintenance', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        intervals = [i for i in (self.checkpoint_interval, self.optimize_interval) if i > 0]
+        tick = min(intervals)
+        last_checkpoint = last_optimize = time.monotonic()
+        while not self._stopping.wait(tick):
+            now = time.monotonic()
+            try:
+                if self.checkpoint_interval > 0 and now - last_checkpoint >= self.checkpoint_interval:
+                    last_checkpoint = now
+                    self.checkpoint()
+                if self.optimize_interval > 0 and now - last_optimize >= self.optimize_interval:
+                    last_optimize = now
+                    self.optimize()
+            except Exception as e:
+                self._count('failed')
+                print(f"Error in SQLite maintenance: {e}")
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
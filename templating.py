@@ -0,0 +1,54 @@
+import os
+import time
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_bytecode_cache(app):
+    """
+    Attach a filesystem bytecode cache to the app's Jinja environment.
+
+    Compiled templates are written to JINJA_BYTECODE_CACHE_DIR (defaults to
+    ``instance/jinja_cache``) and shared by every worker, so a freshly
+    spawned worker loads bytecode instead of parsing and compiling the theme
+    and admin templates again. Jinja stores a checksum of the template source
+    with each entry and recompiles when the template has changed.
+
+    Returns:
+        str: Cache directory, or None when the cache is disabled
+    """
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if cache_dir is None:
+        cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+    if not cache_dir:
+        return None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating Jinja bytecode cache directory: {e}")
+        return None
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    return cache_dir
+
+
+def precompile_templates(app, prefix=None):
+    """
+    Compile every template the app can load, filling the bytecode cache.
+
+    Args:
+        app: Flask application
+        prefix (str): Only compile templates whose name starts with this
+
+    Returns:
+        tuple: (compiled template names, list of (name, error) failures, seconds)
+    """
+    started = time.perf_counter()
+    compiled, failed = [], []
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        if prefix and not name.startswith(prefix):
+            continue
+        try:
+            app.jinja_env.get_template(name)
+            compiled.append(name)
+        except Exception as e:
+            failed.append((name, e))
+    return compiled, failed, time.perf_counter() - started
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from aggregates import ORDER_STATUSES, apply_order_insert, order_status_totals
+from extensions import db
+from migrate import upgrade
+from models import Customer, Order, OrderStatusCount
+
+
+def rerun_migration(version):
+    with db.engine.begin() as conn:
+        conn.execute(text("DELETE FROM schema_version WHERE version = :version"), {'version': version})
+    return upgrade(None)
+
+
+def test_fresh_database_has_every_status_counter(app):
+    assert {c.status for c in OrderStatusCount.query} == set(ORDER_STATUSES)
+
+
+def test_migration_backfills_customers_and_status_counts(app):
+    # Orders written before the aggregate tables existed
+    now = datetime.utcnow()
+    db.session.execute(db.insert(Order), [
+        {'full_name': 'Old Name', 'shipping_address': 'Dhaka', 'mobile_number': '01711111111',
+         'total_price': 990, 'status': 'Completed', 'timestamp': now - timedelta(days=3)},
+        {'full_name': 'New Name', 'shipping_address': 'Dhaka', 'mobile_number': '01711111111',
+         'total_price': 1980, 'status': 'Pending', 'timestamp': now - timedelta(days=1)},
+        {'full_name': 'Other', 'shipping_address': 'Khulna', 'mobile_number': '01822222222',
+         'total_price': 500, 'status': 'Cancelled', 'timestamp': now - timedelta(days=2)},
+    ])
+    db.session.execute(db.delete(Customer))
+    db.session.execute(db.delete(OrderStatusCount))
+    db.session.commit()
+
+    assert (5, 'order_aggregates') in rerun_migration(5)
+
+    customer = db.session.get(Customer, '01711111111')
+    assert (customer.order_count, customer.lifetime_spend, customer.full_name, customer.last_status) == \
+        (2, 2970, 'New Name', 'Pending')
+    stats = order_status_totals()
+    assert (stats['total'], stats['pending'], stats['completed'], stats['cancelled'], stats['confirmed']) == (3, 1, 1, 1, 0)
+
+    # The returning customer's next order counts on top of the backfill
+    order = Order(full_name='New Name', shipping_address='Dhaka', mobile_number='01711111111', total_price=990)
+    db.session.add(order)
+    apply_order_insert(order)
+    db.session.commit()
+    assert db.session.get(Customer, '01711111111').order_count == 3
+    assert order_status_totals()['pending'] == 2
+
+
+def test_customer_search_by_name_or_mobile(client, login):
+    now = datetime.utcnow()
+    for mobile, name in (('01711111111', 'Rahim 2'), ('01822222222', 'Karim'), ('01933333333', 'Rahim')):
+        db.session.add(Customer(mobile_number=mobile, full_name=name, order_count=1, lifetime_spend=990,
+                                first_order_at=now, last_order_at=now))
+    db.session.commit()
+    login()
+
+    def search(term):
+        html = client.get('/admin/customers', query_string={'search': term}).get_data(as_text=True)
+        return {mobile for mobile in ('01711111111', '01822222222', '01933333333') if mobile in html}
+
+    # A name containing digits is still a name
+    assert search('Rahim 2') == {'01711111111'}
+    assert search('rahim') == {'01711111111', '01933333333'}
+    # Mobile prefixes, with Bengali digits, spaces or a country code
+    assert search('0182') == {'01822222222'}
+    assert search('০১৯৩') == {'01933333333'}
+    assert search('017 1111') == {'01711111111'}
+    assert search('+8801711111111') == {'01711111111'}
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import bucketing
+import charts
+
+NOW = datetime(2024, 3, 10, 10, 30)
+TICK = timedelta(microseconds=1)
+
+
+@pytest.fixture(params=['numpy', 'bisect'])
+def engine(request, monkeypatch):
+    """Run each test with NumPy and with the pure Python fallback."""
+    if request.param == 'bisect':
+        monkeypatch.setattr(bucketing, '_numpy', False)
+    elif bucketing.numpy() is None:
+        pytest.skip("NumPy is not installed")
+    return request.param
+
+
+def test_hourly_edges_end_with_the_current_hour():
+    edges = bucketing.bucket_edges(bucketing.hourly(3), NOW)
+    assert edges == [datetime(2024, 3, 10, h) for h in (8, 9, 10, 11)]
+    assert bucketing.bucket_labels(bucketing.hourly(3), edges) == ['08:00', '09:00', '10:00']
+
+
+def test_daily_edges_are_aligned_to_midnight():
+    spec = bucketing.daily(3, days=2)
+    edges = bucketing.bucket_edges(spec, NOW)
+    assert edges == [datetime(2024, 3, d) for d in (5, 7, 9, 11)]
+    # Each bucket is labelled with the last day it contains
+    assert bucketing.bucket_labels(spec, edges) == ['06/03', '08/03', '10/03']
+
+
+def test_events_on_an_edge_fall_in_the_later_bucket(engine):
+    edges = bucketing.bucket_edges(bucketing.hourly(3), NOW)
+    timestamps = [
+        edges[0] - TICK,   # just before the window: dropped
+        edges[0],          # first edge: first bucket
+        edges[1] - TICK,   # last instant of the first bucket
+        edges[1],          # inner edge: second bucket
+        edges[2],
+        edges[3] - TICK,   # last instant of the window
+        edges[3],          # end edge is exclusive: dropped
+    ]
+    assert bucketing.histogram(timestamps, edges) == [2, 1, 2]
+
+
+def test_weighted_totals_keep_integers_integral(engine):
+    edges = bucketing.bucket_edges(bucketing.hourly(2), NOW)
+    timestamps = [edges[0], edges[1], edges[1], edges[2]]
+    counts, revenues = bucketing.histogram(timestamps, edges, [1, 2, 3, 4], [990, 500, 250.5, 100])
+    assert counts == [1, 5]
+    assert revenues == [990, 750.5]
+    assert all(isinstance(total, int) for total in counts)
+
+
+def test_empty_input(engine):
+    edges = bucketing.bucket_edges(bucketing.daily(4), NOW)
+    assert bucketing.histogram([], edges) == [0, 0, 0, 0]
+    assert bucketing.histogram([], edges, []) == [[0, 0, 0, 0]]
+
+
+def test_traffic_is_bucketed_by_bangladesh_midnight(engine):
+    # 18:00 UTC is midnight in Bangladesh (UTC+6)
+    hits = [
+        (datetime(2024, 3, 9, 17), 3),   # 23:00 on the 9th, local
+        (datetime(2024, 3, 9, 18), 5),   # 00:00 on the 10th, local
+    ]
+    data = charts.traffic_chart_data(hits, now=datetime(2024, 3, 10, 3))
+
+    weekly = data['weekly']
+    assert weekly['labels'][-2:] == ['Sat', 'Sun']
+    assert weekly['counts'][-2:] == [3, 5]
+
+    daily = data['daily']
+    assert daily['labels'][-11:-9] == ['23:00', '00:00']
+    assert daily['counts'][-11:-9] == [3, 5]
+    assert sum(daily['counts']) == 8
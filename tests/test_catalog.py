@@ -0,0 +1,115 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from catalog import CatalogProduct, pack_discount, price_cart
+from extensions import catalog_cache, db, page_cache, settings_cache, theme_registry
+from models import Order, Product, ProductSetting
+from page_cache import bump_content_version
+
+
+def shop(**settings):
+    return SimpleNamespace(**dict({
+        'landing_page_theme': 'vsl', 'product_name': 'Honey Nut', 'price': 990,
+        'discount_amount': 100, 'discount_amount_3': 200,
+    }, **settings))
+
+
+def test_pack_discount(app):
+    assert [pack_discount(q, shop()) for q in (1, 2, 3, 5)] == [0, 100, 200, 200]
+    # An explicit 0 is no discount; only an unset 3-pack discount defaults
+    assert pack_discount(3, shop(discount_amount_3=0)) == 0
+    assert pack_discount(3, shop(discount_amount_3=None)) == 200
+    assert pack_discount(2, shop(discount_amount=None)) == 0
+    # Themes without package cards charge the plain price they show
+    assert pack_discount(3, shop(landing_page_theme='default')) == 0
+    assert pack_discount(3, shop(landing_page_theme='no-such-theme')) == 0
+
+
+def test_pack_discount_follows_the_theme_metadata(app, monkeypatch):
+    # vsl sets the flag in its theme.json; any theme can opt in the same way
+    assert theme_registry.flag('vsl', 'shows_pack_discount') is True
+    assert theme_registry.flag('modern', 'shows_pack_discount') is False
+    monkeypatch.setitem(theme_registry.metadata, 'modern', {'shows_pack_discount': True})
+    assert pack_discount(2, shop(landing_page_theme='modern')) == 100
+
+
+def test_pack_discount_is_per_line_in_a_mixed_cart(app):
+    catalog = {'7': CatalogProduct(7, 'Dates', 500)}
+
+    # Two of the main product and one other: the 2-pack discount, not the
+    # 3-pack one for three items in total
+    items, quantity, total = price_cart([(None, 2), ('7', 1)], shop(), catalog)
+    assert (quantity, total) == (3, 990 * 2 - 100 + 500)
+    # Other products have no package cards
+    assert price_cart([(None, 1), ('7', 3)], shop(), catalog)[2] == 990 + 500 * 3
+    assert price_cart([(None, 3), ('7', 2)], shop(), catalog)[2] == 990 * 3 - 200 + 500 * 2
+
+
+def rendered_prices(html, theme):
+    """Total the landing page shows for 1, 2 and 3 items."""
+    if theme == 'vsl':
+        # Package cards: selectPackage(quantity, total)
+        packs = dict(re.findall(r'selectPackage\((\d), (\d+)\)', html))
+        return [int(packs[str(quantity)]) for quantity in (1, 2, 3)]
+    # Quantity stepper: quantity x unit price
+    unit_price = int(re.search(r'id="unit-price">\{?\{?\s*(\d+)', html).group(1))
+    return [quantity * unit_price for quantity in (1, 2, 3)]
+
+
+@pytest.mark.parametrize('theme, discount_amount_3', [('vsl', 250), ('vsl', 0), ('default', 250)])
+def test_checkout_charges_the_rendered_price(client, theme, discount_amount_3):
+    settings = ProductSetting.query.first()
+    settings.landing_page_theme = theme
+    settings.price = 990
+    settings.discount_amount = 100
+    settings.discount_amount_3 = discount_amount_3
+    bump_content_version()
+    db.session.commit()
+    settings_cache.invalidate()
+    page_cache.invalidate()
+
+    shown = rendered_prices(client.get('/').get_data(as_text=True), theme)
+    for quantity in (1, 2, 3):
+        client.post('/order', data={
+            'full_name': 'Rahim', 'address': 'Dhaka', 'mobile': f'0171111111{quantity}', 'quantity': str(quantity),
+        })
+    charged = [o.total_price for o in Order.query.order_by(Order.id)]
+    assert charged == shown
+    if theme == 'vsl':
+        assert charged == [990, 1880, 2970 - discount_amount_3]
+
+
+def test_admin_price_edit_reaches_the_caches(client, login, monkeypatch):
+    # A long TTL, so only the bump + invalidate() of the edit can refresh them
+    monkeypatch.setattr(page_cache, 'ttl', 60.0)
+    settings = ProductSetting.query.first()
+    settings.landing_page_theme = 'multy'
+    product = Product(name='Honey Nut', price=990, stock=10, is_active=True,
+                      image_path='https://example.com/honey.jpg')
+    db.session.add(product)
+    bump_content_version()
+    db.session.commit()
+    settings_cache.invalidate()
+    page_cache.invalidate()
+
+    assert catalog_cache.get()[str(product.id)].price == 990
+    assert 'basePrice: 990' in client.get('/').get_data(as_text=True)
+    assert client.get('/').headers['X-Page-Cache'] == 'HIT'
+
+    login()
+    response = client.post(f'/admin/product/edit/{product.id}', data={
+        'name': 'Honey Nut', 'price': '1200', 'old_price': '1500', 'stock': '10', 'is_active': 'y',
+    }, follow_redirects=True)  # renders (and clears) the flash message
+    assert response.status_code == 200
+
+    assert catalog_cache.get()[str(product.id)].price == 1200
+    page = client.get('/')
+    assert page.headers['X-Page-Cache'] == 'MISS'
+    assert 'basePrice: 1200' in page.get_data(as_text=True)
+    client.post('/order', data={
+        'full_name': 'Rahim', 'address': 'Dhaka', 'mobile': '01711111111',
+        'product_id': str(product.id), 'quantity': '1',
+    })
+    assert Order.query.one().total_price == 1200
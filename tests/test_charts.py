@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from charts import order_chart_data, order_hourly_totals
+from extensions import db
+from models import Order
+
+NOW = datetime(2024, 3, 10, 3)  # 09:00 in Bangladesh
+
+
+def add_order(timestamp, total_price):
+    db.session.add(Order(
+        full_name="Rahim", shipping_address="Dhaka", mobile_number="01711111111",
+        total_price=total_price, timestamp=timestamp
+    ))
+
+
+def test_hourly_totals_are_grouped_in_bangladesh_time(app):
+    add_order(datetime(2024, 3, 9, 17, 0), 100)
+    add_order(datetime(2024, 3, 9, 17, 59, 59), 200)
+    add_order(datetime(2024, 3, 9, 18, 0), 400)
+    db.session.commit()
+
+    totals = sorted(order_hourly_totals(datetime(2024, 3, 1)))
+    assert totals == [
+        (datetime(2024, 3, 9, 23), 2, 300),
+        (datetime(2024, 3, 10, 0), 1, 400),
+    ]
+
+
+def test_orders_either_side_of_local_midnight_land_on_different_days(app):
+    add_order(datetime(2024, 3, 9, 17, 59, 59), 990)  # 23:59:59 on the 9th, local
+    add_order(datetime(2024, 3, 9, 18, 0), 500)       # 00:00 on the 10th, local
+    add_order(datetime(2024, 3, 3, 18, 0), 700)       # first local day of the weekly chart
+    add_order(datetime(2024, 3, 3, 17, 59, 59), 50)   # the day before: outside it
+    db.session.commit()
+
+    weekly = order_chart_data(now=NOW)['weekly']
+    assert weekly['labels'] == ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    assert weekly['counts'] == [1, 0, 0, 0, 0, 1, 1]
+    assert weekly['revenues'] == [700, 0, 0, 0, 0, 990, 500]
+
+    daily = order_chart_data(now=NOW)['daily']
+    assert daily['labels'][0] == '10:00' and daily['labels'][-1] == '09:00'
+    assert daily['counts'][13:15] == [1, 1]
+    assert sum(daily['counts']) == 2
@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import Order, OrderItem
+
+# Statements for one /admin load (session, settings, status totals, one page
+# of orders with their items and customer counts, traffic charts); must not
+# depend on how many orders are on the page
+MAX_DASHBOARD_STATEMENTS = 15
+
+
+def add_orders(count, start=0):
+    for i in range(start, start + count):
+        db.session.add(Order(
+            full_name=f"Customer {i}",
+            shipping_address="Dhaka",
+            mobile_number=f"0171{i:07d}",
+            total_price=990,
+            items=[OrderItem(product_name="Honey Nut", price=990, quantity=1) for _ in range(3)]
+        ))
+    db.session.commit()
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements run on every engine (main and traffic binds)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = set(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def dashboard(client, login):
+    login()
+
+    def load():
+        with count_statements() as statements:
+            response = client.get('/admin')
+        assert response.status_code == 200
+        return statements
+    return load
+
+
+def test_dashboard_query_count_is_bounded(dashboard):
+    add_orders(1)
+    dashboard()  # warm-up: one-off work such as seeding the status counters isn't counted
+    single = dashboard()
+
+    add_orders(40, start=1)
+    full_page = dashboard()
+
+    assert len(full_page) == len(single), "dashboard query count grows with the orders on the page"
+    assert len(full_page) <= MAX_DASHBOARD_STATEMENTS, "\n".join(full_page)
@@ -0,0 +1,27 @@
+import pytest
+
+DETAIL_ENDPOINTS = [
+    '/health/traffic', '/health/settings-cache', '/health/page-cache', '/health/catalog',
+    '/health/images', '/health/sqlite', '/health/rate-limit', '/health/order-journal',
+]
+
+
+def test_health_is_public(client):
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.data == b'OK'
+
+
+@pytest.mark.parametrize('path', DETAIL_ENDPOINTS)
+def test_detail_endpoints_need_login(client, path):
+    response = client.get(path)
+    assert response.status_code == 302
+    assert '/admin/login' in response.headers['Location']
+
+
+@pytest.mark.parametrize('path', DETAIL_ENDPOINTS)
+def test_detail_endpoints_for_admin(client, login, path):
+    login()
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.is_json
@@ -0,0 +1,41 @@
+from hll import REGISTERS, STANDARD_ERROR, HyperLogLog
+
+
+def sketch(values):
+    hll = HyperLogLog()
+    for value in values:
+        hll.add(value)
+    return hll
+
+
+def test_estimate_is_within_three_standard_errors():
+    count = 50_000
+    estimate = sketch(f'visitor-{i}' for i in range(count)).count()
+    assert abs(estimate - count) <= 3 * STANDARD_ERROR * count
+
+
+def test_small_counts_are_near_exact():
+    assert sketch([]).count() == 0
+    assert sketch(['a', 'a', 'a']).count() == 1
+    assert abs(sketch(f'10.0.{i // 250}.{i % 250}' for i in range(300)).count() - 300) <= 3
+
+
+def test_merge_is_the_sketch_of_the_union():
+    a = sketch(f'a-{i}' for i in range(2000))
+    b = sketch(f'b-{i}' for i in range(3000))
+    c = sketch([f'a-{i}' for i in range(500)] + [f'c-{i}' for i in range(1000)])  # overlaps a
+
+    left = HyperLogLog(a.to_bytes()).update(b).update(c)
+    right = HyperLogLog(a.to_bytes()).update(HyperLogLog(b.to_bytes()).update(c))
+    swapped = HyperLogLog(c.to_bytes()).update(a).update(b.to_bytes())
+    union = sketch([f'a-{i}' for i in range(2000)] + [f'b-{i}' for i in range(3000)] + [f'c-{i}' for i in range(1000)])
+    assert left.registers == right.registers == swapped.registers == union.registers
+    # Merging is idempotent
+    assert HyperLogLog(union.to_bytes()).update(union).registers == union.registers
+
+
+def test_serialization_round_trip():
+    hll = sketch(str(i) for i in range(100))
+    data = hll.to_bytes()
+    assert len(data) == REGISTERS
+    assert HyperLogLog.from_bytes(data).count() == hll.count()
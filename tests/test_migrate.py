@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def run_script(tmp_path):
+    """Run ``python -m scripts.<name>`` against a database file under tmp_path."""
+    env = {key: value for key, value in os.environ.items() if key != 'TRAFFIC_DATABASE_URL'}
+    env.update(
+        FLASK_CONFIG='production',
+        SECRET_KEY='test',
+        DATABASE_URL=f"sqlite:///{tmp_path / 'site.db'}",
+        JINJA_BYTECODE_CACHE_DIR=str(tmp_path / 'jinja_cache'),
+        RATE_LIMIT_DB=str(tmp_path / 'rate_limit.db'),
+        ORDER_JOURNAL_PATH=str(tmp_path / 'orders.journal'),
+    )
+
+    def run(name, *args):
+        result = subprocess.run([sys.executable, '-m', f'scripts.{name}', *args], cwd=ROOT, env=env,
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout + result.stderr
+        return result.stdout
+
+    run.env = env
+    run.database = str(tmp_path / 'site.db')
+    run.traffic_database = str(tmp_path / 'traffic.db')
+    return run
+
+
+def query(database, sql):
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def applied(database):
+    return {row[0] for row in query(database, "SELECT version FROM schema_version")}
+
+
+def tables(database):
+    return {row[0] for row in query(database, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def test_migrate_cli_sees_pending_migrations(run_script):
+    run_script('bootstrap_db')
+    conn = sqlite3.connect(run_script.database)
+    with conn:
+        conn.execute("DELETE FROM schema_version WHERE version = 5")
+    conn.close()
+
+    # The startup bootstrap must not apply it before the command runs
+    status = run_script('migrate', '--status')
+    assert any(line.split()[0] == '5' and line.endswith('pending') for line in status.splitlines())
+    assert 5 not in applied(run_script.database)
+
+    assert 'No pending migrations.' in run_script('migrate', '--target', '4')
+    assert 5 not in applied(run_script.database)
+
+    assert 'Applied migration 5: order_aggregates' in run_script('migrate')
+    assert 5 in applied(run_script.database)
+
+
+def test_traffic_migrations_run_on_the_traffic_database(run_script):
+    run_script.env['TRAFFIC_DATABASE_URL'] = f"sqlite:///{run_script.traffic_database}"
+    run_script('bootstrap_db')
+
+    # v002 (traffic indexes) and v004 (rollup backfill) are traffic-bind migrations
+    assert applied(run_script.traffic_database) == {2, 4}
+    assert applied(run_script.database) == {1, 3, 5}
+    assert 'traffic' in tables(run_script.traffic_database)
+    assert 'traffic' not in tables(run_script.database)
+    assert 'No pending migrations.' in run_script('migrate')
+
+
+def test_copy_traffic_data_moves_hits_to_the_traffic_database(run_script):
+    run_script('bootstrap_db')
+    conn = sqlite3.connect(run_script.database)
+    with conn:
+        conn.executemany(
+            "INSERT INTO traffic (ip_address, user_agent, path, timestamp) VALUES (?, 'test', '/', ?)",
+            [(f"10.0.0.{i}", f"2024-03-09 1{i}:15:00") for i in range(3)]
+        )
+    conn.close()
+
+    run_script.env['TRAFFIC_DATABASE_URL'] = f"sqlite:///{run_script.traffic_database}"
+    output = run_script('copy_traffic_data', '--drop-source')
+    assert 'Copied 3 traffic rows.' in output
+
+    assert query(run_script.traffic_database, "SELECT COUNT(*) FROM traffic") == [(3,)]
+    assert query(run_script.traffic_database, "SELECT SUM(hits) FROM traffic_rollup") == [(3,)]
+    assert not tables(run_script.database) & {'traffic', 'traffic_rollup', 'traffic_sketch'}
+
+    # Re-running copies nothing new
+    assert 'No traffic table in the main database' in run_script('copy_traffic_data')
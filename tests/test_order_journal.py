@@ -0,0 +1,172 @@
+import os
+
+import pytest
+
+import order_journal as order_journal_module
+from extensions import db, order_journal as app_journal
+from models import Order, OrderToken
+from order_journal import OrderJournal, encode_record, record_error
+
+
+# A well-formed checkout token (see idempotency.clean_token)
+TOKEN = 'a' * 32
+
+
+def record(**overrides):
+    return dict({
+        'full_name': 'Rahim', 'address': 'Dhaka', 'mobile': '01711111111',
+        'items': [{'product_name': 'Honey Nut', 'price': 990, 'quantity': 2}],
+        'quantity': 2, 'total_price': 1780,
+    }, **overrides)
+
+
+@pytest.fixture
+def journal(app, tmp_path):
+    """A journal under tmp_path, drained by hand (no drainer thread)."""
+    journal = OrderJournal()
+    journal.app = app
+    journal.enabled = True
+    journal.path = str(tmp_path / 'orders.journal')
+    journal.batch_size = 3
+    return journal
+
+
+def write_lines(journal, *lines):
+    with open(journal.path, 'ab') as f:
+        for line in lines:
+            f.write(line)
+
+
+def read_lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return f.read().splitlines()
+
+
+def test_append_then_drain_inserts_each_order_once(journal):
+    intake_ids = [journal.append(record(mobile=f'0171111111{i}')) for i in range(5)]
+
+    assert journal.drain() == 5  # two batches of up to three
+    orders = Order.query.order_by(Order.id).all()
+    assert [o.intake_id for o in orders] == intake_ids
+    assert [(i.product_name, i.quantity) for i in orders[0].items] == [('Honey Nut', 2)]
+    assert journal._read_offset() == os.path.getsize(journal.path)
+    assert journal.drain() == 0
+    assert journal.stats()['pending_records'] == 0
+
+
+def test_replayed_records_are_skipped_by_intake_id_and_token(journal):
+    journal.append(record(intake_id='intake-1'))
+    journal.append(record(intake_id='intake-1'))
+    journal.append(record(intake_id='intake-2', order_token='token-1'))
+    journal.append(record(intake_id='intake-3', order_token='token-1'))
+    assert journal.drain() == 2
+    assert db.session.get(OrderToken, 'token-1') is not None
+
+    # A crash between the commit and the offset write replays the journal
+    journal._write_offset(0)
+    assert journal.drain() == 0
+    assert Order.query.count() == 2
+    assert journal.stats()['duplicates'] == 2 + 4
+
+
+def test_corrupt_and_torn_lines_are_set_aside(journal):
+    good = encode_record(record(intake_id='good'))
+    torn = encode_record(record(intake_id='torn'))[:40]
+    write_lines(journal, b'not a record\n', b'00000000 {"bad":"checksum"}\n', torn)
+    journal.append(record(intake_id='after-torn'))  # continues the torn line
+    write_lines(journal, good)
+
+    assert journal.drain() == 2
+    assert {o.intake_id for o in Order.query} == {'after-torn', 'good'}
+    assert len(read_lines(journal.path + '.corrupt')) == 3
+    assert journal._read_offset() == os.path.getsize(journal.path)
+
+
+def test_malformed_records_are_rejected_without_blocking_the_journal(journal):
+    # Valid checksums, but unusable records
+    write_lines(
+        journal,
+        encode_record({'intake_id': 'no-fields'}),
+        encode_record(record(intake_id='bad-item', items=[{'product_name': 'Honey Nut'}])),
+        encode_record(['not', 'an', 'object']),
+    )
+    journal.append(record(intake_id='good'))
+
+    assert journal.drain() == 1
+    assert [o.intake_id for o in Order.query] == ['good']
+    assert len(read_lines(journal.path + '.rejected')) == 3
+    assert journal.stats()['rejected'] == 3
+    assert journal._read_offset() == os.path.getsize(journal.path)
+
+
+def test_insert_failures_of_any_kind_are_rejected(journal, monkeypatch):
+    build_order = order_journal_module.build_order
+
+    def failing_build_order(record):
+        if record['full_name'] == 'Boom':
+            raise ValueError('cannot build order')
+        return build_order(record)
+
+    monkeypatch.setattr(order_journal_module, 'build_order', failing_build_order)
+    journal.append(record(full_name='Boom'))
+    journal.append(record(full_name='Karim'))
+
+    assert journal.drain() == 1
+    assert [o.full_name for o in Order.query] == ['Karim']
+    rejected, = read_lines(journal.path + '.rejected')
+    assert b'cannot build order' in rejected
+
+
+def test_record_error():
+    assert record_error(record(intake_id='x')) is None
+    assert record_error(record(intake_id='x', order_token='t', received_at='2026-01-01T10:00:00')) is None
+    assert record_error(record()) == "intake_id is missing or not str"
+    assert record_error(record(intake_id='x', total_price=True)) == "total_price is missing or not int"
+    assert record_error(record(intake_id='x', received_at='yesterday')) == "received_at is not an ISO timestamp"
+
+
+def test_drained_journal_is_rotated(journal):
+    journal.rotate_bytes = 1
+    journal.append(record(intake_id='first'))
+    assert journal.drain() == 1
+    assert os.path.getsize(journal.path) == 0
+    assert journal._read_offset() == 0
+    assert journal.stats()['rotations'] == 1
+
+    journal.append(record(intake_id='second'))
+    assert journal.drain() == 1
+    assert {o.intake_id for o in Order.query} == {'first', 'second'}
+
+
+def test_place_order_goes_through_the_journal(app, client, tmp_path, monkeypatch):
+    # TestingConfig inserts inline; no drainer thread was registered
+    monkeypatch.setattr(app_journal, 'enabled', True)
+    monkeypatch.setattr(app_journal, 'path', str(tmp_path / 'orders.journal'))
+
+    response = client.post('/order', data={
+        'full_name': 'Rahim', 'address': 'Dhaka', 'mobile': '01711111111', 'quantity': '1', 'order_token': TOKEN,
+    })
+    assert f'intake={TOKEN}' in response.headers['Location']
+    assert Order.query.count() == 0
+
+    # The thank-you page shows the order as processing and leaves the
+    # insert to the background drainer
+    page = client.get(response.headers['Location']).get_data(as_text=True)
+    assert 'data-order-processing' in page
+    assert Order.query.count() == 0
+
+    assert app_journal.drain() == 1
+    order, = Order.query.all()
+    assert (order.intake_id, order.mobile_number) == (TOKEN, '01711111111')
+    assert 'data-order-processing' not in client.get(response.headers['Location']).get_data(as_text=True)
+
+
+def test_pending_record(journal):
+    intake_id = journal.append(record(full_name='Karim'))
+    assert journal.pending_record(intake_id)['full_name'] == 'Karim'
+    assert journal.pending_record('unknown') is None
+
+    journal.drain()
+    assert journal.pending_record(intake_id) is None
@@ -0,0 +1,105 @@
+import pytest
+
+from extensions import rate_limiter
+from models import Order
+
+ORDER = {'full_name': 'Rahim', 'address': 'Dhaka', 'quantity': '1'}
+
+
+@pytest.fixture
+def limited(app, monkeypatch):
+    """Turn the rate limiter on (TestingConfig disables it) with a small per-IP limit."""
+    monkeypatch.setattr(rate_limiter, 'enabled', True)
+    monkeypatch.setitem(rate_limiter.limits, 'order_ip', (2, 600.0))
+
+
+def place(client, mobile, ip='10.0.0.1', **fields):
+    return client.post('/order', data=dict(ORDER, mobile=mobile, **fields), headers={'X-Real-IP': ip})
+
+
+def test_rejected_submissions_do_not_spend_the_ip_limit(client, limited):
+    # Typos from a shared address: missing fields and invalid numbers
+    for _ in range(5):
+        client.post('/order', data={'full_name': 'Rahim', 'mobile': '01711111111'})
+        place(client, '12345')
+    assert Order.query.count() == 0
+
+    response = place(client, '01711111111')
+    assert '/thank-you' in response.headers['Location']
+    # A repeat from the same number is stopped by the per-number limit only
+    place(client, '01711111111')
+    assert place(client, '01722222222').status_code == 302
+    assert Order.query.count() == 2
+
+
+def test_ip_limit_counts_accepted_orders(client, limited):
+    for mobile in ('01711111111', '01722222222', '01733333333'):
+        place(client, mobile)
+    assert [o.mobile_number for o in Order.query.order_by(Order.id)] == ['01711111111', '01722222222']
+
+
+def test_ip_limited_submission_leaves_the_number_free(client, limited):
+    place(client, '01711111111')
+    place(client, '01722222222')
+    # The shared address is used up; this number was never accepted
+    assert 'thank-you' not in place(client, '01733333333').headers['Location']
+
+    assert '/thank-you' in place(client, '01733333333', ip='10.0.0.2').headers['Location']
+    assert Order.query.count() == 3
+
+
+def test_failed_insert_gives_the_limits_back(client, limited, monkeypatch):
+    import routes.orders
+
+    def failing_add_orders(records):
+        raise RuntimeError('database unavailable')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(routes.orders, 'add_orders', failing_add_orders)
+        with pytest.raises(RuntimeError):
+            place(client, '01711111111')
+
+    assert '/thank-you' in place(client, '01711111111').headers['Location']
+    assert Order.query.count() == 1
+
+
+def test_replayed_token_does_not_spend_the_ip_limit(client, limited):
+    token = 'a' * 32
+    for _ in range(3):
+        place(client, '01711111111', order_token=token)
+    assert '/thank-you' in place(client, '01722222222').headers['Location']
+    assert Order.query.count() == 2
+
+
+def test_replayed_token_returns_the_original_order(client):
+    token = 'b' * 32
+    first = place(client, '01711111111', order_token=token).headers['Location']
+    order, = Order.query.all()
+    assert first.endswith(f'order_id={order.id}')
+
+    # A second tap on the order button (even with edited fields) lands on
+    # the same thank-you page and creates nothing
+    assert place(client, '01722222222', order_token=token).headers['Location'] == first
+    assert Order.query.count() == 1
+
+
+def test_replayed_token_is_deduplicated_through_the_journal(app, client, tmp_path, monkeypatch):
+    from extensions import order_journal
+
+    monkeypatch.setattr(order_journal, 'enabled', True)
+    monkeypatch.setattr(order_journal, 'path', str(tmp_path / 'orders.journal'))
+    token = 'c' * 32
+
+    # Both submissions reach the journal before the drainer runs; the token
+    # is the intake id, so the drainer inserts one order
+    first = place(client, '01711111111', order_token=token).headers['Location']
+    second = place(client, '01722222222', order_token=token).headers['Location']
+    assert first == second == f'/thank-you?intake={token}'
+    assert order_journal.drain() == 1
+    order, = Order.query.all()
+    assert (order.intake_id, order.mobile_number) == (token, '01711111111')
+
+    # Once drained, a replay goes straight to the order
+    assert place(client, '01711111111', order_token=token).headers['Location'].endswith(f'order_id={order.id}')
+    assert order_journal.drain() == 0
+    assert Order.query.count() == 1
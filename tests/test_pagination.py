@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from extensions import db
+from models import Review
+from pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+@pytest.mark.parametrize('timestamp', [datetime(2026, 3, 1, 9, 30, 15, 123456), None])
+def test_cursor_round_trip(timestamp):
+    cursor = encode_cursor(SimpleNamespace(timestamp=timestamp, id=42))
+    assert decode_cursor(cursor) == (timestamp, 42)
+
+
+@pytest.mark.parametrize('cursor', [None, '', 'not base64!', 'Zm9v', encode_cursor(SimpleNamespace(timestamp=None, id=1))[:-2]])
+def test_malformed_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+
+@pytest.fixture
+def reviews(app):
+    """Reviews with tied and NULL timestamps, in newest-first page order."""
+    base = datetime(2026, 3, 1)
+    timestamps = [base + timedelta(hours=i // 2) for i in range(9)] + [None] * 4
+    db.session.execute(db.insert(Review), [
+        {'customer_name': f'Customer {i}', 'comment': 'Good', 'timestamp': timestamp}
+        for i, timestamp in enumerate(timestamps)
+    ])
+    db.session.commit()
+    rows = Review.query.all()
+    dated = sorted((r for r in rows if r.timestamp), key=lambda r: (r.timestamp, r.id), reverse=True)
+    undated = sorted((r for r in rows if not r.timestamp), key=lambda r: r.id, reverse=True)
+    return [r.id for r in dated + undated]
+
+
+def test_keyset_pages_walk_forward_and_back(reviews):
+    pages, page = [], keyset_paginate(Review.query, Review, per_page=3)
+    pages.append(page)
+    while page.has_next:
+        page = keyset_paginate(Review.query, Review, per_page=3, after=page.next_cursor)
+        pages.append(page)
+    assert [r.id for p in pages for r in p.items] == reviews
+
+    # Back from the last page (which starts inside the NULL timestamps)
+    back = []
+    while page.has_prev:
+        page = keyset_paginate(Review.query, Review, per_page=3, before=page.prev_cursor)
+        back.insert(0, [r.id for r in page.items])
+    assert sum(back, []) == reviews[:len(reviews) - len(pages[-1].items)]
+
+
+def test_reviews_endpoint_pages_past_null_timestamps(client, reviews):
+    seen, cursor = [], ''
+    while True:
+        response = client.get('/reviews', query_string={'format': 'json', 'after': cursor})
+        assert response.status_code == 200
+        seen += [review['id'] for review in response.get_json()['reviews']]
+        cursor = response.headers['X-Next-Cursor']
+        if not cursor:
+            break
+    assert seen == reviews
+
+
+def test_admin_reviews_pages_past_null_timestamps(client, login, reviews):
+    login()
+    assert client.get('/admin/reviews').status_code == 200
+    cursor = encode_cursor(db.session.get(Review, reviews[-2]))  # an undated review
+    response = client.get('/admin/reviews', query_string={'after': cursor})
+    assert response.status_code == 200
+    assert 'Customer' in response.get_data(as_text=True)
@@ -0,0 +1,109 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import Customer, Order
+from pagination import encode_cursor
+from scripts.check_query_plans import hot_queries, query_plan, seed
+
+# Plan steps that read a table without an index: "SCAN order" (but not
+# "SCAN order USING [COVERING] INDEX ...")
+FULL_SCAN = re.compile(r'^SCAN (\S+)$')
+INDEXED_TABLES = {'order', 'order_item', 'customer'}
+
+
+@pytest.fixture
+def seeded(app):
+    seed(count=2000)
+
+
+@contextmanager
+def capture_selects(engine):
+    """Collect the (statement, parameters) of every SELECT run on an engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def explain(engine, statement, parameters):
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def uses_index(plan, index):
+    return any(re.search(rf'USING (COVERING )?INDEX {index}\b', step) for step in plan)
+
+
+def test_hot_queries_use_their_indexes(seeded):
+    for description, query, index in hot_queries():
+        plan = query_plan(query)
+        assert uses_index(plan, index), f"{description}: {plan}"
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'status': 'Pending'},
+    {'status': 'Pending', 'cursor': 'after'},
+    {'status': 'Completed', 'cursor': 'before'},
+])
+def test_dashboard_queries_do_not_scan_order_tables(seeded, client, login, params):
+    login()
+    if 'cursor' in params:
+        anchor = Order.query.filter_by(status=params['status']).order_by(Order.timestamp.desc()).offset(40).first()
+        params = {'status': params['status'], params['cursor']: encode_cursor(anchor)}
+
+    with capture_selects(db.engine) as statements:
+        assert client.get('/admin', query_string=params).status_code == 200
+
+    checked = 0
+    for statement, parameters in statements:
+        plan = explain(db.engine, statement, parameters)
+        scans = [m.group(1).strip('"') for m in map(FULL_SCAN.match, plan) if m]
+        assert not INDEXED_TABLES & set(scans), f"{statement}\n{plan}"
+        checked += 'FROM "order"' in statement
+    assert checked
+
+
+def test_dashboard_status_page_seeks_the_status_index(seeded, client, login):
+    login()
+    with capture_selects(db.engine) as statements:
+        client.get('/admin', query_string={'status': 'Pending'})
+
+    page_queries = [(s, p) for s, p in statements if 'FROM "order"' in s and 'ORDER BY' in s]
+    assert page_queries
+    for statement, parameters in page_queries:
+        assert uses_index(explain(db.engine, statement, parameters), 'ix_order_status_timestamp')
+
+
+def test_mobile_lookups_use_an_index_without_ix_order_mobile_number(seeded):
+    # v001 replaced ix_order_mobile_number with ix_order_mobile_timestamp
+    names = {row[0] for row in db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert 'ix_order_mobile_number' not in names
+
+    mobiles = ['01710000001', '01710000002']
+    lookups = [
+        ("a customer's orders, newest first",
+         Order.query.filter(Order.mobile_number == mobiles[0]).order_by(Order.timestamp.desc()),
+         'ix_order_mobile_timestamp'),
+        ("orders of several customers (refresh_customers)",
+         db.session.query(Order.mobile_number, Order.total_price, Order.timestamp)
+         .filter(Order.mobile_number.in_(mobiles)).order_by(Order.timestamp),
+         'ix_order_mobile_timestamp'),
+        ("order history counts on the dashboard",
+         db.session.query(Customer.mobile_number, Customer.order_count).filter(Customer.mobile_number.in_(mobiles)),
+         'sqlite_autoindex_customer_1'),
+    ]
+    for description, query, index in lookups:
+        plan = query_plan(query)
+        assert uses_index(plan, index), f"{description}: {plan}"
@@ -0,0 +1,40 @@
+from extensions import db
+from models import Order
+from search import search_order_ids
+
+
+def add_orders(statuses):
+    db.session.execute(db.insert(Order), [
+        {'full_name': f'Rahim Khan {i}', 'shipping_address': 'Dhaka', 'mobile_number': f'017{i:08d}',
+         'total_price': 990, 'status': status}
+        for i, status in enumerate(statuses)
+    ])
+    db.session.commit()
+    return [o.id for o in Order.query.filter(Order.full_name.like('Rahim%')).order_by(Order.id)]
+
+
+def test_status_filter_is_applied_inside_the_index_query(app):
+    # More than a page of other-status matches ranked ahead of the pending ones
+    ids = add_orders(['Completed'] * 30 + ['Pending'] * 3)
+    pending = set(ids[30:])
+
+    assert set(search_order_ids('rahim', status='Pending', limit=20)) == pending
+    assert len(search_order_ids('rahim', limit=100)) == 33
+
+
+def test_search_results_are_paginated(app):
+    ids = add_orders(['Pending'] * 45)
+
+    pages = [search_order_ids('rahim', limit=20, offset=offset) for offset in (0, 20, 40)]
+    assert [len(p) for p in pages] == [20, 20, 5]
+    assert sorted(sum(pages, [])) == ids
+
+
+def test_dashboard_links_to_the_next_search_page(client, login):
+    add_orders(['Pending'] * 25)
+    login()
+
+    first = client.get('/admin?search=rahim&status=Pending').get_data(as_text=True)
+    assert 'page=2' in first
+    last = client.get('/admin?search=rahim&status=Pending&page=2').get_data(as_text=True)
+    assert 'page=1' in last and 'page=3' not in last
@@ -0,0 +1,146 @@
+import json
+import os
+import threading
+import time
+
+# Theme every page falls back to
+DEFAULT_THEME = 'default'
+
+# Optional per-theme metadata file, e.g. {"shows_pack_discount": true}
+THEME_METADATA = 'theme.json'
+
+# Metadata flags and their values for themes that don't set them
+THEME_DEFAULTS = {
+    # The landing page shows 2- and 3-pack cards with discounted prices, so
+    # checkout applies the pack discount (see catalog.pack_discount)
+    'shows_pack_discount': False,
+}
+
+
+class ThemeRegistry:
+    """
+    Registry of the themes under ``templates/themes``.
+
+    The directory is scanned once at startup, recording which templates each
+    theme provides (pages and partials alike), and every theme template is
+    compiled into the Jinja environment's cache, so request handlers resolve
+    a theme with a dict lookup instead of probing the filesystem. A theme
+    can describe itself in ``theme.json`` (see THEME_DEFAULTS). With
+    THEMES_AUTO_RELOAD (on in debug mode) the directory is re-scanned when it
+    changes, checked at most once a second.
+
+    Usage:
+        theme_registry = ThemeRegistry()
+        theme_registry.init_app(app)
+
+        template_path = theme_registry.resolve(settings.landing_page_theme, 'index.html')
+    """
+
+    def __init__(self, app=None):
+        self.themes = {}
+        self.metadata = {}
+        self.themes_dir = None
+        self.auto_reload = False
+        self._app = None
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._app = app
+        self.themes_dir = os.path.join(app.root_path, app.template_folder, 'themes')
+        auto_reload = app.config.get('THEMES_AUTO_RELOAD')
+        self.auto_reload = app.debug if auto_reload is None else auto_reload
+        app.extensions['theme_registry'] = self
+        self.scan()
+
+    def scan(self):
+        """Scan the themes directory and precompile every theme template."""
+        themes, metadata = {}, {}
+        if os.path.isdir(self.themes_dir):
+            for theme in os.listdir(self.themes_dir):
+                theme_dir = os.path.join(self.themes_dir, theme)
+                if not os.path.isdir(theme_dir):
+                    continue
+                themes[theme] = frozenset(
+                    name for name in os.listdir(theme_dir) if name.endswith('.html')
+                )
+                metadata[theme] = self._read_metadata(theme_dir)
+
+        for theme, templates in themes.items():
+            for name in templates:
+                try:
+                    self._app.jinja_env.get_template(f'themes/{theme}/{name}')
+                except Exception as e:
+                    print(f"Error compiling theme template {theme}/{name}: {e}")
+
+        with self._lock:
+            self.themes = themes
+            self.metadata = metadata
+            self._signature = self._directory_signature()
+            self._checked_at = time.monotonic()
+        return themes
+
+    def resolve(self, theme, page):
+        """
+        Return the template path for a theme page, falling back to the
+        default theme when the theme or its page doesn't exist.
+        """
+        self._reload_if_changed()
+        theme = theme or DEFAULT_THEME
+        if page not in self.themes.get(theme, ()):
+            theme = DEFAULT_THEME
+        return f'themes/{theme}/{page}'
+
+    def flag(self, theme, name, page='index.html'):
+        """
+        Return a metadata flag (see THEME_DEFAULTS) of the theme that serves
+        ``page`` for ``theme``, i.e. after the same fallback as resolve().
+        """
+        self._reload_if_changed()
+        theme = theme or DEFAULT_THEME
+        if page not in self.themes.get(theme, ()):
+            theme = DEFAULT_THEME
+        return self.metadata.get(theme, {}).get(name, THEME_DEFAULTS[name])
+
+    def choices(self):
+        """Return (name, label) choices for the theme select fields."""
+        self._reload_if_changed()
+        names = set(self.themes) or {DEFAULT_THEME}
+        return sorted((name, name.capitalize()) for name in names)
+
+    def _read_metadata(self, theme_dir):
+        path = os.path.join(theme_dir, THEME_METADATA)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading {path}: {e}")
+            return {}
+        return {name: metadata[name] for name in THEME_DEFAULTS if name in metadata}
+
+    def _reload_if_changed(self):
+        if not self.auto_reload:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < 1.0:
+                return
+            self._checked_at = now
+        if self._directory_signature() != self._signature:
+            self.scan()
+
+    def _directory_signature(self):
+        # Directory mtimes change when theme folders or templates are added,
+        # removed or renamed; edits to existing files are handled by Jinja
+        if not os.path.isdir(self.themes_dir):
+            return None
+        signature = [os.stat(self.themes_dir).st_mtime_ns]
+        for entry in os.scandir(self.themes_dir):
+            if entry.is_dir():
+                signature.append((entry.name, entry.stat().st_mtime_ns))
+        return tuple(sorted(signature, key=str))
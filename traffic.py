@@ -0,0 +1,481 @@
+import atexit
+import os
+import queue
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from hll import HyperLogLog
+
+
+class TrafficRecorder:
+    """
+    Write-behind recorder for page view tracking.
+
+    Page views are pushed onto an in-process bounded queue and written to the
+    ``Traffic`` table in bulk by a background flusher thread, either when
+    ``TRAFFIC_FLUSH_SIZE`` hits are waiting or every ``TRAFFIC_FLUSH_INTERVAL``
+    seconds, so a landing page request never waits on a database write.
+
+    When the queue is full the ``TRAFFIC_OVERFLOW_POLICY`` decides what is lost:
+    ``drop_newest`` discards the incoming hit, ``drop_oldest`` evicts the oldest
+    queued hit to make room for it.
+    """
+
+    OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest')
+
+    def __init__(self, app=None):
+        self.app = None
+        self.queue_size = 10000
+        self.flush_size = 200
+        self.flush_interval = 2.0
+        self.overflow_policy = 'drop_newest'
+        self.synchronous = False
+        self.visitor_key = 'ip'
+
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'enqueued': 0, 'flushed': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read recorder settings from the app config and register shutdown flushing."""
+        self.app = app
+        self.queue_size = app.config.get('TRAFFIC_QUEUE_SIZE', self.queue_size)
+        self.flush_size = app.config.get('TRAFFIC_FLUSH_SIZE', self.flush_size)
+        self.flush_interval = app.config.get('TRAFFIC_FLUSH_INTERVAL', self.flush_interval)
+        self.overflow_policy = app.config.get('TRAFFIC_OVERFLOW_POLICY', self.overflow_policy)
+        self.synchronous = app.config.get('TRAFFIC_SYNC_WRITES', self.synchronous)
+        self.visitor_key = app.config.get('TRAFFIC_VISITOR_KEY', self.visitor_key)
+
+        if self.overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown TRAFFIC_OVERFLOW_POLICY: {self.overflow_policy}")
+
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        app.extensions['traffic_recorder'] = self
+        atexit.register(self.shutdown)
+
+    def record(self, request, path):
+        """Queue a page view for the given request. Never raises."""
+        try:
+            hit = {
+                'ip_address': request.environ.get('HTTP_X_REAL_IP', request.remote_addr),
+                'user_agent': request.headers.get('User-Agent'),
+                'referrer': request.referrer,
+                'path': path,
+                'timestamp': datetime.utcnow()
+            }
+            if self.synchronous:
+                self._count('enqueued')
+                self._write([hit])
+                return
+            self._ensure_flusher()
+            self._enqueue(hit)
+        except Exception as e:
+            # Log error but don't break the application
+            print(f"Error tracking traffic: {e}")
+
+    def flush(self):
+        """Write every queued hit now. Returns the number of hits flushed."""
+        total = 0
+        while True:
+            batch = self._drain(self.flush_size)
+            if not batch:
+                return total
+            self._write(batch)
+            total += len(batch)
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flusher thread (if any) and write whatever is still queued."""
+        self._stopping.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        if self._queue is not None:
+            self.flush()
+
+    def stats(self):
+        """Return a snapshot of the recorder counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queued'] = self._queue.qsize() if self._queue is not None else 0
+        stats['overflow_policy'] = self.overflow_policy
+        return stats
+
+    def _enqueue(self, hit):
+        try:
+            self._queue.put_nowait(hit)
+        except queue.Full:
+            if self.overflow_policy != 'drop_oldest':
+                self._count('dropped')
+                return
+            try:
+                self._queue.get_nowait()
+                self._count('dropped')
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(hit)
+            except queue.Full:
+                self._count('dropped')
+                return
+
+        self._count('enqueued')
+        if self._queue.qsize() >= self.flush_size:
+            self._wake.set()
+
+    def _ensure_flusher(self):
+        # Passenger forks workers from a preloaded parent, and threads do not
+        # survive a fork, so the flusher is started lazily in each process.
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == pid and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid is not None and self._pid != pid:
+                # Queue and locks copied from the parent may be in any state
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._write_lock = threading.Lock()
+            self._pid = pid
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='traffic-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing traffic: {e}")
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        from extensions import db
+        from models import Traffic
+
+        with self._write_lock, self.app.app_context():
+            try:
+                # The raw insert comes first so that on SQLite this transaction
+                # already holds the write lock when sketches are read and merged
+                db.session.execute(db.insert(Traffic), batch)
+                apply_rollups(rollup_counts(batch))
+                apply_sketches(sketch_updates(batch, self.visitor_key))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._count('failed', len(batch))
+                print(f"Error writing traffic batch: {e}")
+                return
+        self._count('flushed', len(batch))
+        self._count('batches')
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+
+def hour_bucket(timestamp):
+    """Truncate a timestamp to the start of its hour."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(timestamp):
+    """Truncate a timestamp to the start of its (UTC) day."""
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def referrer_host(referrer):
+    """Reduce a referrer URL to its host name ('' for direct visits)."""
+    if not referrer:
+        return ''
+    try:
+        host = (urlparse(referrer).hostname or '').lower()
+    except ValueError:
+        return ''
+    if host.startswith('www.'):
+        host = host[4:]
+    return host[:255]
+
+
+def rollup_counts(hits):
+    """
+    Aggregate raw hits into rollup increments.
+
+    Args:
+        hits (iterable): Dicts (or rows) with timestamp, path and referrer
+
+    Returns:
+        Counter: Hit counts keyed by (hour, path, referrer_host)
+    """
+    counts = Counter()
+    for hit in hits:
+        if isinstance(hit, dict):
+            timestamp, path, referrer = hit['timestamp'], hit['path'], hit['referrer']
+        else:
+            timestamp, path, referrer = hit.timestamp, hit.path, hit.referrer
+        counts[(hour_bucket(timestamp), (path or '')[:500], referrer_host(referrer))] += 1
+    return counts
+
+
+def apply_rollups(counts):
+    """
+    Add rollup increments to the TrafficRollup table in the current session.
+
+    Uses a single INSERT .. ON CONFLICT upsert on SQLite/PostgreSQL and falls
+    back to read-modify-write on other databases. The caller commits.
+    """
+    from extensions import db
+    from models import TrafficRollup
+
+    if not counts:
+        return
+
+    rows = [
+        {'hour': hour, 'path': path, 'referrer_host': host, 'hits': hits}
+        for (hour, path, host), hits in counts.items()
+    ]
+    dialect = db.session.get_bind(mapper=TrafficRollup).dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(TrafficRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['hour', 'path', 'referrer_host'],
+            set_={'hits': TrafficRollup.hits + stmt.excluded.hits}
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        rollup = TrafficRollup.query.filter_by(
+            hour=row['hour'], path=row['path'], referrer_host=row['referrer_host']
+        ).with_for_update().first()
+        if rollup:
+            rollup.hits += row['hits']
+        else:
+            db.session.add(TrafficRollup(**row))
+
+
+def rebuild_rollups(since=None, batch_size=5000):
+    """
+    Catch-up job: recompute rollups from raw Traffic rows.
+
+    Rollup and sketch buckets from the day containing ``since`` onwards are
+    deleted and rebuilt, so the job is safe to re-run. Must be called inside an
+    app context.
+
+    Args:
+        since (datetime): Rebuild from this time (UTC); None rebuilds everything
+        batch_size (int): Raw rows streamed per fetch
+
+    Returns:
+        int: Number of raw Traffic rows rolled up
+    """
+    from flask import current_app
+    from extensions import db
+    from models import TrafficRollup
+
+    conn = db.session.connection(bind_arguments={'mapper': TrafficRollup})
+    total = rebuild_rollups_on(conn, current_app.config.get('TRAFFIC_VISITOR_KEY', 'ip'), since, batch_size)
+    db.session.commit()
+    return total
+
+
+def rebuild_rollups_on(conn, visitor_key='ip', since=None, batch_size=5000):
+    """
+    Recompute rollups and sketches from raw Traffic rows on a Core connection
+    to the traffic database, in the caller's transaction (see
+    rebuild_rollups(); also used by the traffic migrations).
+
+    Returns:
+        int: Number of raw Traffic rows rolled up
+    """
+    from sqlalchemy import delete, insert, select
+    from models import Traffic, TrafficRollup, TrafficSketch
+
+    raw_table, rollup_table, sketch_table = Traffic.__table__, TrafficRollup.__table__, TrafficSketch.__table__
+    raw = select(raw_table.c.timestamp, raw_table.c.path, raw_table.c.referrer,
+                 raw_table.c.ip_address, raw_table.c.user_agent)
+    delete_rollups, delete_sketches = delete(rollup_table), delete(sketch_table)
+    if since is not None:
+        start = day_bucket(since)
+        delete_rollups = delete_rollups.where(rollup_table.c.hour >= start)
+        delete_sketches = delete_sketches.where(sketch_table.c.bucket >= start)
+        raw = raw.where(raw_table.c.timestamp >= start)
+    conn.execute(delete_rollups)
+    conn.execute(delete_sketches)
+
+    counts = Counter()
+    sketches = {}
+    total = 0
+    for rows in conn.execution_options(yield_per=batch_size).execute(raw).partitions():
+        counts.update(rollup_counts(rows))
+        for key, sketch in sketch_updates(rows, visitor_key).items():
+            if key in sketches:
+                sketches[key].update(sketch)
+            else:
+                sketches[key] = sketch
+        total += len(rows)
+
+    # The buckets were just deleted, so plain inserts are enough
+    if counts:
+        conn.execute(insert(rollup_table), [
+            {'hour': hour, 'path': path, 'referrer_host': host, 'hits': hits}
+            for (hour, path, host), hits in counts.items()
+        ])
+    if sketches:
+        conn.execute(insert(sketch_table), [
+            {'granularity': granularity, 'bucket': bucket, 'registers': sketch.to_bytes()}
+            for (granularity, bucket), sketch in sketches.items()
+        ])
+    return total
+
+
+def rollup_window_start(days, now=None):
+    """Return the first hour bucket inside a window of ``days`` ending now."""
+    now = now or datetime.utcnow()
+    return hour_bucket(now - timedelta(days=days))
+
+
+def visitor_id(hit, mode='ip'):
+    """Build the visitor key counted by the unique visitor sketches."""
+    if isinstance(hit, dict):
+        ip, user_agent = hit.get('ip_address'), hit.get('user_agent')
+    else:
+        ip, user_agent = hit.ip_address, hit.user_agent
+    if mode == 'ip_ua':
+        return f"{ip or ''}|{user_agent or ''}"
+    return ip or ''
+
+
+def sketch_updates(hits, visitor_key='ip'):
+    """
+    Build per-hour and per-day HyperLogLog sketches for a batch of hits.
+
+    Returns:
+        dict: HyperLogLog sketches keyed by (granularity, bucket)
+    """
+    sketches = {}
+    for hit in hits:
+        timestamp = hit['timestamp'] if isinstance(hit, dict) else hit.timestamp
+        visitor = visitor_id(hit, visitor_key)
+        for key in (('hour', hour_bucket(timestamp)), ('day', day_bucket(timestamp))):
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = HyperLogLog()
+            sketch.add(visitor)
+    return sketches
+
+
+def apply_sketches(updates):
+    """
+    Merge sketch updates into the TrafficSketch table in the current session.
+
+    Each bucket is read, merged and written back; on SQLite the caller must
+    already hold the write lock (i.e. have written something earlier in the
+    transaction) so concurrent workers cannot interleave. The caller commits.
+    """
+    from extensions import db
+    from models import TrafficSketch
+
+    for (granularity, bucket), sketch in updates.items():
+        row = TrafficSketch.query.filter_by(
+            granularity=granularity, bucket=bucket
+        ).with_for_update().first()
+        if row:
+            row.registers = sketch.update(row.registers).to_bytes()
+        else:
+            db.session.add(TrafficSketch(
+                granularity=granularity, bucket=bucket, registers=sketch.to_bytes()
+            ))
+
+
+def merged_sketch(start, now=None):
+    """
+    Merge stored sketches covering the window from ``start`` (hour aligned) to now.
+
+    Whole days inside the window come from day sketches; the partial days at
+    either edge come from hour sketches, so at most ~48 hour sketches are read
+    regardless of the window length.
+    """
+    from extensions import db
+    from models import TrafficSketch
+
+    now = now or datetime.utcnow()
+    first_full_day = day_bucket(start)
+    if first_full_day < start:
+        first_full_day += timedelta(days=1)
+    today = day_bucket(now)
+
+    merged = HyperLogLog()
+    days = db.session.query(TrafficSketch.registers).filter(
+        TrafficSketch.granularity == 'day',
+        TrafficSketch.bucket >= first_full_day,
+        TrafficSketch.bucket < today
+    )
+    hours = db.session.query(TrafficSketch.registers).filter(
+        TrafficSketch.granularity == 'hour',
+        TrafficSketch.bucket >= start,
+        db.or_(TrafficSketch.bucket < min(first_full_day, today), TrafficSketch.bucket >= today)
+    )
+    for (registers,) in days.union_all(hours):
+        merged.update(registers)
+    return merged
+
+
+def unique_visitors(start, hits=None, now=None):
+    """
+    Count unique visitors since ``start`` (hour aligned).
+
+    Windows with at most TRAFFIC_EXACT_UNIQUES_THRESHOLD hits are counted
+    exactly from raw Traffic rows; larger windows are estimated from the merged
+    HyperLogLog sketches (~1.6% standard error, see hll.STANDARD_ERROR).
+
+    Args:
+        start (datetime): Window start (UTC)
+        hits (int): Total hits in the window if already known from rollups
+        now (datetime): Window end, defaults to now
+    """
+    from flask import current_app
+    from extensions import db
+    from models import Traffic, TrafficRollup
+
+    threshold = current_app.config.get('TRAFFIC_EXACT_UNIQUES_THRESHOLD', 0)
+    if hits is None:
+        hits = db.session.query(
+            db.func.coalesce(db.func.sum(TrafficRollup.hits), 0)
+        ).filter(TrafficRollup.hour >= start).scalar()
+
+    if hits <= threshold:
+        if current_app.config.get('TRAFFIC_VISITOR_KEY', 'ip') == 'ip_ua':
+            visitor = db.func.coalesce(Traffic.ip_address, '') + '|' + db.func.coalesce(Traffic.user_agent, '')
+        else:
+            visitor = Traffic.ip_address
+        return db.session.query(
+            db.func.count(db.distinct(visitor))
+        ).filter(Traffic.timestamp >= start).scalar()
+
+    return merged_sketch(start, now).count()
@@ -1,7 +1,6 @@
 import re
 import os
 from werkzeug.utils import secure_filename
-from PIL import Image
 import io
 from datetime import datetime, timedelta, timezone
 
@@ -27,6 +26,36 @@ def convert_to_en_digits(text):
     table = str.maketrans(bn_digits, en_digits)
     return text.translate(table)
 
+def normalize_bd_mobile(number):
+    """
+    Normalise a Bangladeshi mobile number to its 11-digit local form.
+    
+    Args:
+        number (str): Mobile number, possibly with Bengali digits, spaces,
+            dashes or a +88 country code
+        
+    Returns:
+        str: Digits only, e.g. '01712345678'
+    """
+    if not number:
+        return number
+    digits = "".join(ch for ch in convert_to_en_digits(number) if ch.isdigit())
+    if digits.startswith('880') and len(digits) == 13:
+        digits = digits[2:]
+    return digits
+
+def looks_like_mobile(text):
+    """
+    Check whether a search term is (part of) a mobile number rather than a name.
+    
+    Args:
+        text (str): Search input, possibly with Bengali digits
+        
+    Returns:
+        bool: True if it has only digits, spaces, dashes and a leading +
+    """
+    return bool(re.match(r'^\+?[0-9\s-]*[0-9][0-9\s-]*$', convert_to_en_digits(text.strip())))
+
 def is_valid_bd_mobile(number):
     """
     Validate Bangladeshi mobile number format.
@@ -72,6 +101,9 @@ def save_image_as_webp(file, folder, prefix='', max_width=1200):
         return None
         
     try:
+        # Pillow is imported here, not at module load: only admin uploads need it
+        from PIL import Image
+        
         # Generate clean filename
         timestamp = int(get_bd_time().timestamp())
         filename = f"{prefix}_{timestamp}.webp"